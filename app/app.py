@@ -1,49 +1,57 @@
-from app import transactions
-from database.db_config import SessionLocal, Base, engine
+from database import initialize_database
+from database.db_config import ScopedSession, SessionLocal, unit_of_work
 from database.crud.category_crud import CategoryCrud
 from database.crud.user_crud import UserCrud
-from client.windows.base_window import MainWindow
 from app.sessions import SessionManager
 from app.authentication import Authentication
 from app.goals import Goals
 from app.transactions import Transactions
+from app.exporter import TransactionExporter
+from app.background import BackgroundExecutor
 
 from client.windows.login_window import LoginWindow
 
 class FinanceApp:
     def __init__(self):
         self._initialize_database()
-        self._db = SessionLocal()
+        # the services get a session per thread from ScopedSession, so they can be called from any thread,
+        # and every operation the app runs is a unit of work so the sessions don't grow for the app's lifetime
+        self._db = ScopedSession
         self._session_manager = SessionManager()
-        self._authentication = Authentication(self._db)
+        # the windows run their database calls here so the window never waits on sqlite,
+        # the expiry sweep already completes the expired goals so the background reads don't need to
+        self._executor = BackgroundExecutor(ScopedSession, expire_goals_on_read=False)
+        # bcrypt runs on the executor's workers too
+        self._authentication = Authentication(self._db, self._executor)
         self._goals = Goals(self._db)
+        self._goals.start_expiry_sweep(SessionLocal)
         self._user_crud = UserCrud(self._db)
         self._transactions = Transactions(self._db)
         self._category_crud = CategoryCrud(self._db)
+        self._exporter = TransactionExporter(self._db)
         self._user = None
         self.main_window = LoginWindow(self)
 
     def _initialize_database(self):
-        Base.metadata.create_all(bind=engine)
-        session = SessionLocal()
-        try:
-            category_crud = CategoryCrud(session)
-            category_crud.initialize_categories()
-            print("Database initialized successfully")
-        except Exception as e:
-            print(f"Error initializing database: {e}")
-            session.rollback()
-        finally:
-            session.close()
+        # creates the tables, any missing indexes on existing tables, and the default categories,
+        # or only reads the schema version when the database was already set up
+        initialize_database()
 
     def get_daily_report_data(self):
-        return self._transactions.get_daily_report_data(self._user.id)
+        with unit_of_work():
+            return self._transactions.get_daily_report_data(self._user.id)
 
     def get_weekly_report_data(self):
-        return self._transactions.get_weekly_report_data(self._user.id)
+        with unit_of_work():
+            return self._transactions.get_weekly_report_data(self._user.id)
 
     def get_monthly_report_data(self):
-        return self._transactions.get_monthly_report_data(self._user.id)
+        with unit_of_work():
+            return self._transactions.get_monthly_report_data(self._user.id)
+
+    def get_dashboard_report_data(self):
+        with unit_of_work():
+            return self._transactions.get_dashboard_report_data(self._user.id)
 
     @property
     def session_manager(self):
@@ -65,8 +73,21 @@ class FinanceApp:
     def category_crud(self):
         return self._category_crud
 
+    @property
+    def exporter(self):
+        return self._exporter
+
+    @property
+    def executor(self):
+        return self._executor
+
+    def get_category_id(self, name):
+        with unit_of_work():
+            return self._category_crud.get_category_id(name)
+
     def login(self, email, password):
-        user = self._user_crud.authenticate_user(email, password)
+        with unit_of_work():
+            user = self._user_crud.authenticate_user(email, password)
         if user:
             print(user.username)
             self._session_manager.login(user)
@@ -76,7 +97,23 @@ class FinanceApp:
             print("Invalid credentials")
             return None
 
+    def login_in_background(self, email, password, callback, call_on_main_thread):
+        """Log in with bcrypt on a worker thread and call callback(user) on the window's thread."""
+        def finish(status, user, message):
+            if status:
+                self._session_manager.login(user)
+                self._user = user # Saving a reference to the user
+                callback(user)
+            else:
+                print(message)
+                callback(None)
+
+        # the authentication runs each of its database steps in a unit of work, so the callback that
+        # opens the dashboard runs outside of them
+        self._authentication.login_in_background(email, password, finish, call_on_main_thread)
+
     def close(self):
-        if self._db:
-            self._db.close()
+        self._executor.shutdown()
+        self._goals.stop_expiry_sweep()
+        ScopedSession.remove()
         self._session_manager.clear()
\ No newline at end of file
@@ -1,17 +1,22 @@
 from sqlalchemy.orm import Session
+from database.db_config import session_scope
 from database.crud.user_crud import UserCrud
+from app.background import BackgroundExecutor
 from datetime import date
 
 class Authentication:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, executor: BackgroundExecutor = None):
         self._db = db
         self._user_crud = UserCrud(db)
+        # runs bcrypt for the *_in_background methods, on the same workers as the windows' database calls
+        self._executor = executor
 
     def login(self, email: str, password: str):
         if not email or not password:
             return False, None, "Email and password are required"
         try:
-            user = self._user_crud.authenticate_user(email, password)
+            with session_scope(self._db):
+                user = self._user_crud.authenticate_user(email, password)
             if user:
                 return True, user, "Login successful"
             else:
@@ -19,24 +24,110 @@ class Authentication:
         except Exception as e:
             return False, None, f"Error logging in: {e}"
 
-    def register(self, username: str, email: str, password: str, birthdate: date = None):
+    def login_in_background(self, email: str, password: str, callback, call_on_main_thread):
+        """Log in without blocking the window and call callback(status, user, message) when done.
+
+        Only bcrypt runs on one of the executor's worker threads, the user lookup and any rehash use
+        the session on the thread that called this. call_on_main_thread has to run the function it
+        gets on that thread.
+        Each database step is a unit of work of its own that ends before the callback runs, so
+        whatever the callback opens doesn't run inside it.
+        """
+        if not email or not password:
+            callback(False, None, "Email and password are required")
+            return
+        try:
+            with session_scope(self._db):
+                user = self._user_crud.get_user_by_email(email)
+        except Exception as e:
+            callback(False, None, f"Error logging in: {e}")
+            return
+        if not user:
+            callback(False, None, "Invalid login credentials")
+            return
+        stored_hash = user.password
+
+        def check_password():
+            # the stored hash is rehashed with the configured cost factor when it was made with another one
+            if not self._user_crud.verify_password(password, stored_hash):
+                return False, None
+            if self._user_crud.needs_rehash(stored_hash):
+                return True, self._user_crud.hash_password(password)
+            return True, None
+
+        def finish(result, error):
+            if error:
+                callback(False, None, f"Error logging in: {error}")
+                return
+            is_valid, new_hash = result
+            if not is_valid:
+                callback(False, None, "Invalid login credentials")
+                return
+            logged_in_user = user
+            try:
+                if new_hash:
+                    # the lookup's session can be closed by now, the saved user is the one to hand back
+                    with session_scope(self._db):
+                        logged_in_user = self._user_crud.update_password_hash(user, new_hash)
+            except Exception as e:
+                callback(False, None, f"Error logging in: {e}")
+                return
+            callback(True, logged_in_user, "Login successful")
+
+        self._executor.submit_call(check_password, finish, call_on_main_thread)
+
+    def _check_registration(self, username: str, email: str, password: str):
         if not username or not email or not password:
-            return False, "Username, email, and password are required"
+            return "Username, email, and password are required"
         # check to see if password is less than characters
         if (len(password) < 5):
-            return False, "Password have to be longer than 5 characters"
+            return "Password have to be longer than 5 characters"
 
         # check if email already exists
         try:
-            existing_email = self._user_crud.get_user_by_email(email)
+            with session_scope(self._db):
+                existing_email = self._user_crud.get_user_by_email(email)
             if existing_email:
-                return False, "Email already exists"
+                return "Email already exists"
         except Exception as e:
-            return False, f"Eror checking for existing email: {e}"
+            return f"Eror checking for existing email: {e}"
+        return None
+
+    def register_in_background(self, username: str, email: str, password: str, birthdate: date, callback,
+                               call_on_main_thread):
+        """Register without blocking the window and call callback(status, message) when done.
+
+        The password is hashed on one of the executor's worker threads and the user is saved on the
+        thread that called this.
+        """
+        error_message = self._check_registration(username, email, password)
+        if error_message:
+            callback(False, error_message)
+            return
+
+        def finish(hashed_password, error):
+            if error:
+                callback(False, f"Error creating user: {error}")
+                return
+            try:
+                with session_scope(self._db):
+                    self._user_crud.create_user_with_hash(username, email, hashed_password, birthdate)
+            except Exception as e:
+                callback(False, f"Error creating user: {e}")
+                return
+            callback(True, "User created sucessfully")
+
+        self._executor.submit_call(lambda: self._user_crud.hash_password(password), finish, call_on_main_thread)
+
+    def register(self, username: str, email: str, password: str, birthdate: date = None):
+        error_message = self._check_registration(username, email, password)
+        if error_message:
+            return False, error_message
 
         # create the user
         try:
-            user = self._user_crud.create_user(username, email, password, birthdate)
+            with session_scope(self._db):
+                user = self._user_crud.create_user(username, email, password, birthdate)
             if user:
                 return True, "User created sucessfully"
         except Exception as e:
@@ -44,3 +135,4 @@ class Authentication:
 
     def logout(self):
         return True, "Logout successful"
+
@@ -0,0 +1,95 @@
+"""Run service calls on a thread pool so the windows never wait on the database.
+
+A session can only be used by one thread at a time, so every task is a unit of work with a session
+and services of its own, committed and closed once the task is done.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from database.db_config import unit_of_work
+from database.crud.category_crud import CategoryCrud
+from app.exporter import TransactionExporter
+from app.goals import Goals
+from app.transactions import Transactions
+
+# sqlite runs one write at a time anyway, a few workers are enough to keep reads from queueing behind it
+BACKGROUND_WORKERS = 4
+
+
+class BackgroundServices:
+    """The services one background task can use, all sharing the task's session"""
+
+    def __init__(self, db: Session, expire_goals_on_read: bool = True):
+        self.db = db
+        self.transactions = Transactions(db)
+        self.goals = Goals(db, expire_goals_on_read)
+        self.category_crud = CategoryCrud(db)
+        self.exporter = TransactionExporter(db)
+
+
+class BackgroundRequest:
+    """A task handed to the executor, its result is dropped once it is cancelled even when the task already ran"""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.future:
+            self.future.cancel()
+
+
+class BackgroundExecutor:
+    """Run tasks on a pool of worker threads, each with a session of its own.
+
+    The results are handed back through call_on_main_thread since tk can only be used from the
+    thread that made the window.
+    """
+
+    def __init__(self, session_factory, max_workers: int = BACKGROUND_WORKERS, expire_goals_on_read: bool = True):
+        self._session_factory = session_factory
+        self._expire_goals_on_read = expire_goals_on_read
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="finance-tracker-db")
+
+    def run_task(self, task):
+        """Run task(services) right here in a unit of work, so it is committed, or rolled back if it raises"""
+        with unit_of_work(self._session_factory) as db:
+            return task(BackgroundServices(db, self._expire_goals_on_read))
+
+    def submit(self, task, on_done, call_on_main_thread) -> BackgroundRequest:
+        """Run task(services) on a worker thread and then on_done(result, error) through call_on_main_thread.
+
+        Whatever the task returns is used after its session is closed, so it should be plain values or
+        objects that were fully loaded.
+        """
+        return self.submit_call(lambda: self.run_task(task), on_done, call_on_main_thread)
+
+    def submit_call(self, work, on_done, call_on_main_thread) -> BackgroundRequest:
+        """Run work() on a worker thread without a session, for cpu work like bcrypt, then on_done(result, error)"""
+        request = BackgroundRequest()
+
+        def finish(result, error):
+            if not request.cancelled:
+                on_done(result, error)
+
+        def run():
+            # a request that went stale while it waited for a worker is not run at all
+            if request.cancelled:
+                return
+            try:
+                result, error = work(), None
+            except Exception as e:
+                result, error = None, e
+            call_on_main_thread(lambda: finish(result, error))
+
+        request.future = self._pool.submit(run)
+        return request
+
+    def shutdown(self) -> None:
+        # the tasks still waiting are dropped and the ones running are left to finish on their own
+        self._pool.shutdown(wait=False, cancel_futures=True)
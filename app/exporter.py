@@ -0,0 +1,104 @@
+"""Export a user's transaction history to CSV or JSONL.
+
+Usage:
+    python -m app.exporter --user-id ID --out history.csv
+    python -m app.exporter --user-id ID --out history.jsonl --type expense --from 2025-01-01 --to 2025-12-31
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from database.crud.transaction_crud import TransactionCrud
+
+EXPORT_FORMATS = ["csv", "jsonl"]
+
+EXPORT_COLUMNS = ["id", "created_on", "type", "category", "amount", "description"]
+
+
+class TransactionExporter:
+    """Write a user's transactions to a file one row at a time as they stream out of the database."""
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self._db = db
+        self._batch_size = batch_size
+        self._transaction_crud = TransactionCrud(db)
+
+    def _to_record(self, row) -> dict:
+        return {
+            "id": row.id,
+            "created_on": row.created_on.isoformat() if row.created_on else None,
+            "type": row.type,
+            "category": row.category,
+            "amount": row.amount,
+            "description": row.description
+        }
+
+    def export(self, user_id: int, path: str, format: str = "csv", type: str = None, category_id: int = None,
+               start_date: datetime = None, end_date: datetime = None) -> int:
+        """Export the user's transactions, or only the ones matching the filters, and return how many were written"""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}")
+        rows = self._transaction_crud.iter_transactions(user_id, type, category_id, start_date, end_date,
+                                                        self._batch_size)
+        row_count = 0
+        with open(path, "w", newline="", encoding="utf-8") as export_file:
+            if format == "csv":
+                writer = csv.DictWriter(export_file, fieldnames=EXPORT_COLUMNS)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(self._to_record(row))
+                    row_count += 1
+            else:
+                for row in rows:
+                    export_file.write(json.dumps(self._to_record(row)) + "\n")
+                    row_count += 1
+        return row_count
+
+
+def main(argv=None) -> int:
+    from database import initialize_database
+    from database.db_config import SessionLocal
+    from database.crud.category_crud import CategoryCrud
+
+    parser = argparse.ArgumentParser(description="Export a user's transaction history")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None, help="defaults to the file extension")
+    parser.add_argument("--type", choices=["income", "expense"], default=None)
+    parser.add_argument("--category", default=None, help="category name")
+    parser.add_argument("--from", dest="from_date", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="to_date", default=None, help="YYYY-MM-DD, the whole day is included")
+    args = parser.parse_args(argv)
+
+    export_format = args.format or ("jsonl" if args.out.lower().endswith((".jsonl", ".json")) else "csv")
+    start_date = None
+    end_date = None
+    if args.from_date:
+        start_date = datetime.strptime(args.from_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    if args.to_date:
+        end_date = datetime.strptime(args.to_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1) - timedelta(microseconds=1)
+
+    initialize_database()
+    db = SessionLocal()
+    try:
+        category_id = None
+        if args.category:
+            category_id = CategoryCrud(db).get_category_id(args.category, ignore_case=True)
+            if category_id is None:
+                print(f"Category '{args.category}' not found")
+                return 1
+        row_count = TransactionExporter(db).export(args.user_id, args.out, export_format, args.type, category_id,
+                                                   start_date, end_date)
+        print(f"Exported {row_count} transaction(s) to {args.out}")
+        return 0
+    except Exception as e:
+        print(f"Error exporting transactions: {e}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
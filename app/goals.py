@@ -1,11 +1,75 @@
+import threading
 from sqlalchemy.orm import Session
-from database.crud.goal_crud import GoalCrud
+from database.db_config import rollback_write
+from database.crud.goal_crud import GoalCrud, GOAL_UPDATED
+from database.models.money import format_money
 from datetime import datetime
 
+# how often the background sweep completes the goals that reached their end date
+GOAL_SWEEP_INTERVAL = 600
+
+
+class GoalExpirySweeper:
+    """Complete the expired goals of every user on a background thread every interval seconds.
+
+    Each sweep is one UPDATE in a session of its own, so the goal listings can be plain reads.
+    """
+
+    def __init__(self, session_factory, interval: float = GOAL_SWEEP_INTERVAL):
+        self._session_factory = session_factory
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def sweep(self) -> int:
+        db = self._session_factory()
+        try:
+            return GoalCrud(db).expire_goals()
+        finally:
+            db.close()
+
+    def _run(self):
+        # the first sweep runs right away, but on this thread so the window doesn't wait for it to open
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error completing expired goals: {e}")
+            if self._stopped.wait(self._interval):
+                return
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="goal-expiry-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
 class Goals:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, expire_on_read: bool = True):
         self._db = db
-        self._goal_crud = GoalCrud(db)
+        self._goal_crud = GoalCrud(db, expire_on_read)
+        self._sweeper = None
+
+    def start_expiry_sweep(self, session_factory, interval: float = GOAL_SWEEP_INTERVAL):
+        """Complete expired goals in the background so listing goals no longer writes to the database"""
+        if self._sweeper:
+            return
+        self._sweeper = GoalExpirySweeper(session_factory, interval)
+        self._sweeper.start()
+        self._goal_crud.expire_on_read = False
+
+    def stop_expiry_sweep(self):
+        if not self._sweeper:
+            return
+        self._sweeper.stop()
+        self._sweeper = None
+        self._goal_crud.expire_on_read = True
 
     def create_goal(self, user_id: int, goal_description: str, goal_amount: float, current_amount: float = 0.0,
                     start_date: str = "", end_date: str = ""):
@@ -25,8 +89,10 @@ class Goals:
                                                end_date)
             return True, "Successfully created goal"
         except ValueError:
+            rollback_write(self._db)
             return False, "Invalid date format"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error creating goal: {e}"
 
     def get_user_goals(self, user_id: int):
@@ -56,8 +122,15 @@ class Goals:
                 return False, "Goal already completed"
             return True, "Successfully updated goal progress"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error updating goal progress: {e}"
 
+    def get_goals_with_progress(self, user_id: int, status: str = None):
+        try:
+            return self._goal_crud.get_goals_with_progress(user_id, status)
+        except Exception:
+            return []
+
     def get_goal_progress(self, user_id: int, goal_id: int):
         return self._goal_crud.get_goal_completion_percentage(user_id, goal_id)
 
@@ -77,6 +150,7 @@ class Goals:
                 return False, "Goal not found"
             return True, "Successfully deleted goal"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error deleting goal: {e}"
 
     # NOTE: I might not implement this since there might not be enough time, to be honest,
@@ -90,6 +164,7 @@ class Goals:
                 return False, "Goal not found"
             return True, "Successfully updated goal"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error updating goal: {e}"
 
     def mark_goal_completed(self, user_id: int, goal_id: int):
@@ -99,6 +174,7 @@ class Goals:
                 return False, "Goal not found"
             return True, "Successfully marked goal as completed"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error marking goal as completed: {e}"
 
     def mark_goal_current(self, user_id: int, goal_id: int):
@@ -108,4 +184,43 @@ class Goals:
                 return False, "Goal not found"
             return True, "Successfully marked goal as current"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error marking goal as current: {e}"
+
+    def _count_updated(self, outcomes: dict) -> int:
+        return sum(1 for outcome in outcomes.values() if outcome == GOAL_UPDATED)
+
+    def mark_goals_completed(self, user_id: int, goal_ids: list[int]):
+        try:
+            outcomes = self._goal_crud.mark_goals_completed(user_id, goal_ids)
+            return True, outcomes, f"Successfully marked {self._count_updated(outcomes)} goal(s) as completed"
+        except Exception as e:
+            rollback_write(self._db)
+            return False, {}, f"Error marking goals as completed: {e}"
+
+    def delete_goals(self, user_id: int, goal_ids: list[int]):
+        try:
+            outcomes = self._goal_crud.delete_goals(user_id, goal_ids)
+            return True, outcomes, f"Successfully deleted {self._count_updated(outcomes)} goal(s)"
+        except Exception as e:
+            rollback_write(self._db)
+            return False, {}, f"Error deleting goals: {e}"
+
+    def add_progress(self, user_id: int, goal_ids: list[int], amount_to_add: float):
+        if amount_to_add is None or amount_to_add <= 0:
+            return False, {}, "The amount to add must be greater than 0"
+        try:
+            outcomes = self._goal_crud.add_progress(user_id, goal_ids, amount_to_add)
+            return True, outcomes, f"Successfully added {format_money(amount_to_add)} to {self._count_updated(outcomes)} goal(s)"
+        except Exception as e:
+            rollback_write(self._db)
+            return False, {}, f"Error updating goal progress: {e}"
+
+    def reactivate_goals(self, user_id: int, goal_ids: list[int]):
+        try:
+            outcomes = self._goal_crud.reactivate_goals(user_id, goal_ids)
+            return True, outcomes, f"Successfully reactivated {self._count_updated(outcomes)} goal(s)"
+        except Exception as e:
+            rollback_write(self._db)
+            return False, {}, f"Error reactivating goals: {e}"
+
@@ -0,0 +1,284 @@
+"""Import bank statements from CSV and OFX files.
+
+Usage:
+    python -m app.importer --user-id ID statement.csv
+    python -m app.importer --user-id ID --format ofx statement.ofx
+"""
+import argparse
+import csv
+import hashlib
+import math
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from database.crud.category_crud import CategoryCrud
+from database.crud.import_crud import ImportCrud
+from database.crud.transaction_crud import TransactionCrud
+
+# which csv column each transaction field is read from
+DEFAULT_COLUMN_MAP = {
+    "created_on": "Date",
+    "amount": "Amount",
+    "description": "Description",
+    "category": "Category",
+    "type": "Type"
+}
+
+TYPE_NAMES = {
+    "income": "income",
+    "credit": "income",
+    "expense": "expense",
+    "debit": "expense"
+}
+
+# the most error messages kept in the result so a broken file does not fill up memory
+MAX_ERRORS = 100
+
+OFX_TAG = re.compile(r"^(/?)([A-Za-z0-9.]+)>(.*)$", re.DOTALL)
+
+
+class StatementImporter:
+    """Stream a bank statement into the user's transactions in batches.
+
+    The file is read one line at a time and written one batch per commit, so memory use does
+    not grow with the size of the file. Every imported line is fingerprinted in the same commit
+    as its transaction, so running the import again after a failure, or importing an
+    overlapping statement, skips the lines that are already saved.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self._db = db
+        self._batch_size = batch_size
+        self._transaction_crud = TransactionCrud(db)
+        self._category_crud = CategoryCrud(db)
+        self._import_crud = ImportCrud(db)
+
+    def _get_category_id(self, name: str, default_category: str):
+        """Look up the category id by name in the category cache instead of a query for every line"""
+        category_id = self._category_crud.get_category_id(name, ignore_case=True)
+        if category_id is None:
+            category_id = self._category_crud.get_category_id(default_category, ignore_case=True)
+        return category_id
+
+    def _parse_amount(self, value: str) -> float:
+        """Parse amounts like 1,234.56, $12.00, -5 or (5.00) where the brackets mean negative"""
+        value = value.strip().replace(",", "").replace("$", "")
+        if value.startswith("(") and value.endswith(")"):
+            value = "-" + value[1:-1]
+        amount = float(value)
+        # float() also reads nan and inf, which would break the rollup totals
+        if not math.isfinite(amount):
+            raise ValueError(f"amount is not a number: {value}")
+        return amount
+
+    def _fingerprint(self, key: str, seen: Counter) -> str:
+        """Fingerprint a line, counting repeats of the same line so identical real transactions are all kept"""
+        seen[key] += 1
+        return hashlib.sha1(f"{key}|{seen[key]}".encode("utf-8")).hexdigest()
+
+    def _empty_result(self) -> dict:
+        return {"lines": 0, "imported": 0, "duplicates": 0, "invalid": 0, "errors": [], "last_committed_line": 0}
+
+    def _add_error(self, result: dict, line_number: int, message: str) -> None:
+        result["invalid"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append(f"Line {line_number}: {message}")
+
+    def _write_batch(self, user_id: int, batch: list, result: dict, progress) -> None:
+        """Save the lines of a batch that were not imported before, together with their fingerprints"""
+        if not batch:
+            return
+        fingerprints = [fingerprint for _, fingerprint, _ in batch]
+        imported = self._import_crud.get_imported_fingerprints(user_id, fingerprints)
+        new_lines = []
+        for _, fingerprint, row in batch:
+            # also skips a line that is repeated inside the batch, like an ofx file listing a FITID twice
+            if fingerprint not in imported:
+                imported.add(fingerprint)
+                new_lines.append((row, fingerprint))
+        result["duplicates"] += len(batch) - len(new_lines)
+        if new_lines:
+            # the fingerprints are only staged here and get committed with the transactions of the batch
+            self._import_crud.add_fingerprints(user_id, [fingerprint for _, fingerprint in new_lines])
+            self._transaction_crud.create_transactions_bulk([row for row, _ in new_lines], batch_size=len(new_lines))
+            result["imported"] += len(new_lines)
+        result["last_committed_line"] = batch[-1][0]
+        if progress:
+            progress(result)
+
+    def _import_lines(self, user_id: int, lines, progress, start_line: int) -> dict:
+        """Write the (line number, fingerprint, transaction row or error message) lines in batches"""
+        result = self._empty_result()
+        batch = []
+        for line_number, fingerprint, row in lines:
+            result["lines"] = line_number
+            if line_number <= start_line:
+                continue
+            if isinstance(row, str):
+                self._add_error(result, line_number, row)
+                continue
+            row["user_id"] = user_id
+            batch.append((line_number, fingerprint, row))
+            if len(batch) >= self._batch_size:
+                self._write_batch(user_id, batch, result, progress)
+                batch = []
+        self._write_batch(user_id, batch, result, progress)
+        return result
+
+    def _read_csv(self, path: str, column_map: dict, date_format: str, default_category: str):
+        """Yield a (line number, fingerprint, row or error message) for every line of the csv file"""
+        seen = Counter()
+        with open(path, newline="", encoding="utf-8-sig") as statement:
+            for line_number, line in enumerate(csv.DictReader(statement), start=1):
+                try:
+                    created_on = datetime.strptime(line[column_map["created_on"]].strip(), date_format).replace(tzinfo=timezone.utc)
+                    amount = self._parse_amount(line[column_map["amount"]])
+                except (KeyError, TypeError, ValueError) as e:
+                    yield line_number, None, f"Invalid date or amount ({e})"
+                    continue
+
+                # use the type column when there is one, otherwise negative amounts are expenses
+                type_value = (line.get(column_map.get("type")) or "").strip().lower()
+                transaction_type = TYPE_NAMES.get(type_value) or ("expense" if amount < 0 else "income")
+                amount = abs(amount)
+                if amount == 0:
+                    yield line_number, None, "Amount must not be 0"
+                    continue
+
+                description = (line.get(column_map.get("description")) or "").strip() or None
+                category_id = self._get_category_id(line.get(column_map.get("category")), default_category)
+                key = f"csv|{created_on.date()}|{transaction_type}|{amount:.2f}|{description or ''}"
+                yield line_number, self._fingerprint(key, seen), {
+                    "category_id": category_id,
+                    "amount": amount,
+                    "type": transaction_type,
+                    "description": description,
+                    "created_on": created_on
+                }
+
+    def _read_ofx_tags(self, path: str, chunk_size: int = 65536):
+        """Yield (is closing tag, tag name, value) for every tag in the file, reading it in chunks
+
+        OFX 1.x files are SGML that may leave tags unclosed or put the whole statement on one line,
+        so the file is split on '<' instead of on lines.
+        """
+        with open(path, encoding="utf-8", errors="replace") as statement:
+            remainder = ""
+            while True:
+                chunk = statement.read(chunk_size)
+                if not chunk:
+                    break
+                parts = (remainder + chunk).split("<")
+                remainder = parts.pop()
+                for part in parts:
+                    match = OFX_TAG.match(part)
+                    if match:
+                        yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+            match = OFX_TAG.match(remainder)
+            if match:
+                yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+
+    def _read_ofx(self, path: str, default_category: str):
+        """Yield a (transaction number, fingerprint, row or error message) for every STMTTRN in the ofx file"""
+        seen = Counter()
+        fields = None
+        number = 0
+        for closing, tag, value in self._read_ofx_tags(path):
+            if tag == "STMTTRN" and not closing:
+                fields = {}
+            elif tag == "STMTTRN" and closing and fields is not None:
+                number += 1
+                try:
+                    created_on = datetime.strptime(fields["DTPOSTED"][:8], "%Y%m%d").replace(tzinfo=timezone.utc)
+                    amount = self._parse_amount(fields["TRNAMT"])
+                except (KeyError, ValueError) as e:
+                    yield number, None, f"Invalid date or amount ({e})"
+                    fields = None
+                    continue
+                transaction_type = "expense" if amount < 0 else "income"
+                description = fields.get("NAME") or fields.get("MEMO") or None
+                # the bank's FITID is unique per transaction so it is the best fingerprint when there is one
+                if fields.get("FITID"):
+                    key = f"ofx|{fields['FITID']}"
+                    fingerprint = hashlib.sha1(key.encode("utf-8")).hexdigest()
+                else:
+                    key = f"ofx|{created_on.date()}|{transaction_type}|{abs(amount):.2f}|{description or ''}"
+                    fingerprint = self._fingerprint(key, seen)
+                yield number, fingerprint, {
+                    "category_id": self._get_category_id(None, default_category),
+                    "amount": abs(amount),
+                    "type": transaction_type,
+                    "description": description,
+                    "created_on": created_on
+                }
+                fields = None
+            elif fields is not None and not closing and value:
+                fields[tag] = value
+
+    def import_csv(self, user_id: int, path: str, column_map: dict = None, date_format: str = "%Y-%m-%d",
+                   default_category: str = "Other", progress=None, start_line: int = 0) -> dict:
+        """Import a csv statement for the user.
+
+        progress is called with the running result after every batch. start_line skips the lines
+        up to the last_committed_line of an earlier run, which saves re-reading them, although
+        the fingerprints would skip them anyway.
+        """
+        column_map = {**DEFAULT_COLUMN_MAP, **(column_map or {})}
+        lines = self._read_csv(path, column_map, date_format, default_category)
+        return self._import_lines(user_id, lines, progress, start_line)
+
+    def import_ofx(self, user_id: int, path: str, default_category: str = "Other", progress=None,
+                   start_line: int = 0) -> dict:
+        """Import an ofx statement for the user, where a line is one STMTTRN transaction"""
+        lines = self._read_ofx(path, default_category)
+        return self._import_lines(user_id, lines, progress, start_line)
+
+
+def main(argv=None) -> int:
+    from database import initialize_database
+    from database.db_config import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import a bank statement into a user's transactions")
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--format", choices=["csv", "ofx"], default=None, help="defaults to the file extension")
+    parser.add_argument("--date-format", default="%Y-%m-%d")
+    parser.add_argument("--start-line", type=int, default=0, help="resume after this line")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    statement_format = args.format or ("ofx" if args.path.lower().endswith((".ofx", ".qfx")) else "csv")
+
+    last_result = {"last_committed_line": args.start_line}
+
+    def print_progress(result):
+        last_result["last_committed_line"] = result["last_committed_line"]
+        print(f"Read {result['lines']} line(s): {result['imported']} imported, {result['duplicates']} duplicate(s), "
+              f"{result['invalid']} invalid")
+
+    initialize_database()
+    db = SessionLocal()
+    try:
+        importer = StatementImporter(db, args.batch_size)
+        if statement_format == "ofx":
+            result = importer.import_ofx(args.user_id, args.path, progress=print_progress, start_line=args.start_line)
+        else:
+            result = importer.import_csv(args.user_id, args.path, date_format=args.date_format,
+                                         progress=print_progress, start_line=args.start_line)
+    except Exception as e:
+        print(f"Error importing statement: {e}")
+        print(f"Resume with --start-line {last_result['last_committed_line']}")
+        return 1
+    finally:
+        db.close()
+
+    for error in result["errors"]:
+        print(error)
+    print_progress(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy.orm import Session
+from database.db_config import rollback_write
 from database.crud.transaction_crud import TransactionCrud
 
 class Transactions:
@@ -13,6 +14,30 @@ class Transactions:
     def add_income(self, user_id: int, category_id: int, amount: float, description: str = None):
         return self._transaction_crud.create_transaction(user_id, category_id, amount, "income", description)
 
+    def add_transactions_bulk(self, user_id: int, transactions: list[dict], batch_size: int = 1000):
+        """Validate and insert many transactions for the user in batches and return their new ids.
+
+        Every transaction is checked before anything is inserted, so a bad row does not leave half
+        of the list saved.
+        """
+        rows = []
+        for row_number, transaction in enumerate(transactions, start=1):
+            transaction_type = transaction.get("type")
+            if transaction_type not in ("income", "expense"):
+                return False, [], f"Row {row_number}: type must be income or expense"
+            amount = transaction.get("amount")
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+                return False, [], f"Row {row_number}: amount must be a number"
+            if amount <= 0:
+                return False, [], f"Row {row_number}: amount must be positive"
+            rows.append({**transaction, "user_id": user_id})
+        try:
+            ids = self._transaction_crud.create_transactions_bulk(rows, batch_size)
+            return True, ids, f"Added {len(ids)} transaction(s) successfully"
+        except Exception as e:
+            rollback_write(self._db)
+            return False, [], f"Error adding transactions: {e}"
+
     def get_transaction_by_id(self, user_id: int, transaction_id: int):
         return self._transaction_crud.get_transaction_by_id(transaction_id, user_id)
 
@@ -25,6 +50,17 @@ class Transactions:
     def get_transactions_by_date(self, user_id: int, start_date: datetime = None, end_date: datetime = None):
         return self._transaction_crud.get_transaction_by_date(user_id, start_date, end_date)
 
+    def filter_transactions(self, user_id: int, transaction_type: str = None, category_id: int = None,
+                            start_date: datetime = None, end_date: datetime = None, order: str = "newest"):
+        return self._transaction_crud.query_transactions(user_id, transaction_type, category_id, start_date, end_date,
+                                                         order)
+
+    def get_transactions_page(self, user_id: int, transaction_type: str = None, category_id: int = None,
+                              start_date: datetime = None, end_date: datetime = None, after: tuple = None,
+                              limit: int = 100, with_category: bool = False):
+        return self._transaction_crud.get_transactions_page(user_id, transaction_type, category_id, start_date,
+                                                            end_date, after, limit, with_category)
+
     def get_user_transactions(self, user_id: int):
         return self._transaction_crud.get_transaction_by_user(user_id)
 
@@ -43,6 +79,12 @@ class Transactions:
     def get_monthly_report_data(self, user_id: int, start_date: datetime = None, end_date: datetime = None):
         return self._transaction_crud.get_monthly_report(user_id, start_date, end_date)
 
+    def get_custom_report_data(self, user_id: int, start_date: date, end_date: date):
+        return self._transaction_crud.get_custom_report(user_id, start_date, end_date)
+
+    def get_dashboard_report_data(self, user_id: int, date: datetime = None):
+        return self._transaction_crud.get_dashboard_reports(user_id, date)
+
     def delete_user_transaction(self, user_id, transaction_id):
         try:
             deleted = self._transaction_crud.delete_transaction(user_id, transaction_id)
@@ -50,17 +92,29 @@ class Transactions:
                 return False, "Transaction not found"
             return True, "Deleted transaction successfully"
         except Exception as e:
+            rollback_write(self._db)
             return False, f"Error deleting transaction: {e}"
 
+    def delete_user_transactions(self, user_id: int, transaction_ids: list[int]):
+        try:
+            deleted_count, missing_ids = self._transaction_crud.delete_transactions(user_id, transaction_ids)
+            message = f"Deleted {deleted_count} transaction(s) successfully"
+            if missing_ids:
+                message += f", {len(missing_ids)} transaction(s) were not found"
+            return True, missing_ids, message
+        except Exception as e:
+            rollback_write(self._db)
+            return False, [], f"Error deleting transactions: {e}"
+
     # for debugging
     def print_all_transactions(self, user_id: int):
-        txs = self.get_user_transactions(user_id)
+        txs = self._transaction_crud.get_transaction_by_user(user_id, with_category=True)
         print("\n=== TRANSACTIONS FOR USER", user_id, "===\n")
         for tx in txs:
             print(
                 f"ID: {tx.id} | "
                 f"Type: {tx.type} | "
-                f"Category: {tx.category_id} | "
+                f"Category: {tx.category.name if tx.category else tx.category_id} | "
                 f"Amount: {tx.amount} | "
                 f"Description: {tx.description} | "
                 f"Created: {tx.created_on}"
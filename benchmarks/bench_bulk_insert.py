@@ -0,0 +1,76 @@
+"""Compare rows/sec of the per-row create_transaction path against the bulk insert path.
+
+Both paths write to a fresh SQLite file so every commit pays for a real fsync, like the app does.
+
+Usage:
+    python -m benchmarks.bench_bulk_insert [--rows N] [--batch-size N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.db_config import Base
+from database.crud.transaction_crud import TransactionCrud
+
+
+def make_rows(row_count: int) -> list[dict]:
+    """Make a year of random transactions for one user"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for _ in range(row_count):
+        rows.append({
+            "user_id": 1,
+            "category_id": random.randint(1, 14),
+            "amount": round(random.uniform(1, 500), 2),
+            "type": random.choice(["income", "expense"]),
+            "description": "Imported",
+            "created_on": start + timedelta(minutes=random.randint(0, 365 * 24 * 60))
+        })
+    return rows
+
+
+def time_path(name: str, rows: list[dict], insert_rows) -> float:
+    """Run one insert path against a new database file and print its rows/sec"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+        try:
+            started = time.perf_counter()
+            insert_rows(TransactionCrud(db), rows)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+            engine.dispose()
+    rows_per_second = len(rows) / elapsed
+    print(f"{name:<10} {len(rows):>8} rows {elapsed:>8.2f}s {rows_per_second:>12.0f} rows/sec")
+    return rows_per_second
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-row against bulk transaction inserts")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+
+    def insert_per_row(transaction_crud, rows):
+        for row in rows:
+            transaction_crud.create_transaction(row["user_id"], row["category_id"], row["amount"], row["type"],
+                                                row["description"], row["created_on"])
+
+    def insert_bulk(transaction_crud, rows):
+        transaction_crud.create_transactions_bulk(rows, args.batch_size)
+
+    per_row = time_path("per-row", rows, insert_per_row)
+    bulk = time_path("bulk", rows, insert_bulk)
+    print(f"bulk is {bulk / per_row:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare write and read throughput of the sqlite pragma profiles in database.db_config.
+
+Every profile writes the same transactions to a fresh SQLite file through create_transaction, which
+commits once per row like the app does, then inserts more in bulk and reads them back through the
+paged history listing and the dashboard reports.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profiles [--rows N] [--bulk-rows N] [--profile NAME ...]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.db_config import Base, SQLITE_PROFILES, apply_sqlite_profile
+from database.crud.transaction_crud import TransactionCrud
+from benchmarks.bench_bulk_insert import make_rows
+
+
+def time_call(call) -> float:
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def run_profile(profile: str, rows: list[dict], bulk_rows: list[dict]) -> dict:
+    """Time the writes and reads against a new database file opened with the profile"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        apply_sqlite_profile(engine, profile)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+        try:
+            journal_mode = db.execute(text("PRAGMA journal_mode")).scalar()
+            transaction_crud = TransactionCrud(db)
+
+            def write_per_row():
+                for row in rows:
+                    transaction_crud.create_transaction(row["user_id"], row["category_id"], row["amount"], row["type"],
+                                                        row["description"], row["created_on"])
+
+            def read_history():
+                after = None
+                while True:
+                    _, after = transaction_crud.get_transactions_page(1, after=after, limit=100)
+                    if after is None:
+                        break
+                    db.expunge_all()
+
+            def read_reports():
+                for month in range(1, 13):
+                    transaction_crud.get_dashboard_reports(1, datetime(2025, month, 15))
+
+            write_seconds = time_call(write_per_row)
+            bulk_seconds = time_call(lambda: transaction_crud.create_transactions_bulk(bulk_rows))
+            db.expunge_all()
+            history_seconds = time_call(read_history)
+            report_seconds = time_call(read_reports)
+        finally:
+            db.close()
+            engine.dispose()
+    return {
+        "profile": profile,
+        "journal_mode": journal_mode,
+        "writes_per_second": len(rows) / write_seconds,
+        "bulk_rows_per_second": len(bulk_rows) / bulk_seconds,
+        "history_rows_per_second": (len(rows) + len(bulk_rows)) / history_seconds,
+        "reports_per_second": 12 / report_seconds
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sqlite pragma profiles")
+    parser.add_argument("--rows", type=int, default=500, help="transactions written one commit at a time")
+    parser.add_argument("--bulk-rows", type=int, default=20000, help="transactions written with the bulk insert")
+    parser.add_argument("--profile", action="append", choices=list(SQLITE_PROFILES), default=None,
+                        help="profile to run, can be given more than once, defaults to all of them")
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    bulk_rows = make_rows(args.bulk_rows)
+    print(f"{'profile':<10} {'journal':>8} {'commits/s':>10} {'bulk rows/s':>12} {'history rows/s':>15} {'reports/s':>10}")
+    for profile in args.profile or list(SQLITE_PROFILES):
+        result = run_profile(profile, rows, bulk_rows)
+        print(f"{result['profile']:<10} {result['journal_mode']:>8} {result['writes_per_second']:>10.0f} "
+              f"{result['bulk_rows_per_second']:>12.0f} {result['history_rows_per_second']:>15.0f} "
+              f"{result['reports_per_second']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure how long the imports before the login window take, using python -X importtime.
+
+Everything main.py imports before FinanceApp shows the login window is imported in a fresh
+interpreter, so nothing is cached from an earlier import. The slowest modules are listed, and any
+module that should only load once a later window needs it is reported.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--top N] [--budget-ms MS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# the module main.py imports, which pulls in everything needed to show the login window
+STARTUP_MODULE = "app.app"
+
+# these only load once the dashboard, the charts or the icons are first used
+DEFERRED_MODULES = (
+    "matplotlib",
+    "PIL",
+    "client.windows.dashboard_window",
+    "client.windows.input_transaction_window",
+    "client.windows.transaction_history_window",
+    "client.windows.goals_window",
+    "client.windows.account_window",
+    "client.window_constants"
+)
+
+# what the imports before the login window may take in total
+STARTUP_BUDGET_MS = 1500.0
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output: str) -> dict:
+    """Get the self and cumulative microseconds of every module from the -X importtime output"""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            # the header line
+            continue
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_startup(module: str = STARTUP_MODULE) -> dict:
+    """Import the module in a fresh interpreter and get the import timings of every module it loaded"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_DIRECTORY,
+                            capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def total_ms(timings: dict) -> float:
+    # every module's own time is counted once, so they add up to the whole startup
+    return sum(self_us for self_us, _ in timings.values()) / 1000
+
+
+def find_deferred(timings: dict) -> list[str]:
+    """Get the modules that were imported at startup but should wait until they are used"""
+    return sorted(name for name in timings
+                  if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED_MODULES))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the imports before the login window is shown")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time, the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="how many of the slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="fail when the median is slower")
+    args = parser.parse_args(argv)
+
+    # the first run also writes the bytecode caches, so it is not counted
+    measure_startup()
+    runs = [measure_startup() for _ in range(args.runs)]
+    totals = [total_ms(timings) for timings in runs]
+    median_ms = statistics.median(totals)
+
+    timings = runs[totals.index(min(totals))]
+    print(f"{'module':<60} {'self ms':>9} {'cumulative ms':>14}")
+    for name, (self_us, cumulative_us) in sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"{name:<60} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}")
+    print(f"\n{len(timings)} modules, median {median_ms:.1f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+
+    deferred = find_deferred(timings)
+    if deferred:
+        print(f"Loaded before the login window but should wait until used: {', '.join(deferred)}")
+    if deferred or median_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
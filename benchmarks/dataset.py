@@ -0,0 +1,116 @@
+"""Generate realistic synthetic data for the benchmarks.
+
+The same seed always gives the same users, transactions and goals, so timings taken on different
+commits are measured against the same data.
+"""
+import random
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from database.crud.category_crud import CategoryCrud
+from database.crud.transaction_crud import TransactionCrud
+from database.crud.user_crud import UserCrud
+from database.models.category_model import Category
+from database.models.goal_model import Goal
+from database.models.user_model import User
+
+# every generated user logs in with this password
+BENCHMARK_PASSWORD = "benchmark-password"
+
+# the generated history ends here so the data does not depend on the day the benchmark runs
+DATASET_END = datetime(2025, 12, 31, 23, 59, tzinfo=timezone.utc)
+
+# income is a few big payments, expenses are many small ones that mostly land in a few categories
+INCOME_CATEGORIES = {"Salary": 12, "Investment": 3, "Gift": 1}
+INCOME_SHARE = 0.1
+
+
+def expense_category_weights(category_names: list[str]) -> dict:
+    """Weigh the expense categories by a zipf-like 1/rank so the first ones get most of the spending"""
+    expense_names = [name for name in category_names if name not in INCOME_CATEGORIES]
+    return {name: 1 / (rank ** 1.1) for rank, name in enumerate(expense_names, start=1)}
+
+
+def make_transactions(rng: random.Random, user_id: int, count: int, category_ids: dict, years: int = 3,
+                      end: datetime = DATASET_END):
+    """Yield count transaction rows for the user spread over the years before end"""
+    income_names = [name for name in INCOME_CATEGORIES if name in category_ids]
+    income_weights = [INCOME_CATEGORIES[name] for name in income_names]
+    expense_weights = expense_category_weights(list(category_ids))
+    expense_names = list(expense_weights)
+    expense_weights = list(expense_weights.values())
+    minutes = years * 365 * 24 * 60
+    for _ in range(count):
+        if income_names and rng.random() < INCOME_SHARE:
+            transaction_type = "income"
+            category_name = rng.choices(income_names, income_weights)[0]
+            amount = round(rng.lognormvariate(7, 0.6), 2)
+        else:
+            transaction_type = "expense"
+            category_name = rng.choices(expense_names, expense_weights)[0]
+            amount = round(rng.lognormvariate(3, 1), 2)
+        yield {
+            "user_id": user_id,
+            "category_id": category_ids[category_name],
+            "amount": max(amount, 0.01),
+            "type": transaction_type,
+            "description": f"{category_name} {transaction_type}",
+            "created_on": end - timedelta(minutes=rng.randint(0, minutes))
+        }
+
+
+def make_goals(rng: random.Random, user_id: int, count: int, end: datetime = DATASET_END) -> list[dict]:
+    """Make goals for the user where about a third already ended, some reached their target and the rest are open"""
+    goals = []
+    for number in range(count):
+        start_date = end.date() - timedelta(days=rng.randint(30, 3 * 365))
+        end_date = start_date + timedelta(days=rng.randint(30, 2 * 365))
+        target_amount = round(rng.uniform(100, 20000), 2)
+        current_amount = round(target_amount * rng.uniform(0, 1.2), 2)
+        goals.append({
+            "user_id": user_id,
+            "description": f"Goal {number}",
+            "target_amount": target_amount,
+            "current_amount": current_amount,
+            "status": "completed" if current_amount >= target_amount else "current",
+            "start_date": start_date,
+            "end_date": end_date
+        })
+    return goals
+
+
+def generate_dataset(db: Session, users: int = 1, transactions_per_user: int = 1000, goals_per_user: int = 20,
+                     years: int = 3, seed: int = 0) -> dict:
+    """Fill the database with users, their transactions and their goals and return who was made.
+
+    The password is hashed once and shared by every user, since hashing it for each user would make
+    generating many users take longer than the benchmarks themselves.
+    """
+    rng = random.Random(seed)
+    CategoryCrud(db).initialize_categories()
+    category_ids = {name: category_id for category_id, name in db.execute(select(Category.id, Category.name))}
+
+    password = UserCrud(db).hash_password(BENCHMARK_PASSWORD)
+    user_rows = [{
+        "username": f"benchmark_user_{number}",
+        "email": f"benchmark_user_{number}@example.com",
+        "birthdate": date(1990, 1, 1) + timedelta(days=rng.randint(0, 10000)),
+        "password": password
+    } for number in range(users)]
+    user_ids = db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), user_rows).scalars().all()
+    db.commit()
+
+    transaction_crud = TransactionCrud(db)
+    for user_id in user_ids:
+        transaction_crud.create_transactions_bulk(make_transactions(rng, user_id, transactions_per_user, category_ids, years))
+        goal_rows = make_goals(rng, user_id, goals_per_user)
+        if goal_rows:
+            db.execute(insert(Goal), goal_rows)
+            db.commit()
+
+    return {
+        "user_ids": list(user_ids),
+        "emails": [row["email"] for row in user_rows],
+        "password": BENCHMARK_PASSWORD,
+        "category_ids": category_ids
+    }
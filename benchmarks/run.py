@@ -0,0 +1,281 @@
+"""Time every public Transactions, Goals and Authentication method against generated datasets.
+
+Each scale is a fresh SQLite file filled by benchmarks.dataset with the same seed, so the results of
+two commits can be compared directly. The results are written as JSON, and --compare prints how much
+slower or faster each method got against an earlier results file.
+
+Usage:
+    python -m benchmarks.run [--scales 1000,10000] [--users 3] [--repeat 5] [--out results.json]
+    python -m benchmarks.run --out new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+import sqlalchemy
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from database import create_indexes
+from database.db_config import Base, apply_sqlite_profile
+from database.models.goal_model import Goal
+from app.authentication import Authentication
+from app.goals import Goals
+from app.transactions import Transactions
+from benchmarks.dataset import DATASET_END, generate_dataset, make_goals, make_transactions
+
+# a method counts as a regression in --compare when its median is this much slower than before
+REGRESSION_RATIO = 1.2
+
+BULK_SIZE = 100
+
+
+class Context:
+    """What the benchmark cases need to know about the generated data and the services under test"""
+
+    def __init__(self, db, dataset: dict, seed: int):
+        self.db = db
+        self.rng = random.Random(seed)
+        self.user_id = dataset["user_ids"][0]
+        self.email = dataset["emails"][0]
+        self.password = dataset["password"]
+        self.category_ids = dataset["category_ids"]
+        self.transactions = Transactions(db)
+        self.goals = Goals(db)
+        self.authentication = Authentication(db)
+        self.spare = []
+        self.registered = 0
+
+    def add_spare_transactions(self, count: int) -> list[int]:
+        _, ids, _ = self.transactions.add_transactions_bulk(
+            self.user_id, list(make_transactions(self.rng, self.user_id, count, self.category_ids)))
+        return ids
+
+    def add_spare_goals(self, count: int, end_date: date = date(2099, 12, 31), current_amount: float = 0.0) -> list[int]:
+        rows = []
+        for goal in make_goals(self.rng, self.user_id, count):
+            rows.append({**goal, "end_date": end_date, "current_amount": current_amount,
+                         "status": "completed" if current_amount >= goal["target_amount"] else "current"})
+        ids = self.db.execute(insert(Goal).returning(Goal.id, sort_by_parameter_order=True), rows).scalars().all()
+        self.db.commit()
+        return list(ids)
+
+    def next_spare(self):
+        return self.spare.pop()
+
+    def register_next_user(self):
+        # every registration needs a new username and email
+        self.registered += 1
+        return self.authentication.register(f"registered_{self.registered}", f"registered_{self.registered}@example.com",
+                                            self.password, date(1990, 1, 1))
+
+
+def chunks(ids: list[int], size: int) -> list[list[int]]:
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
+
+# every case is (name, run, prepare) where prepare sets up what the repeats use up, like ids to delete,
+# and is not timed
+def benchmark_cases(repeat: int) -> list:
+    end = DATASET_END
+    month_ago = end - timedelta(days=30)
+    year_start = datetime(end.year, 1, 1, tzinfo=timezone.utc)
+
+    def middle_page_key(context):
+        transactions, _ = context.transactions.get_transactions_page(context.user_id, limit=1000)
+        last = transactions[-1]
+        context.spare = [(last.created_on, last.id)] * repeat
+
+    return [
+        ("Transactions.add_expense", lambda c: c.transactions.add_expense(c.user_id, c.category_ids["Groceries"], 12.5, "Benchmark"), None),
+        ("Transactions.add_income", lambda c: c.transactions.add_income(c.user_id, c.category_ids["Salary"], 2500.0, "Benchmark"), None),
+        ("Transactions.add_transactions_bulk", lambda c: c.transactions.add_transactions_bulk(
+            c.user_id, list(make_transactions(c.rng, c.user_id, BULK_SIZE, c.category_ids))), None),
+        ("Transactions.get_transaction_by_id", lambda c: c.transactions.get_transaction_by_id(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_transactions(repeat))),
+        ("Transactions.get_transactions_by_type", lambda c: c.transactions.get_transactions_by_type(c.user_id, "income"), None),
+        ("Transactions.get_transactions_by_category", lambda c: c.transactions.get_transactions_by_category(
+            c.user_id, c.category_ids["Salary"]), None),
+        ("Transactions.get_transactions_by_date", lambda c: c.transactions.get_transactions_by_date(c.user_id, month_ago, end), None),
+        ("Transactions.filter_transactions", lambda c: c.transactions.filter_transactions(
+            c.user_id, "expense", c.category_ids["Groceries"], month_ago, end), None),
+        ("Transactions.get_transactions_page", lambda c: c.transactions.get_transactions_page(c.user_id, with_category=True), None),
+        ("Transactions.get_transactions_page[deep]", lambda c: c.transactions.get_transactions_page(
+            c.user_id, after=c.next_spare(), with_category=True), middle_page_key),
+        ("Transactions.get_user_transactions", lambda c: c.transactions.get_user_transactions(c.user_id), None),
+        ("Transactions.get_expense_by_category", lambda c: c.transactions.get_expense_by_category(c.user_id, year_start, end), None),
+        ("Transactions.get_income_by_category", lambda c: c.transactions.get_income_by_category(c.user_id, year_start, end), None),
+        ("Transactions.get_daily_report_data", lambda c: c.transactions.get_daily_report_data(c.user_id, end), None),
+        ("Transactions.get_weekly_report_data", lambda c: c.transactions.get_weekly_report_data(c.user_id, end), None),
+        ("Transactions.get_monthly_report_data", lambda c: c.transactions.get_monthly_report_data(c.user_id, end.year, end.month), None),
+        ("Transactions.get_custom_report_data", lambda c: c.transactions.get_custom_report_data(
+            c.user_id, year_start.date(), end.date()), None),
+        ("Transactions.get_dashboard_report_data", lambda c: c.transactions.get_dashboard_report_data(c.user_id, end), None),
+        ("Transactions.delete_user_transaction", lambda c: c.transactions.delete_user_transaction(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_transactions(repeat))),
+        ("Transactions.delete_user_transactions", lambda c: c.transactions.delete_user_transactions(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", chunks(c.add_spare_transactions(repeat * BULK_SIZE), BULK_SIZE))),
+
+        ("Goals.create_goal", lambda c: c.goals.create_goal(c.user_id, "Benchmark goal", 1000.0, 0.0, "2025-01-01", "2099-12-31"), None),
+        ("Goals.get_user_goals", lambda c: c.goals.get_user_goals(c.user_id), None),
+        ("Goals.get_current_goals", lambda c: c.goals.get_current_goals(c.user_id), None),
+        ("Goals.get_completed_goals", lambda c: c.goals.get_completed_goals(c.user_id), None),
+        ("Goals.get_goals_with_progress", lambda c: c.goals.get_goals_with_progress(c.user_id), None),
+        ("Goals.get_goal_by_id", lambda c: c.goals.get_goal_by_id(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat))),
+        ("Goals.get_goal_progress", lambda c: c.goals.get_goal_progress(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat))),
+        ("Goals.update_goal_progress", lambda c: c.goals.update_goal_progress(c.next_spare(), c.user_id, 1.0),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat))),
+        ("Goals.mark_goal_completed", lambda c: c.goals.mark_goal_completed(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat))),
+        ("Goals.mark_goal_current", lambda c: c.goals.mark_goal_current(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat, current_amount=1000000.0))),
+        ("Goals.delete_user_goal", lambda c: c.goals.delete_user_goal(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", c.add_spare_goals(repeat))),
+        ("Goals.add_progress", lambda c: c.goals.add_progress(c.user_id, c.next_spare(), 1.0),
+         lambda c: setattr(c, "spare", chunks(c.add_spare_goals(repeat * BULK_SIZE), BULK_SIZE))),
+        ("Goals.mark_goals_completed", lambda c: c.goals.mark_goals_completed(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", chunks(c.add_spare_goals(repeat * BULK_SIZE), BULK_SIZE))),
+        ("Goals.reactivate_goals", lambda c: c.goals.reactivate_goals(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", chunks(c.add_spare_goals(repeat * BULK_SIZE, current_amount=1000000.0), BULK_SIZE))),
+        ("Goals.delete_goals", lambda c: c.goals.delete_goals(c.user_id, c.next_spare()),
+         lambda c: setattr(c, "spare", chunks(c.add_spare_goals(repeat * BULK_SIZE), BULK_SIZE))),
+
+        ("Authentication.login", lambda c: c.authentication.login(c.email, c.password), None),
+        ("Authentication.register", lambda c: c.register_next_user(), None),
+        ("Authentication.logout", lambda c: c.authentication.logout(), None),
+    ]
+
+
+def time_case(context: Context, run, prepare, repeat: int) -> list[float]:
+    """Run the case repeat times, each with a clean session, and return the timings in milliseconds"""
+    if prepare:
+        prepare(context)
+    timings = []
+    for _ in range(repeat):
+        context.db.expunge_all()
+        started = time.perf_counter()
+        run(context)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run_scale(transactions_per_user: int, users: int, goals_per_user: int, repeat: int, profile: str, seed: int,
+              only: list[str] = None) -> list[dict]:
+    """Generate a dataset at the scale and time every case against it"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+        apply_sqlite_profile(engine, profile)
+        Base.metadata.create_all(bind=engine)
+        create_indexes(engine)
+        db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+        try:
+            started = time.perf_counter()
+            dataset = generate_dataset(db, users, transactions_per_user, goals_per_user, seed=seed)
+            print(f"Generated {users} user(s) with {transactions_per_user} transactions each "
+                  f"in {time.perf_counter() - started:.1f}s")
+            context = Context(db, dataset, seed)
+            for name, run, prepare in benchmark_cases(repeat):
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                timings = time_case(context, run, prepare, repeat)
+                result = {
+                    "scale": transactions_per_user,
+                    "users": users,
+                    "method": name,
+                    "repeat": repeat,
+                    "min_ms": min(timings),
+                    "median_ms": statistics.median(timings),
+                    "mean_ms": statistics.fmean(timings),
+                    "max_ms": max(timings)
+                }
+                results.append(result)
+                print(f"{transactions_per_user:>9} {name:<48} {result['median_ms']:>10.2f} ms")
+        finally:
+            db.close()
+            engine.dispose()
+    return results
+
+
+def get_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_on": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "scales": args.scales,
+        "users": args.users,
+        "goals_per_user": args.goals,
+        "repeat": args.repeat,
+        "profile": args.profile,
+        "seed": args.seed
+    }
+
+
+def compare(results: list[dict], baseline_path: str) -> int:
+    """Print the change in median time of every method against the baseline and return how many regressed"""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    before = {(row["scale"], row["method"]): row["median_ms"] for row in baseline["results"]}
+    regressions = 0
+    print(f"\n{'scale':>9} {'method':<48} {'before':>10} {'after':>10} {'change':>8}")
+    for row in results:
+        old = before.get((row["scale"], row["method"]))
+        if old is None:
+            continue
+        ratio = row["median_ms"] / old if old else float("inf")
+        flag = ""
+        if ratio >= REGRESSION_RATIO:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{row['scale']:>9} {row['method']:<48} {old:>10.2f} {row['median_ms']:>10.2f} {ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Transactions, Goals and Authentication services")
+    parser.add_argument("--scales", default="1000,10000", help="comma separated transactions per user")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--goals", type=int, default=50, help="goals per user")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", default="durable", help="sqlite profile from database.db_config")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", action="append", default=None, help="only run the methods containing this text")
+    parser.add_argument("--out", default=None, help="write the results as json to this file")
+    parser.add_argument("--compare", default=None, help="an earlier results file to compare against")
+    args = parser.parse_args(argv)
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+
+    results = []
+    for scale in scales:
+        results.extend(run_scale(scale, args.users, args.goals, args.repeat, args.profile, args.seed, args.only))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out_file:
+            json.dump({"meta": get_metadata(args), "results": results}, out_file, indent=2)
+        print(f"Wrote {len(results)} result(s) to {args.out}")
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            print(f"{regressions} method(s) are at least {REGRESSION_RATIO}x slower")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,5 @@
 """Constants and functions for icons, categories, and amount the user enter."""
 import os
-from PIL import Image, ImageTk
 
 icon_directory = "icons"
 
@@ -31,6 +30,9 @@ EXPENSE_CATEGORIES = [
 
 def load_icon(category):
     """Load an icon from the icons dictionary that corresponds to the category."""
+    # PIL is only loaded once an icon is needed, the category lists are used by windows without icons
+    from PIL import Image, ImageTk
+
     path = os.path.join(icon_directory, icon_dictionary[category])
     path = os.path.abspath(path)
 
@@ -1,5 +1,13 @@
 """Base window class for the rest of the windows."""
+import logging
+import queue
 import tkinter as tk
+from tkinter import messagebox
+
+# how often the window runs the functions that worker threads handed back to it
+MAIN_THREAD_POLL_MS = 50
+
+logger = logging.getLogger("finance_tracker.windows")
 
 class MainWindow:
     """Base class for the rest of the windows."""
@@ -9,6 +17,75 @@ class MainWindow:
         self.root = tk.Tk()
         # close the app and destroy the window when the user click on the x button to close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # tk can only be used from the thread that made it, so worker threads hand their results back through this
+        self._main_thread_calls = queue.SimpleQueue()
+        self._poll_id = self.root.after(MAIN_THREAD_POLL_MS, self._run_main_thread_calls)
+        # the database requests still running for this window, and the latest one for each key
+        self._pending_requests = set()
+        self._keyed_requests = {}
+
+    def call_on_main_thread(self, function):
+        """Run the function on the window's thread, this is safe to call from any thread."""
+        self._main_thread_calls.put(function)
+
+    def run_in_background(self, task, on_done, key=None, on_error=None):
+        """Run task(services) on the app's worker threads and then on_done(result) on the window's thread.
+
+        A new request with the same key cancels the one before it, so a list only ever shows the
+        result of the latest filters. Errors are shown to the user unless on_error is given.
+        """
+        if key is not None and key in self._keyed_requests:
+            self.cancel_request(self._keyed_requests.pop(key))
+
+        def finish(result, error):
+            self._pending_requests.discard(request)
+            if key is not None and self._keyed_requests.get(key) is request:
+                del self._keyed_requests[key]
+            try:
+                if error is None:
+                    on_done(result)
+                elif on_error:
+                    on_error(error)
+                else:
+                    messagebox.showerror("Error", str(error))
+            finally:
+                # the cursor goes back even when the callback failed, unless the callback closed the window
+                if self._poll_id is not None:
+                    self.show_busy(bool(self._pending_requests))
+
+        request = self.app.executor.submit(task, finish, self.call_on_main_thread)
+        self._pending_requests.add(request)
+        if key is not None:
+            self._keyed_requests[key] = request
+        self.show_busy(True)
+        return request
+
+    def cancel_request(self, request):
+        """Cancel a request so its result is never shown."""
+        request.cancel()
+        self._pending_requests.discard(request)
+        self.show_busy(bool(self._pending_requests))
+
+    def show_busy(self, busy):
+        """Show a busy cursor while the window waits on the database."""
+        self.root.config(cursor="watch" if busy else "")
+
+    def _run_main_thread_calls(self):
+        try:
+            # stop once a function closed the window
+            while self._poll_id is not None:
+                try:
+                    function = self._main_thread_calls.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    function()
+                except Exception:
+                    # one failing function, like one for a widget that is gone, must not stop the ones after it
+                    logger.exception("Error running a function handed back to the window")
+        finally:
+            if self._poll_id is not None:
+                self._poll_id = self.root.after(MAIN_THREAD_POLL_MS, self._run_main_thread_calls)
 
     def center_window(self, width, height):
         # Get screen dimensions
@@ -24,6 +101,14 @@ class MainWindow:
     def on_close(self, close_app=True):
         """Close the app and destroy the window when user close the entire window."""
         try:
+            # nothing should be handed back to a window that is gone
+            for request in list(self._pending_requests):
+                request.cancel()
+            self._pending_requests.clear()
+            self._keyed_requests.clear()
+            if self._poll_id is not None:
+                self.root.after_cancel(self._poll_id)
+                self._poll_id = None
             if close_app:
                 self.app.close()
         finally:
@@ -2,23 +2,14 @@
 import tkinter as tk
 from tkinter import ttk
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-
 from .base_window import MainWindow
-from .input_transaction_window import InputTransactionWindow
-from .transaction_history_window import TransactionHistoryWindow
-from .goals_window import GoalsWindow
-from .account_window import AccountWindow
-from .login_window import LoginWindow
 
 class DashboardWindow(MainWindow):
     """Main dashboard window with navigation and visual reports."""
     def __init__(self, app):
         super().__init__(app)
-        self.daily_report_data = app.get_daily_report_data()
-        self.weekly_report_data = app.get_weekly_report_data()
-        self.monthly_report_data = app.get_monthly_report_data()
+        # the reports are loaded in the background, the charts are drawn once they arrive
+        self.report_data = None
         self.root.title("Dashboard Window")
         self.root.geometry("700x700")
         self.center_window( 900, 900)
@@ -30,41 +21,62 @@ class DashboardWindow(MainWindow):
         tk.Button(nav_bar, text="Account", command=self.open_account).pack(side="left", padx=6)
         tk.Button(nav_bar, text="Sign Out", command=self.sign_out).pack(side="right", padx=6)
         self.display_summary()
+        self.load_reports()
         self.root.mainloop()
 
+    def load_reports(self):
+        """Load the reports in the background and draw the charts once they are loaded."""
+        current_user = self.app.session_manager.current_user
+        if not current_user:
+            return
+        user_id = current_user.id
+        # load all three reports together since they come from the same scan of the month
+        self.run_in_background(lambda services: services.transactions.get_dashboard_report_data(user_id),
+                               self.on_reports_loaded, key="reports")
+
+    def on_reports_loaded(self, report_data):
+        """Keep the loaded reports and draw the charts for the selected time frame."""
+        self.report_data = report_data
+        self.update_graph()
+
     def open_input_transaction(self):
         """Open the input transaction window."""
+        from .input_transaction_window import InputTransactionWindow
+
         self.close_window()
         InputTransactionWindow(self.app)
 
     def open_transaction_history(self):
         """Open the transaction history window."""
+        from .transaction_history_window import TransactionHistoryWindow
+
         self.close_window()
         TransactionHistoryWindow(self.app)
 
     def open_goals(self):
         """Open the goals window."""
+        from .goals_window import GoalsWindow
+
         self.close_window()
         GoalsWindow(self.app)
 
     def open_account(self):
         """Open the account window."""
+        from .account_window import AccountWindow
+
         self.close_window()
         AccountWindow(self.app)
 
     def update_graph(self):
         """Update the graph."""
-        if self.selected_time_frame.get() == "daily":
-            incomes = self.daily_report_data["income_by_category"]
-            expenses = self.daily_report_data["expenses_by_category"]
-        elif self.selected_time_frame.get() == "weekly":
-            incomes = self.weekly_report_data["income_by_category"]
-            expenses = self.weekly_report_data["expenses_by_category"]
-        elif self.selected_time_frame.get() == "monthly":
-            incomes = self.monthly_report_data["income_by_category"]
-            expenses = self.monthly_report_data["expenses_by_category"]
-        else:
+        # nothing to draw until the reports are loaded
+        if self.report_data is None:
+            return
+        time_frame = self.selected_time_frame.get()
+        if time_frame not in self.report_data:
             raise RuntimeError("Invalid selection")
+        incomes = self.report_data[time_frame]["income_by_category"]
+        expenses = self.report_data[time_frame]["expenses_by_category"]
 
         final_expense_categories, final_expense_sizes = self.create_chart_data(expenses)
         final_income_categories, final_income_sizes = self.create_chart_data(incomes)
@@ -73,6 +85,9 @@ class DashboardWindow(MainWindow):
 
     def create_pie_and_bar_charts(self, parent, data, labels):
         """Create the pie-and-bar charts."""
+        # matplotlib takes a while to import, so it is only loaded once the first chart is drawn
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
 
         # Remove any existing charts in the tab before drawing new ones
         for child in parent.winfo_children():
@@ -129,6 +144,8 @@ class DashboardWindow(MainWindow):
 
     def sign_out(self):
         """Sign out and return to login window."""
+        from .login_window import LoginWindow
+
         self.app.session_manager.logout()
         self.close_window()
         LoginWindow(self.app)
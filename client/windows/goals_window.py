@@ -1,7 +1,9 @@
 """Goals window for creating and managing financial goals."""
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, date
+from datetime import datetime
+from database.crud.goal_crud import GOAL_UPDATED, GOAL_SKIPPED, GOAL_NOT_FOUND
+from database.models.money import format_money
 from .base_window import MainWindow
 
 class GoalsWindow(MainWindow):
@@ -183,21 +185,27 @@ class GoalsWindow(MainWindow):
                 return
             
             user_id = current_user.id
-            status, message = self.app.goals.create_goal(user_id, description, target, current, goal_start_date,
-                                                         goal_end_date)
-            if status:
-                messagebox.showinfo("Success", message)
-                self.goal_description.set("")
-                self.goal_target.set("")
-                self.goal_current.set("")
-                self.goal_start_date.set("")
-                self.goal_end_date.set("")
-                self.refresh_lists()
-            else:
-                messagebox.showerror("Error", message)
+            self.run_in_background(
+                lambda services: services.goals.create_goal(user_id, description, target, current, goal_start_date,
+                                                            goal_end_date),
+                self.on_goal_created)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def on_goal_created(self, result):
+        """Clear the fields and refresh the lists once the goal was created, or show why it wasn't."""
+        status, message = result
+        if status:
+            messagebox.showinfo("Success", message)
+            self.goal_description.set("")
+            self.goal_target.set("")
+            self.goal_current.set("")
+            self.goal_start_date.set("")
+            self.goal_end_date.set("")
+            self.refresh_lists()
+        else:
+            messagebox.showerror("Error", message)
+
     def refresh_lists(self):
         """Refresh the goals lists to show the most updated list of goals."""
         # clear the tree views so there isnt a duplicated list of goals that keep stacking on top of each other
@@ -218,38 +226,36 @@ class GoalsWindow(MainWindow):
         if not current_user:
             return
         user_id = current_user.id
-        current_goals = self.app.goals.get_current_goals(user_id)
-        completed_goals = self.app.goals.get_completed_goals(user_id)
-
-        # add the curent goals that belongs to the current user to the tree view
-        for goal in current_goals:
-            start_date_str = str(goal.start_date)
-            end_date_str = str(goal.end_date)
-
-            progress_percentage = self.app.goals.get_goal_progress(user_id, goal.id)
-
-            current_amount_str = f"${goal.current_amount:.2f}"
-            target_amount_str = f"${goal.target_amount:.2f}"
-            progress_percentage_str = f"{progress_percentage:.1f}%"
-
-            self.current_goals_tree.insert("", "end", values=(
-            goal.description, target_amount_str, current_amount_str, progress_percentage_str, start_date_str,
-            end_date_str), tags=(str(goal.id),))
-
-        # add the completed goasl to the tree view for the current user to see
-        for goal in completed_goals:
-            start_date_str = str(goal.start_date)
-            end_date_str = str(goal.end_date)
-
-            progress_percentage = self.app.goals.get_goal_progress(user_id, goal.id)
-
-            current_amount_str = f"${goal.current_amount:.2f}"
-            target_amount_str = f"${goal.target_amount:.2f}"
-            progress_percentage_str = f"{progress_percentage:.1f}%"
-
-            self.completed_goals_tree.insert("", "end", values=(
-            goal.description, target_amount_str, current_amount_str, progress_percentage_str, start_date_str,
-            end_date_str), tags=(str(goal.id),))
+        # one query gets every goal of the user with its progress, then they're split into the two trees by status
+        def load_goals(services):
+            return [self.to_tree_row(goal, progress_percentage)
+                    for goal, progress_percentage in services.goals.get_goals_with_progress(user_id)]
+
+        # a refresh still loading is cancelled when the lists are refreshed again
+        self.run_in_background(load_goals, self.on_goals_loaded, key="goals")
+
+    def to_tree_row(self, goal, progress_percentage):
+        """Get the status, id and the values shown in the tree view for a goal."""
+        start_date_str = str(goal.start_date)
+        end_date_str = str(goal.end_date)
+
+        current_amount_str = format_money(goal.current_amount)
+        target_amount_str = format_money(goal.target_amount)
+        progress_percentage_str = f"{progress_percentage:.1f}%"
+
+        return goal.status, goal.id, (goal.description, target_amount_str, current_amount_str,
+                                      progress_percentage_str, start_date_str, end_date_str)
+
+    def on_goals_loaded(self, rows):
+        """Fill the current and completed goals trees with the loaded goals."""
+        for status, goal_id, values in rows:
+            if status == "current":
+                tree = self.current_goals_tree
+            elif status == "completed":
+                tree = self.completed_goals_tree
+            else:
+                continue
+            tree.insert("", "end", values=values, tags=(str(goal_id),))
 
     def on_current_goal_select(self, event):
         """Enable the buttons for the current goals tree and disable the buttons for the completed goals tree if the user selects a goal in the current goals tree."""
@@ -318,19 +324,42 @@ class GoalsWindow(MainWindow):
                 messagebox.showerror("Error", "The amount to add must be greater than 0")
                 return
 
-            # update the current amount to all of the selected goals and update the progress percentage
-            for goal_id in selected_goal_id:
-                status, message = self.app.goals.update_goal_progress(goal_id, current_user.id,
-                                                                      amount_to_add)
-                if not status:
-                    messagebox.showerror("Error", message)
-                    return
-            messagebox.showinfo("Success",
-                                f"Successfully added ${amount_to_add:.2f} to {len(selected_goal_id)} selected goals")
-            self.refresh_lists()
+            # update the current amount of all the selected goals at once and update the progress percentage
+            user_id = current_user.id
+            self.run_in_background(
+                lambda services: services.goals.add_progress(user_id, selected_goal_id, amount_to_add),
+                self.on_progress_added)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def on_progress_added(self, result):
+        """Show how many of the selected goals got the amount and refresh the lists."""
+        status, outcomes, message = result
+        if not status:
+            messagebox.showerror("Error", message)
+            return
+        skipped_count = self.count_outcomes(outcomes, GOAL_SKIPPED)
+        if skipped_count > 0:
+            message += f". {skipped_count} goal(s) were skipped because they are completed or past their end date."
+        messagebox.showinfo("Success", message)
+        self.refresh_lists()
+
+    def count_outcomes(self, outcomes, outcome):
+        """Count how many of the goals in a bulk action ended with the outcome."""
+        return sum(1 for goal_outcome in outcomes.values() if goal_outcome == outcome)
+
+    def show_bulk_result(self, result):
+        """Show the result of a bulk action on the selected goals and refresh the lists."""
+        status, outcomes, message = result
+        if not status:
+            messagebox.showerror("Error", message)
+            return
+        not_found_count = self.count_outcomes(outcomes, GOAL_NOT_FOUND)
+        if not_found_count > 0:
+            message += f". {not_found_count} goal(s) were not found."
+        messagebox.showinfo("Success", message)
+        self.refresh_lists()
+
     def completes_current_selected_goal(self):
         """Mark the selected goals in the current goals tree as completed."""
         # get the ids of all the selected goals
@@ -342,12 +371,9 @@ class GoalsWindow(MainWindow):
                 return
             
             # mark all of the selected goals as completed
-            for goal_id in selected_goal_id:
-                status, message = self.app.goals.mark_goal_completed(current_user.id, goal_id)
-                if not status:
-                    messagebox.showerror("Error", message)
-            messagebox.showinfo("Success", f"Successfully marked {len(selected_goal_id)} selected goals as completed")
-            self.refresh_lists()
+            user_id = current_user.id
+            self.run_in_background(lambda services: services.goals.mark_goals_completed(user_id, selected_goal_id),
+                                   self.show_bulk_result)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -362,12 +388,9 @@ class GoalsWindow(MainWindow):
                 messagebox.showerror("Error", "Need to be logged in to delete goals")
                 return
             
-            for goal_id in selected_goal_id:
-                status, message = self.app.goals.delete_user_goal(current_user.id, goal_id)
-                if not status:
-                    messagebox.showerror("Error", message)
-            messagebox.showinfo("Success", f"Successfully deleted {len(selected_goal_id)} selected goals")
-            self.refresh_lists()
+            user_id = current_user.id
+            self.run_in_background(lambda services: services.goals.delete_goals(user_id, selected_goal_id),
+                                   self.show_bulk_result)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -382,51 +405,37 @@ class GoalsWindow(MainWindow):
     def reactivate_selected_completed_goal(self):
         """Reactivate the selected completed goals in the completed goals tree."""
         # get the ids of the selected goals from the complete goal tree that we want to reactiveate
-        # Also keep count of how many goals were reactivated and how manyt failed depending on their end date
+        # the goals whose end date has already passed are skipped and counted so the user knows why
         selected_goal_id = self.get_selected_goal_ids(self.completed_goals_tree)
         current_user = self.app.session_manager.current_user
         if not current_user:
             messagebox.showerror("Error", "Need to be logged in to reactivate goals")
             return
         user_id = current_user.id
-        reactivated_count = 0
-        skipped_count = 0
 
-        try:
-            for goal_id in selected_goal_id:
-                # Get the goal based on its id to check its end date to see if it passed already
-                goal = self.app.goals.get_goal_by_id(user_id, goal_id)
-                if not goal:
-                    messagebox.showerror("Error", f"Goal with ID {goal_id} not found")
-                    continue
-
-                # Check to see if the end date for the goal the user want to reactivate has already passed
-                if goal.end_date < date.today():
-                    skipped_count += 1
-                    messagebox.showerror("Error",
-                                         f"Cannot reactivate goal '{goal.description}' since the end date ({goal.end_date}) has already passed")
-                    continue
-
-                # if the cuurrent date is still before the end date then the goal can be reactivated
-                status, message = self.app.goals.mark_goal_current(user_id, goal_id)
-                if not status:
-                    messagebox.showerror("Error", message)
-                else:
-                    reactivated_count += 1
-
-            if reactivated_count > 0:
-                message = f"Successfully reactivated {reactivated_count} selected goal(s)"
-                if skipped_count > 0:
-                    message += f". {skipped_count} goal(s) were skipped because their end date has passed."
-                messagebox.showinfo("Success", message)
-            elif skipped_count > 0:
-                pass
-            else:
-                messagebox.showinfo("Info", "No goals were reactivated")
+        self.run_in_background(lambda services: services.goals.reactivate_goals(user_id, selected_goal_id),
+                               self.on_goals_reactivated)
 
-            self.refresh_lists()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+    def on_goals_reactivated(self, result):
+        """Show how many of the selected goals were reactivated and refresh the lists."""
+        status, outcomes, message = result
+        if not status:
+            messagebox.showerror("Error", message)
+            return
+        reactivated_count = self.count_outcomes(outcomes, GOAL_UPDATED)
+        skipped_count = self.count_outcomes(outcomes, GOAL_SKIPPED)
+
+        if reactivated_count > 0:
+            if skipped_count > 0:
+                message += f". {skipped_count} goal(s) were skipped because their end date has passed."
+            messagebox.showinfo("Success", message)
+        elif skipped_count > 0:
+            messagebox.showerror("Error",
+                                 f"Cannot reactivate {skipped_count} goal(s) since their end date has already passed")
+        else:
+            messagebox.showinfo("Info", "No goals were reactivated")
+
+        self.refresh_lists()
 
     def return_back(self):
         """Return to the dashboard window."""
@@ -2,6 +2,7 @@
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox
+from database.models.money import format_money
 from .base_window import MainWindow
 from ..window_constants import INCOME_CATEGORIES, EXPENSE_CATEGORIES, icon_dictionary, icon_directory
 from PIL import Image, ImageTk
@@ -77,7 +78,7 @@ class InputTransactionWindow(MainWindow):
             messagebox.showerror("Error", "Amount must be positive")
             return
 
-        amount_formatted = f"{amount:.2f}"
+        amount_formatted = format_money(amount)
 
         # Get icon for category or use the fallback icon if the category icon is not found
         icon = self.icons.get(category)
@@ -95,9 +96,9 @@ class InputTransactionWindow(MainWindow):
             return
 
         # Get the category that the income is under so we can have a relationship where each transaction has a category
-        category_obj = self.app.category_crud.get_category_by_name(category)
+        category_id = self.app.get_category_id(category)
 
-        if not category_obj:
+        if category_id is None:
             messagebox.showerror("Error", f"Category '{category}' not found.")
             return
 
@@ -106,18 +107,22 @@ class InputTransactionWindow(MainWindow):
         self.income_tree.insert("", tk.END, text=category, image=icon, values=(amount_formatted, display_description))
 
         # Add the income that the user entered into the transaction database
-        try:
-            transaction = self.app.transactions.add_income(
-                user_id=current_user.id,
-                category_id=category_obj.id,
+        user_id = current_user.id
+        self.run_in_background(
+            lambda services: services.transactions.add_income(
+                user_id=user_id,
+                category_id=category_id,
                 amount=amount,
                 description=description_value
-            )
-            messagebox.showinfo("Success", f"Added income: {category}, ${amount:.2f}")
-            self.income_entry.delete(0, tk.END)
-            self.income_description_entry.delete(0, tk.END)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add income: {str(e)}")
+            ),
+            lambda transaction: self.on_income_added(category, amount),
+            on_error=lambda error: messagebox.showerror("Error", f"Failed to add income: {str(error)}"))
+
+    def on_income_added(self, category, amount):
+        """Clear the income fields once the income was saved."""
+        messagebox.showinfo("Success", f"Added income: {category}, {format_money(amount)}")
+        self.income_entry.delete(0, tk.END)
+        self.income_description_entry.delete(0, tk.END)
 
     def create_expense_tab(self):
         """Create the expense input tab for the user to input their expenses."""
@@ -161,7 +166,7 @@ class InputTransactionWindow(MainWindow):
             messagebox.showerror("Error", "Amount must be positive")
             return
 
-        amount_formatted = f"{amount:.2f}"
+        amount_formatted = format_money(amount)
 
         # Get the icon for category or use the fallback icon if the category icon is not found
         icon = self.icons.get(category)
@@ -180,9 +185,9 @@ class InputTransactionWindow(MainWindow):
             return
 
         #Get the category that the expense is under so we can have a relationship where each transaction has a category
-        category_obj = self.app.category_crud.get_category_by_name(category)
+        category_id = self.app.get_category_id(category)
 
-        if not category_obj:
+        if category_id is None:
             messagebox.showerror("Error", f"Category '{category}' not found.")
             return
 
@@ -192,18 +197,22 @@ class InputTransactionWindow(MainWindow):
         self.expense_tree.insert("", tk.END, text=category, image=icon, values=(amount_formatted, display_description))
 
         #Add the expense that the user entered into the transaction database
-        try:
-            transaction = self.app.transactions.add_expense(
-                user_id=current_user.id,
-                category_id=category_obj.id,
+        user_id = current_user.id
+        self.run_in_background(
+            lambda services: services.transactions.add_expense(
+                user_id=user_id,
+                category_id=category_id,
                 amount=amount,
                 description=description_value
-            )
-            messagebox.showinfo("Success", f"Added expense: {category}, ${amount:.2f}")
-            self.expense_entry.delete(0, tk.END)
-            self.expense_description_entry.delete(0, tk.END)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add expense: {str(e)}")
+            ),
+            lambda transaction: self.on_expense_added(category, amount),
+            on_error=lambda error: messagebox.showerror("Error", f"Failed to add expense: {str(error)}"))
+
+    def on_expense_added(self, category, amount):
+        """Clear the expense fields once the expense was saved."""
+        messagebox.showinfo("Success", f"Added expense: {category}, {format_money(amount)}")
+        self.expense_entry.delete(0, tk.END)
+        self.expense_description_entry.delete(0, tk.END)
 
     def return_back(self):
         """Return to the dashboard window."""
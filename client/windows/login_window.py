@@ -22,15 +22,14 @@ class LoginWindow(MainWindow):
         tk.Entry(self.root, textvariable=self.password_value).pack(fill="x", padx=16)
 
         # Login function
-        tk.Button(self.root, text="Login", command=self.on_login).pack(pady=12)
+        self.login_button = tk.Button(self.root, text="Login", command=self.on_login)
+        self.login_button.pack(pady=12)
         tk.Button(self.root, text="Sign Up", command=self.open_sign_up_window).pack()
 
         self.root.mainloop()
 
     def on_login(self):
         """Login the user based on the details the entered."""
-        from .dashboard_window import DashboardWindow
-        
         email = self.email_value.get().strip()
         password = self.password_value.get().strip()
 
@@ -38,11 +37,19 @@ class LoginWindow(MainWindow):
             messagebox.showerror("Error", "Email and password are required")
             return
 
-        is_logged_in = self.app.login(email, password)
-        if is_logged_in:
+        # checking the password takes a while, so it runs in the background while the window stays responsive
+        self.login_button.config(state="disabled", text="Logging in...")
+        self.app.login_in_background(email, password, self.on_login_done, self.call_on_main_thread)
+
+    def on_login_done(self, user):
+        """Open the dashboard once the password was checked, or show an error."""
+        from .dashboard_window import DashboardWindow
+
+        if user:
             self.close_window()
             DashboardWindow(self.app)
         else:
+            self.login_button.config(state="normal", text="Login")
             messagebox.showerror("Error", "Invalid login credentials")
 
     def open_sign_up_window(self):
@@ -30,7 +30,8 @@ class SignUpWindow(MainWindow):
         tk.Label(self.root, text="Birthdate (YYYY-MM-DD)").pack(anchor="w", padx=16, pady=(10, 2))
         tk.Entry(self.root, textvariable=self.birthdate_value).pack(fill="x", padx=16)
 
-        tk.Button(self.root, text="Create Account", command=self.on_create_account).pack(pady=14)
+        self.create_button = tk.Button(self.root, text="Create Account", command=self.on_create_account)
+        self.create_button.pack(pady=14)
         tk.Button(self.root, text="Back to Sign In", command=self.return_back).pack()
 
         self.root.mainloop()
@@ -44,15 +45,22 @@ class SignUpWindow(MainWindow):
                 username = self.username_value.get().strip()
                 email = self.email_value.get().strip()
                 password = self.password_value.get().strip()
-                status, message = self.app.authentication.register(username, email, password, birthdate)
-                if status:
-                    messagebox.showinfo("Success", message)
-                    self.return_back()
-                else:
-                    messagebox.showerror("Error", message)
+                # the password is hashed in the background so the window stays responsive
+                self.create_button.config(state="disabled", text="Creating account...")
+                self.app.authentication.register_in_background(username, email, password, birthdate,
+                                                               self.on_create_account_done, self.call_on_main_thread)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def on_create_account_done(self, status, message):
+        """Go back to the login window once the account was created, or show an error."""
+        if status:
+            messagebox.showinfo("Success", message)
+            self.return_back()
+        else:
+            self.create_button.config(state="normal", text="Create Account")
+            messagebox.showerror("Error", message)
+
     def return_back(self):
         """Return to the login window."""
         from .login_window import LoginWindow
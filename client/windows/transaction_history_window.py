@@ -1,10 +1,14 @@
 """Transaction history window for viewing and filtering transactions."""
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timezone, timedelta
+from database.models.money import format_money
 from .base_window import MainWindow
 from ..window_constants import INCOME_CATEGORIES, EXPENSE_CATEGORIES
 
+# how many transactions are loaded into the tree at a time as the user scrolls
+TRANSACTION_PAGE_SIZE = 100
+
 
 class TransactionHistoryWindow(MainWindow):
     """Window for viewing transaction history."""
@@ -15,6 +19,11 @@ class TransactionHistoryWindow(MainWindow):
         self.root.geometry("900x650")
         self.center_window(900, 900)
 
+        # the filters of the list being shown and the key to load the next page from, which is None after the last page
+        self.current_filters = {"type": None, "category_id": None, "start_date": None, "end_date": None}
+        self.next_page_key = None
+        self.loading_page = False
+
         nav_bar = tk.Frame(self.root)
         nav_bar.pack(fill="x", pady=8)
         tk.Button(nav_bar, text="Back to Dashboard", command=self.return_back).pack(side="left", padx=6)
@@ -54,11 +63,11 @@ class TransactionHistoryWindow(MainWindow):
         transaction_history_tree_frame = tk.Frame(self.transaction_history_frame)
         transaction_history_tree_frame.pack(fill="both", expand=True, padx=8, pady=8)
 
-        current_scroll_bar = ttk.Scrollbar(transaction_history_tree_frame, orient="vertical")
-        current_scroll_bar.pack(side="right", fill="y")
+        self.current_scroll_bar = ttk.Scrollbar(transaction_history_tree_frame, orient="vertical")
+        self.current_scroll_bar.pack(side="right", fill="y")
 
-        self.transaction_history_tree = ttk.Treeview(transaction_history_tree_frame, columns=("category", "amount", "type", "description", "created_on"),show="headings", yscrollcommand=current_scroll_bar.set, height=6,selectmode="extended")
-        current_scroll_bar.config(command=self.transaction_history_tree.yview)
+        self.transaction_history_tree = ttk.Treeview(transaction_history_tree_frame, columns=("category", "amount", "type", "description", "created_on"),show="headings", yscrollcommand=self.on_transaction_history_scroll, height=6,selectmode="extended")
+        self.current_scroll_bar.config(command=self.transaction_history_tree.yview)
         self.transaction_history_tree.heading("category", text="Category")
         self.transaction_history_tree.heading("amount", text="Amount")
         self.transaction_history_tree.heading("type", text="Type")
@@ -76,94 +85,87 @@ class TransactionHistoryWindow(MainWindow):
         transaction_actions_frame.pack(fill="x", padx=8, pady=(0, 8))
         self.delete_transaction_button = tk.Button(transaction_actions_frame, text="Delete Selected Transactions", command=self.delete_selected_transactions, state="disabled")
         self.delete_transaction_button.pack(side="left", padx=4)
-        
+        tk.Button(transaction_actions_frame, text="Export Transactions", command=self.export_transactions).pack(side="right", padx=4)
+
         self.refresh_transaction_history()
         self.root.mainloop()
 
     
     def apply_transaction_filters(self):
         """Apply filters to the transaction history to show the most updated list of transactions based on the filters the user wants to apply."""
-        type_filter = self.filter_type_var.get()
-        category_filter = self.filter_category_var.get()
-        from_date_str = self.from_date.get().strip()
-        to_date_str = self.to_date.get().strip()
-
         current_user = self.app.session_manager.current_user
         if not current_user:
             messagebox.showerror("Error", "Need to be logged in to filter transactions.")
             return
 
-        user_id = current_user.id
+        filters = self.read_transaction_filters()
+        if filters is None:
+            return
 
-        # filter by the transaction type first so either its all, income, or expense, then we can filter it by category
-        if type_filter == "All":
-            transactions_by_type = self.app.transactions.get_user_transactions(user_id)
-        else:
-            transactions_by_type = self.app.transactions.get_transactions_by_type(user_id, type_filter.lower())
+        # the type, category and date range all go into one query instead of fetching each list and intersecting them
+        self.current_filters = filters
+        self.refresh_transaction_history()
+
+    def read_transaction_filters(self):
+        """Read the filters the user picked into the type, category id and date range, or show an error and return None."""
+        type_filter = self.filter_type_var.get()
+        category_filter = self.filter_category_var.get()
+        from_date_str = self.from_date.get().strip()
+        to_date_str = self.to_date.get().strip()
+
+        filters = {"type": None, "category_id": None, "start_date": None, "end_date": None}
+        if type_filter != "All":
+            filters["type"] = type_filter.lower()
 
-        filtered_transactions = transactions_by_type
-        #if the option is not all then filter the transactions by the category
         if category_filter != "All":
-            category_obj = self.app.category_crud.get_category_by_name(category_filter)
-            if not category_obj:
+            category_id = self.app.get_category_id(category_filter)
+            if category_id is None:
                 messagebox.showerror("Error", f"Category '{category_filter}' not found.")
-                return
-
-            transactions_by_category = self.app.transactions.get_transactions_by_category(user_id, category_obj.id)
-
-            #if the type is all then we can filter the transactions by the category without having to filter by type first
-            if type_filter == "All":
-                filtered_transactions = transactions_by_category
-            else: 
-                #if the type is not all then we will filter by type first and then fitler by category            
-                type_ids = set()
-                for transaction in filtered_transactions:
-                    type_ids.add(transaction.id)
-                #filter the transaction by category after fitlering by type
-                filtered_transactions = []
-                for transaction in transactions_by_category:
-                    if transaction.id in type_ids:
-                        filtered_transactions.append(transaction)
-
-        #filter the trsnsaction history by a date range if the user wants to also
-        start_date = None
-        end_date = None
+                return None
+            filters["category_id"] = category_id
 
         if from_date_str:
             try:
-                start_date = datetime.strptime(from_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                filters["start_date"] = datetime.strptime(from_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
             except ValueError:
                 messagebox.showerror("Error", "Invalid From Date format. Use YYYY-MM-DD.")
-                return
+                return None
 
         if to_date_str:
             try:
                 to_date = datetime.strptime(to_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
                 #end date is the end of the day since we wnat to incldue the entire day of that date right before it become the next day
-                end_date = (to_date + timedelta(days=1) - timedelta(microseconds=1)).replace(tzinfo=timezone.utc)
+                filters["end_date"] = to_date + timedelta(days=1) - timedelta(microseconds=1)
             except ValueError:
                 messagebox.showerror("Error", "Invalid To Date format. Use YYYY-MM-DD.")
-                return
+                return None
 
-        if start_date and end_date and start_date > end_date:
+        if filters["start_date"] and filters["end_date"] and filters["start_date"] > filters["end_date"]:
             messagebox.showerror("Error", "From Date must be earlier than To Date.")
+            return None
+        return filters
+
+    def export_transactions(self):
+        """Export the transactions matching the current filters to a CSV or JSONL file the user picks."""
+        current_user = self.app.session_manager.current_user
+        if not current_user:
+            messagebox.showerror("Error", "Need to be logged in to export transactions.")
             return
-        #if both the start and end date are given then we can filter the history based on that date range
-        #if the start date is given then we filter from that date to the most recent date
-        #if end date is given then we filter from earliest date to the end date
-        if start_date or end_date:
-            transactions_by_date = self.app.transactions.get_transactions_by_date(user_id, start_date, end_date)
-            date_ids = {transaction.id for transaction in transactions_by_date}
-            date_ids = set()
-            for transaction in transactions_by_date:
-                date_ids.add(transaction.id)
-            filtered_result = []
-            for transaction in filtered_transactions:
-                if transaction.id in date_ids:
-                    filtered_result.append(transaction)
-            filtered_transactions = filtered_result
-
-        self.refresh_transaction_history(filtered_transactions)
+
+        filters = self.read_transaction_filters()
+        if filters is None:
+            return
+
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Transactions", defaultextension=".csv",
+                                            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl")])
+        if not path:
+            return
+        export_format = "jsonl" if path.lower().endswith(".jsonl") else "csv"
+        user_id = current_user.id
+        self.run_in_background(
+            lambda services: services.exporter.export(user_id, path, export_format, **filters),
+            lambda row_count: messagebox.showinfo("Success", f"Exported {row_count} transaction(s) to {path}"),
+            on_error=lambda error: messagebox.showerror("Error", f"Failed to export transactions: {str(error)}"))
 
     def on_filter_type_change(self, selected_type):
         """Update the list of categories options depending on the type of transaction the user wants to filter by."""
@@ -186,42 +188,79 @@ class TransactionHistoryWindow(MainWindow):
 
         self.filter_category_var.set("All")
     
-    def refresh_transaction_history(self, transactions=None):
-        """Refresh the transaction history tree view to show the most updated list of transactions."""
+    def refresh_transaction_history(self):
+        """Refresh the transaction history tree view to show the first page of the most updated list of transactions."""
         for item in self.transaction_history_tree.get_children():
             self.transaction_history_tree.delete(item)
+        self.next_page_key = None
+        # a page still loading for the old filters is cancelled when the next one is requested
+        self.loading_page = False
+        self.load_next_transaction_page(first_page=True)
+
+    def load_next_transaction_page(self, first_page=False):
+        """Load the next page of transactions in the background and add it to the bottom of the tree view, most recent first."""
+        if self.loading_page or (not first_page and self.next_page_key is None):
+            return
+        current_user = self.app.session_manager.current_user
+        if not current_user:
+            return
 
-        if transactions is None:
-            current_user = self.app.session_manager.current_user
-            if not current_user:
-                return
-            
-            user_id = current_user.id
-            transactions = self.app.transactions.get_user_transactions(user_id)
-        
-        # Sort transactions by created_on date to show the most recent one first and the oldest one last
-        transactions = sorted(transactions, key=lambda t: t.created_on, reverse=True)
-        
-        # Add the transactions to the tree view for the transaction history
-        for transaction in transactions:
-            if transaction.category:
-                category_name = transaction.category.name
-            else:
-                category_name = "Unknown"
-            amount = f"${transaction.amount:.2f}"
-            transaction_type = transaction.type.capitalize()
-            if transaction.description:
-                description = transaction.description
-            else:
-                description = ""
-            if transaction.created_on:
-                created_on = transaction.created_on.strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                created_on = ""
-            
-            self.transaction_history_tree.insert("", "end", values=(
-                category_name, amount, transaction_type, description, created_on
-            ), tags=(str(transaction.id),))
+        user_id = current_user.id
+        filters = dict(self.current_filters)
+        after = self.next_page_key
+
+        def load_page(services):
+            transactions, next_page_key = services.transactions.get_transactions_page(
+                user_id,
+                transaction_type=filters["type"],
+                category_id=filters["category_id"],
+                start_date=filters["start_date"],
+                end_date=filters["end_date"],
+                after=after,
+                limit=TRANSACTION_PAGE_SIZE,
+                with_category=True
+            )
+            return [self.to_tree_row(transaction) for transaction in transactions], next_page_key
+
+        self.loading_page = True
+        self.run_in_background(load_page, self.on_transaction_page_loaded, key="transaction_page",
+                               on_error=self.on_transaction_page_error)
+
+    def to_tree_row(self, transaction):
+        """Get the id and the values shown in the tree view for a transaction."""
+        if transaction.category:
+            category_name = transaction.category.name
+        else:
+            category_name = "Unknown"
+        amount = format_money(transaction.amount)
+        transaction_type = transaction.type.capitalize()
+        if transaction.description:
+            description = transaction.description
+        else:
+            description = ""
+        if transaction.created_on:
+            created_on = transaction.created_on.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            created_on = ""
+        return transaction.id, (category_name, amount, transaction_type, description, created_on)
+
+    def on_transaction_page_loaded(self, page):
+        """Add the loaded page of transactions to the tree view for the transaction history."""
+        rows, self.next_page_key = page
+        self.loading_page = False
+        for transaction_id, values in rows:
+            self.transaction_history_tree.insert("", "end", values=values, tags=(str(transaction_id),))
+
+    def on_transaction_page_error(self, error):
+        """Show why the page could not be loaded and allow loading it again."""
+        self.loading_page = False
+        messagebox.showerror("Error", f"Failed to load transactions: {error}")
+
+    def on_transaction_history_scroll(self, first, last):
+        """Move the scroll bar and load the next page once the user scrolls near the bottom of the loaded transactions."""
+        self.current_scroll_bar.set(first, last)
+        if float(last) >= 0.9 and self.next_page_key is not None and not self.loading_page:
+            self.root.after_idle(self.load_next_transaction_page)
 
     def on_transaction_history_select(self, event):
         """Enable the delete transaction button if the user selects a transaction in the transaction history tree view."""
@@ -254,16 +293,25 @@ class TransactionHistoryWindow(MainWindow):
                 messagebox.showerror("Error", "Need to be logged in to delete transactions.")
                 return
             
-            for transaction_id in selected_transaction_id:
-                status, message = self.app.transactions.delete_user_transaction(current_user.id, transaction_id)
-                if not status:
-                    messagebox.showerror("Error", message)
-            messagebox.showinfo("Success", f"Successfully deleted {len(selected_transaction_id)} selected transaction(s)")
-            self.refresh_transaction_history()
+            # all the selected transactions are deleted together so there is one commit and one message
+            user_id = current_user.id
             self.delete_transaction_button.config(state="disabled")
+            self.run_in_background(
+                lambda services: services.transactions.delete_user_transactions(user_id, selected_transaction_id),
+                self.on_transactions_deleted)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def on_transactions_deleted(self, result):
+        """Show the result of deleting the selected transactions and refresh the list."""
+        status, missing_ids, message = result
+        if not status:
+            messagebox.showerror("Error", message)
+            self.on_transaction_history_select(None)
+            return
+        messagebox.showinfo("Success", message)
+        self.refresh_transaction_history()
+
     def return_back(self):
         """Return to the dashboard window."""
         from .dashboard_window import DashboardWindow
@@ -1,32 +1,73 @@
-from database.db_config import Base, engine, SessionLocal
+from database.db_config import Base, engine, SessionLocal, ScopedSession, unit_of_work
 from database.models.user_model import User
 from database.models.category_model import Category
 from database.models.goal_model import Goal
 from database.models.transaction_model import Transaction
+from database.models.daily_rollup_model import DailyRollup
+from database.models.imported_line_model import ImportedLine
+from database.models.schema_version_model import SchemaVersion
+from database.migrations import LATEST_VERSION, get_schema_version, migrate
 
 __all__ = [
     'Base',
     'engine', 
     'SessionLocal',
+    'ScopedSession',
+    'unit_of_work',
     'User',
     'Category',
     'Goal',
-    'Transaction'
+    'Transaction',
+    'DailyRollup',
+    'ImportedLine',
+    'SchemaVersion',
+    'SCHEMA_VERSION',
+    'create_indexes',
+    'get_schema_version',
+    'initialize_database'
 ]
 
+# the version of the latest migration, a database at this version is already set up. A change to a
+# table that already exists, or to the default categories, needs a new step in database/migrations/versions.py
+SCHEMA_VERSION = LATEST_VERSION
 
-def initialize_database():
 
-    Base.metadata.create_all(bind=engine)
+def create_indexes(bind=engine):
+    """Create the indexes that are missing on tables that already exist.
 
-    from database.crud.category_crud import initialize_categories
-    db = SessionLocal()
+    create_all only creates the indexes together with a new table, so databases made
+    before an index was added to a model would never get it otherwise.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def initialize_database(bind=engine) -> bool:
+    """Set up the tables, run the migrations and seed the default categories unless the database is at SCHEMA_VERSION.
+
+    A database that is already set up only costs the one read of its schema version, so the app
+    starts without checking every table and category. Returns whether it had to be set up.
+    """
+    version = get_schema_version(bind)
+    if version is not None and version >= SCHEMA_VERSION:
+        return False
+
+    Base.metadata.create_all(bind=bind)
+
+    from database.crud.category_crud import CategoryCrud
+    db = SessionLocal(bind=bind)
     try:
-        initialize_categories(db)
-        print("Database initialized successfully")
+        CategoryCrud(db).initialize_categories()
     except Exception as e:
         print(f"Error initializing database: {e}")
         db.rollback()
+        return False
     finally:
         db.close()
 
+    # new tables were made above, the migrations change the tables that already existed and save
+    # the schema version after each step, so the version is only current once everything worked
+    migrate(bind)
+    print("Database initialized successfully")
+    return True
@@ -0,0 +1,2 @@
+# how many values go into one IN (...) so a huge selection stays under sqlite's limit on bound parameters
+IN_CHUNK_SIZE = 500
@@ -0,0 +1,68 @@
+import threading
+import weakref
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database.models.category_model import Category
+
+# one cache per engine so every session, crud and window of the app shares the same lookups
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+class CategoryCache:
+    """Category ids and names loaded once into dicts so looking one up does not need a query.
+
+    Categories are seeded at startup and almost never change, so the whole table is read on the
+    first lookup and kept until invalidate() is called after categories are added.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lookups = None
+
+    def _load(self, db: Session) -> tuple[dict, dict, dict]:
+        """Get the (names by id, ids by name, ids by lowercase name) dicts, reading them on first use"""
+        with self._lock:
+            if self._lookups is None:
+                rows = db.execute(select(Category.id, Category.name)).all()
+                self._lookups = (
+                    {category_id: name for category_id, name in rows},
+                    {name: category_id for category_id, name in rows},
+                    {name.lower(): category_id for category_id, name in rows}
+                )
+            return self._lookups
+
+    def invalidate(self) -> None:
+        """Drop the loaded categories so the next lookup reads them again"""
+        with self._lock:
+            self._lookups = None
+
+    def get_id(self, db: Session, name: str, ignore_case: bool = False):
+        """Get the id of the category with the name, or None when there is no such category"""
+        _, ids_by_name, ids_by_lower_name = self._load(db)
+        if name is None:
+            return None
+        if ignore_case:
+            return ids_by_lower_name.get(name.strip().lower())
+        return ids_by_name.get(name)
+
+    def get_name(self, db: Session, category_id: int):
+        """Get the name of the category with the id, or None when there is no such category"""
+        names_by_id, _, _ = self._load(db)
+        return names_by_id.get(category_id)
+
+    def get_names(self, db: Session) -> dict:
+        """Get a copy of every category name keyed by its id"""
+        names_by_id, _, _ = self._load(db)
+        return dict(names_by_id)
+
+
+def get_category_cache(db: Session) -> CategoryCache:
+    """Get the category cache shared by every session on the same engine as db"""
+    bind = db.get_bind()
+    with _caches_lock:
+        cache = _caches.get(bind)
+        if cache is None:
+            cache = CategoryCache()
+            _caches[bind] = cache
+        return cache
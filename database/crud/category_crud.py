@@ -1,5 +1,8 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from database.db_config import commit_or_flush
 from database.models.category_model import Category
+from database.crud.category_cache import get_category_cache
 from typing import Optional, List
 
 class CategoryCrud:
@@ -22,14 +25,24 @@ class CategoryCrud:
 
     def __init__(self, db: Session):
         self._db = db
+        self._cache = get_category_cache(db)
     def initialize_categories(self) -> None:
         """Initialize the categories if they dont exist in the category databse"""
-        for category_name in self.CATEGORIES:
-            exists = self._db.query(Category).filter(Category.name == category_name).first()
-            if not exists:
-                category = Category(name=category_name)
-                self._db.add(category)
-        self._db.commit()
+        # one insert for all of them, the names that already exist are skipped by their unique constraint
+        self._db.execute(
+            insert(Category).prefix_with("OR IGNORE").values([{"name": category_name} for category_name in self.CATEGORIES])
+        )
+        commit_or_flush(self._db)
+        self._cache.invalidate()
+
+    def add_category(self, name: str) -> Category:
+        """Add a new category"""
+        category = Category(name=name)
+        self._db.add(category)
+        commit_or_flush(self._db)
+        self._db.refresh(category)
+        self._cache.invalidate()
+        return category
 
 
     def get_category_by_id(self, id: int) -> Category:
@@ -43,3 +56,15 @@ class CategoryCrud:
     def get_all_categories(self) -> Category:
         """Get all the categories"""
         return self._db.query(Category).all()
+
+    def get_category_id(self, name: str, ignore_case: bool = False) -> Optional[int]:
+        """Get the id of the category with the name from the cache instead of the database"""
+        return self._cache.get_id(self._db, name, ignore_case)
+
+    def get_category_name(self, id: int) -> Optional[str]:
+        """Get the name of the category with the id from the cache instead of the database"""
+        return self._cache.get_name(self._db, id)
+
+    def get_category_names(self) -> dict:
+        """Get every category name keyed by its id from the cache instead of the database"""
+        return self._cache.get_names(self._db)
@@ -1,9 +1,22 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from database.db_config import commit_or_flush, rollback_write
+from database.crud import IN_CHUNK_SIZE
 from database.models.goal_model import Goal
 from datetime import date, datetime
+
+# the outcome of each id passed to the bulk goal operations
+GOAL_UPDATED = "updated"
+GOAL_SKIPPED = "skipped"
+GOAL_NOT_FOUND = "not_found"
+
+GOAL_ID_CHUNK_SIZE = IN_CHUNK_SIZE
+
 class GoalCrud:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, expire_on_read: bool = True):
         self._db = db
+        # when a periodic sweep completes the expired goals the listings don't need to do it before every read
+        self.expire_on_read = expire_on_read
 
     """Create a new goal for the user"""
     def create_goal(self, user_id: int, goal_description: str, goal_amount: float, current_amount: float = 0.0, start_date: date = None, end_date: date = None) -> Goal:
@@ -20,14 +33,25 @@ class GoalCrud:
             end_date = end_date
         )
         self._db.add(goal)
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(goal)
         return goal
+    # the callers commit the goal after changing it so this only has to set the status
     def _auto_complete_goal(self, goal: Goal) -> None:
         if goal and goal.end_date and date.today() >= goal.end_date and goal.status != "completed":
             goal.status = "completed"
-            self._db.commit()
-            self._db.refresh(goal)
+
+    """Complete every goal that reached its end date in one UPDATE, for the user or for every user, and return how many"""
+    def expire_goals(self, user_id: int = None, today: date = None) -> int:
+        if today is None:
+            today = date.today()
+        statement = update(Goal).where(Goal.end_date <= today, Goal.status != "completed").values(status="completed")
+        if user_id is not None:
+            statement = statement.where(Goal.user_id == user_id)
+        expired_count = self._db.execute(statement).rowcount
+        if expired_count:
+            commit_or_flush(self._db)
+        return expired_count
 
     """get the goal based on its ID for the user"""
     def get_goal_by_id(self, goal_id: int, user_id: int) -> Goal:
@@ -35,28 +59,32 @@ class GoalCrud:
 
     """Get all the goals for the user"""
     def get_goals_by_user(self, user_id: int) -> list[Goal]:
-        goals = self._db.query(Goal).filter(Goal.user_id == user_id).all()
-        for goal in goals:
-            self._auto_complete_goal(goal)
-        return goals
+        if self.expire_on_read:
+            self.expire_goals(user_id)
+        return self._db.query(Goal).filter(Goal.user_id == user_id).all()
 
     """Get all the current goals for the user"""
     def get_current_goals_by_user(self, user_id: int) -> list[Goal]:
-        goals = self._db.query(Goal).filter(Goal.user_id == user_id, Goal.status == 'current').all()
-        current_goals = []
-        for goal in goals:
-            self._auto_complete_goal(goal)
-            # Only include goals that are still current after auto-complete check
-            if goal.status == 'current':
-                current_goals.append(goal)
-        return current_goals
+        # expiring first means every goal that is still current after the update is really current
+        if self.expire_on_read:
+            self.expire_goals(user_id)
+        return self._db.query(Goal).filter(Goal.user_id == user_id, Goal.status == 'current').all()
 
     """Get all the completed goals for the user"""
     def get_completed_goals_by_user(self, user_id: int) -> list[Goal]:
-        goals = self._db.query(Goal).filter(Goal.user_id == user_id, Goal.status == 'completed').all()
-        for goal in goals:
-            self._auto_complete_goal(goal)
-        return goals
+        if self.expire_on_read:
+            self.expire_goals(user_id)
+        return self._db.query(Goal).filter(Goal.user_id == user_id, Goal.status == 'completed').all()
+
+    """Get the user's goals, or only the ones with the status, each with its completion percentage from the same SELECT"""
+    def get_goals_with_progress(self, user_id: int, status: str = None) -> list[tuple[Goal, float]]:
+        if self.expire_on_read:
+            self.expire_goals(user_id)
+        progress = (Goal.current_amount * 100.0 / Goal.target_amount).label("progress_percentage")
+        query = self._db.query(Goal, progress).filter(Goal.user_id == user_id)
+        if status is not None:
+            query = query.filter(Goal.status == status)
+        return [(goal, percentage or 0.0) for goal, percentage in query.order_by(Goal.id).all()]
 
     #NOTE: might not use since I'm not sure if there will be time to implement this
     """Update the goal's information if the user wants to change it after creating it"""
@@ -71,7 +99,7 @@ class GoalCrud:
         if current_amount is not None:
             goal.current_amount = current_amount
         self._auto_complete_goal(goal)
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(goal)
         return goal
 
@@ -82,7 +110,7 @@ class GoalCrud:
             return None
         goal.current_amount += amount_to_add
         self._auto_complete_goal(goal)
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(goal)
         return goal
 
@@ -92,7 +120,7 @@ class GoalCrud:
         if not goal:
             return None
         goal.status = "completed"
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(goal)
         return goal
 
@@ -102,7 +130,7 @@ class GoalCrud:
         if not goal:
             return None
         goal.status = "current"
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(goal)
         return goal
 
@@ -112,7 +140,7 @@ class GoalCrud:
         if not goal:
             return False
         self._db.delete(goal)
-        self._db.commit()
+        commit_or_flush(self._db)
         return True
 
     """Get the completion percentage of a goal for the user"""
@@ -121,4 +149,69 @@ class GoalCrud:
         if not goal:
             return 0.0
         percentage = (goal.current_amount / goal.target_amount) * 100
-        return percentage
\ No newline at end of file
+        return percentage
+
+    """Run the UPDATE or DELETE ... RETURNING id for every chunk of the ids and return the ids it changed"""
+    def _run_for_ids(self, goal_ids: list[int], make_statement) -> set[int]:
+        changed_ids = set()
+        for start in range(0, len(goal_ids), GOAL_ID_CHUNK_SIZE):
+            chunk = goal_ids[start:start + GOAL_ID_CHUNK_SIZE]
+            changed_ids.update(self._db.scalars(make_statement(chunk)).all())
+        return changed_ids
+
+    """Tell apart the ids that were left alone because the goal did not qualify from the ones that don't exist"""
+    def _get_outcomes(self, user_id: int, goal_ids: list[int], changed_ids: set[int]) -> dict[int, str]:
+        unchanged_ids = [goal_id for goal_id in goal_ids if goal_id not in changed_ids]
+        existing_ids = set()
+        for start in range(0, len(unchanged_ids), GOAL_ID_CHUNK_SIZE):
+            chunk = unchanged_ids[start:start + GOAL_ID_CHUNK_SIZE]
+            existing_ids.update(self._db.scalars(select(Goal.id).where(Goal.user_id == user_id, Goal.id.in_(chunk))).all())
+        outcomes = {}
+        for goal_id in goal_ids:
+            if goal_id in changed_ids:
+                outcomes[goal_id] = GOAL_UPDATED
+            elif goal_id in existing_ids:
+                outcomes[goal_id] = GOAL_SKIPPED
+            else:
+                outcomes[goal_id] = GOAL_NOT_FOUND
+        return outcomes
+
+    """Run a bulk goal operation in one commit and return the outcome of every id"""
+    def _bulk_goal_operation(self, user_id: int, goal_ids: list[int], make_statement) -> dict[int, str]:
+        goal_ids = list(dict.fromkeys(goal_ids))
+        if not goal_ids:
+            return {}
+        try:
+            changed_ids = self._run_for_ids(goal_ids, make_statement)
+            commit_or_flush(self._db)
+        except Exception:
+            rollback_write(self._db)
+            raise
+        return self._get_outcomes(user_id, goal_ids, changed_ids)
+
+    """Mark the user's goals as completed"""
+    def mark_goals_completed(self, user_id: int, goal_ids: list[int]) -> dict[int, str]:
+        return self._bulk_goal_operation(user_id, goal_ids, lambda chunk: update(Goal).where(
+            Goal.user_id == user_id, Goal.id.in_(chunk)
+        ).values(status="completed").returning(Goal.id))
+
+    """Delete the user's goals"""
+    def delete_goals(self, user_id: int, goal_ids: list[int]) -> dict[int, str]:
+        return self._bulk_goal_operation(user_id, goal_ids, lambda chunk: delete(Goal).where(
+            Goal.user_id == user_id, Goal.id.in_(chunk)
+        ).returning(Goal.id))
+
+    """Add an amount to the user's current goals, skipping the goals that are completed or past their end date"""
+    def add_progress(self, user_id: int, goal_ids: list[int], amount_to_add: float) -> dict[int, str]:
+        today = date.today()
+        return self._bulk_goal_operation(user_id, goal_ids, lambda chunk: update(Goal).where(
+            Goal.user_id == user_id, Goal.id.in_(chunk), Goal.status == "current", Goal.end_date > today
+        ).values(current_amount=Goal.current_amount + amount_to_add).returning(Goal.id))
+
+    """Mark the user's completed goals as current again, skipping the goals that are past their end date"""
+    def reactivate_goals(self, user_id: int, goal_ids: list[int]) -> dict[int, str]:
+        today = date.today()
+        return self._bulk_goal_operation(user_id, goal_ids, lambda chunk: update(Goal).where(
+            Goal.user_id == user_id, Goal.id.in_(chunk), Goal.status == "completed", Goal.end_date > today
+        ).values(status="current").returning(Goal.id))
+
@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from database.crud import IN_CHUNK_SIZE
+from database.models.imported_line_model import ImportedLine
+
+class ImportCrud:
+    def __init__(self, db: Session):
+        self._db = db
+
+    def get_imported_fingerprints(self, user_id: int, fingerprints: list[str]) -> set[str]:
+        """Get which of the fingerprints have already been imported for the user"""
+        imported = set()
+        for start in range(0, len(fingerprints), IN_CHUNK_SIZE):
+            rows = self._db.query(ImportedLine.fingerprint).filter(
+                ImportedLine.user_id == user_id,
+                ImportedLine.fingerprint.in_(fingerprints[start:start + IN_CHUNK_SIZE])
+            )
+            imported.update(fingerprint for fingerprint, in rows)
+        return imported
+
+    def add_fingerprints(self, user_id: int, fingerprints: list[str]) -> None:
+        """Record the imported fingerprints without committing so they are saved together with their transactions"""
+        rows = [{"user_id": user_id, "fingerprint": fingerprint} for fingerprint in fingerprints]
+        if rows:
+            self._db.execute(insert(ImportedLine), rows)
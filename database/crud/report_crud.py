@@ -0,0 +1,133 @@
+from sqlalchemy.orm import Session
+from database.crud.rollup_crud import RollupCrud
+from datetime import date as date_type, datetime, timedelta, timezone
+
+
+def get_day_range(date: datetime) -> tuple[datetime, datetime]:
+    """Get the start and end of the day from 00:00:00 to 23:59:59"""
+    start_of_day = datetime(date.year, date.month, date.day, 0, 0, 0, tzinfo=timezone.utc)
+    end_of_day = start_of_day + timedelta(days=1) - timedelta(seconds=1)
+    return start_of_day, end_of_day
+
+
+def get_week_range(date: datetime) -> tuple[datetime, datetime]:
+    """Get the start of the week on Monday 00:00:00 and the end of the week on Sunday 23:59:59"""
+    start_of_week = date - timedelta(days=date.weekday())
+    start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_week = start_of_week + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    return start_of_week, end_of_week
+
+
+def get_month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    """Get the first day of the month at 00:00:00 and the last day of the month at 23:59:59"""
+    start_of_month = datetime(year, month, 1, tzinfo=timezone.utc)
+    # NOTE: If the month is 12, then the end of the month will be (year)-12-31 23:59:59
+    if month == 12:
+        end_of_month = datetime(year + 1, 1, 1, tzinfo=timezone.utc) - timedelta(seconds=1)
+    else:
+        end_of_month = datetime(year, month + 1, 1, tzinfo=timezone.utc) - timedelta(seconds=1)
+    return start_of_month, end_of_month
+
+
+class ReportCrud:
+    """Build the income, expense, net balance and by-category totals for report periods.
+
+    Every total a report needs comes out of one query grouped by type and category, instead of
+    a separate query for each total and each by-category breakdown. Reports over whole days read
+    the daily rollups, so they cost the same no matter how much history the user has.
+    """
+
+    def __init__(self, db: Session):
+        self._db = db
+        self._rollup_crud = RollupCrud(db)
+
+    def _empty_totals(self) -> dict:
+        return {
+            "income": 0.0,
+            "expenses": 0.0,
+            "net_balance": 0.0,
+            "expenses_by_category": {},
+            "income_by_category": {}
+        }
+
+    def _add_to_totals(self, totals: dict, transaction_type: str, category_name: str, amount: float) -> None:
+        """Add one grouped row to the totals of a report"""
+        # the amounts are whole cents, rounding keeps adding their float dollars from drifting off the cent
+        if transaction_type == "income":
+            totals["income"] = round(totals["income"] + amount, 2)
+            by_category = totals["income_by_category"]
+        elif transaction_type == "expense":
+            totals["expenses"] = round(totals["expenses"] + amount, 2)
+            by_category = totals["expenses_by_category"]
+        else:
+            return
+        totals["net_balance"] = round(totals["income"] - totals["expenses"], 2)
+        # transactions without a category count towards the totals but not towards the breakdown
+        if category_name is not None:
+            by_category[category_name] = round(by_category.get(category_name, 0.0) + amount, 2)
+
+    def _build_reports(self, user_id: int, periods: list) -> None:
+        """Add the user's daily rollups to every (report, start day, end day) period that they fall in"""
+        start_day = min(period_start for _, period_start, _ in periods)
+        end_day = max(period_end for _, _, period_end in periods)
+        for day, transaction_type, category_name, amount in self._rollup_crud.get_day_totals(user_id, start_day, end_day):
+            for report, period_start, period_end in periods:
+                if period_start <= day <= period_end:
+                    self._add_to_totals(report, transaction_type, category_name, float(amount or 0.0))
+
+    def get_custom_report(self, user_id: int, start_day: date_type, end_day: date_type) -> dict:
+        """Get the report for every whole day from the start day to the end day"""
+        report = {"start_date": start_day, "end_date": end_day, **self._empty_totals()}
+        self._build_reports(user_id, [(report, start_day, end_day)])
+        return report
+
+    def get_daily_report(self, user_id: int, date: datetime = None) -> dict:
+        """Get the daily report based on the user id and the date"""
+        if not date:
+            date = datetime.now(timezone.utc)
+        start_of_day, end_of_day = get_day_range(date)
+        report = {"date": date.date(), **self._empty_totals()}
+        self._build_reports(user_id, [(report, start_of_day.date(), end_of_day.date())])
+        return report
+
+    def get_weekly_report(self, user_id: int, date: datetime = None) -> dict:
+        """Get the weekly report based on the user id and the date"""
+        if not date:
+            date = datetime.now(timezone.utc)
+        start_of_week, end_of_week = get_week_range(date)
+        report = {"week_start": start_of_week.date(), "week_end": end_of_week.date(), **self._empty_totals()}
+        self._build_reports(user_id, [(report, start_of_week.date(), end_of_week.date())])
+        return report
+
+    def get_monthly_report(self, user_id: int, year: int = None, month: int = None) -> dict:
+        """Get the monthly report based on the user id and the year and the month"""
+        if not year or not month:
+            now = datetime.now(timezone.utc)
+            year = now.year
+            month = now.month
+        start_of_month, end_of_month = get_month_range(year, month)
+        report = {"year": year, "month": month, **self._empty_totals()}
+        self._build_reports(user_id, [(report, start_of_month.date(), end_of_month.date())])
+        return report
+
+    def get_dashboard_reports(self, user_id: int, date: datetime = None) -> dict:
+        """Get the daily, weekly and monthly reports for the date with one read of the rollups around it.
+
+        Each rollup row is added to every report period that its day falls in. The week can cross
+        into the previous or next month, so the days read are stretched to cover the whole week too.
+        """
+        if not date:
+            date = datetime.now(timezone.utc)
+        start_of_day, end_of_day = get_day_range(date)
+        start_of_week, end_of_week = get_week_range(date)
+        start_of_month, end_of_month = get_month_range(date.year, date.month)
+
+        daily = {"date": date.date(), **self._empty_totals()}
+        weekly = {"week_start": start_of_week.date(), "week_end": end_of_week.date(), **self._empty_totals()}
+        monthly = {"year": date.year, "month": date.month, **self._empty_totals()}
+        self._build_reports(user_id, [
+            (daily, start_of_day.date(), end_of_day.date()),
+            (weekly, start_of_week.date(), end_of_week.date()),
+            (monthly, start_of_month.date(), end_of_month.date())
+        ])
+        return {"daily": daily, "weekly": weekly, "monthly": monthly}
@@ -0,0 +1,159 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Integer, func, select, delete, insert, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.db_config import commit_or_flush
+from database.models.daily_rollup_model import DailyRollup, NO_CATEGORY_ID
+from database.models.transaction_model import Transaction
+from database.models.category_model import Category
+from database.models.money import to_cents
+from datetime import date, datetime
+
+class RollupCrud:
+    """Keep the daily_rollups table in step with the transactions table.
+
+    The write methods only stage their changes on the session. The caller commits them together
+    with the transaction change so the rollups and the raw rows are saved in the same commit.
+    """
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def _get_day(self, created_on: datetime) -> date:
+        # the day matches what SQLite's date() gives for the stored created_on so rebuilds agree with it
+        if isinstance(created_on, datetime):
+            return created_on.date()
+        return created_on
+
+    def apply_change(self, user_id: int, created_on: datetime, type: str, category_id: int, amount: float,
+                     count: int = 1) -> None:
+        """Add a transaction to its rollup row, or take it away when the amount and count are negative"""
+        self.apply_changes({(user_id, self._get_day(created_on), type, category_id): (to_cents(amount), count)})
+
+    def apply_changes(self, changes: dict) -> None:
+        """Add the (total in cents, count) changes keyed by (user_id, day, type, category_id) to the rollup rows"""
+        rows = []
+        for (user_id, day, type, category_id), (cents, count) in changes.items():
+            rows.append({
+                "user_id": user_id,
+                "day": self._get_day(day),
+                "type": type,
+                "category_id": category_id if category_id is not None else NO_CATEGORY_ID,
+                "total": cents,
+                "count": count
+            })
+        if not rows:
+            return
+        # one upsert statement run with every row so a large batch does not cost a round trip per day
+        # the totals are summed as whole cents by the caller, so they are bound as integers and not as dollars
+        statement = sqlite_insert(DailyRollup).values(
+            user_id=bindparam("user_id"),
+            day=bindparam("day"),
+            type=bindparam("type"),
+            category_id=bindparam("category_id"),
+            total=bindparam("total", type_=Integer),
+            count=bindparam("count")
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[DailyRollup.user_id, DailyRollup.day, DailyRollup.type, DailyRollup.category_id],
+            set_={
+                "total": DailyRollup.total + statement.excluded.total,
+                "count": DailyRollup.count + statement.excluded.count
+            }
+        )
+        self._db.execute(statement, rows)
+        # a day with no transactions left should not keep an empty row around
+        removed_rows = [row for row in rows if row["count"] < 0]
+        if removed_rows:
+            # the session has no bulk delete by parameters so this one goes through the session's connection
+            self._db.connection().execute(delete(DailyRollup).where(
+                DailyRollup.user_id == bindparam("user_id"),
+                DailyRollup.day == bindparam("day"),
+                DailyRollup.type == bindparam("type"),
+                DailyRollup.category_id == bindparam("category_id"),
+                DailyRollup.count <= 0
+            ), [{key: row[key] for key in ("user_id", "day", "type", "category_id")} for row in removed_rows])
+
+    def delete_user_rollups(self, user_id: int) -> None:
+        """Remove all the rollup rows for the user"""
+        self._db.execute(delete(DailyRollup).where(DailyRollup.user_id == user_id))
+
+    def get_day_totals(self, user_id: int, start_day: date, end_day: date) -> list:
+        """Get the (day, type, category name, total) rollup rows for the user between two days"""
+        query = self._db.query(
+            DailyRollup.day,
+            DailyRollup.type,
+            Category.name,
+            DailyRollup.total
+        ).outerjoin(Category, DailyRollup.category_id == Category.id).filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.day >= start_day,
+            DailyRollup.day <= end_day
+        )
+        return query.all()
+
+    def _raw_totals_query(self, user_id: int = None):
+        """Group the raw transactions the same way the rollups are kept"""
+        day = func.date(Transaction.created_on)
+        category_id = func.coalesce(Transaction.category_id, NO_CATEGORY_ID)
+        query = select(
+            Transaction.user_id,
+            day,
+            Transaction.type,
+            category_id,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).where(Transaction.created_on.is_not(None)).group_by(Transaction.user_id, day, Transaction.type, category_id)
+        if user_id is not None:
+            query = query.where(Transaction.user_id == user_id)
+        return query
+
+    def rebuild(self, user_id: int = None) -> int:
+        """Recompute the rollups from the raw transactions for one user or everyone and return the row count"""
+        remove_rollups = delete(DailyRollup)
+        if user_id is not None:
+            remove_rollups = remove_rollups.where(DailyRollup.user_id == user_id)
+        self._db.execute(remove_rollups)
+        result = self._db.execute(insert(DailyRollup).from_select(
+            ["user_id", "day", "type", "category_id", "total", "count"],
+            self._raw_totals_query(user_id)
+        ))
+        commit_or_flush(self._db)
+        return result.rowcount
+
+    def verify(self, user_id: int = None) -> list[dict]:
+        """Compare the rollups with the raw transactions and return every row that has drifted"""
+        expected = {}
+        for row_user_id, day, type, category_id, total, count in self._db.execute(self._raw_totals_query(user_id)):
+            expected[(row_user_id, date.fromisoformat(day), type, category_id)] = (total or 0.0, count)
+
+        rollups = self._db.query(DailyRollup)
+        if user_id is not None:
+            rollups = rollups.filter(DailyRollup.user_id == user_id)
+        actual = {}
+        for rollup in rollups:
+            actual[(rollup.user_id, rollup.day, rollup.type, rollup.category_id)] = (rollup.total, rollup.count)
+
+        drift = []
+        for key in sorted(set(expected) | set(actual), key=str):
+            expected_total, expected_count = expected.get(key, (0.0, 0))
+            actual_total, actual_count = actual.get(key, (0.0, 0))
+            # the amounts are whole cents, so any difference at all is drift
+            if expected_count != actual_count or to_cents(expected_total) != to_cents(actual_total):
+                drift.append({
+                    "user_id": key[0],
+                    "day": key[1],
+                    "type": key[2],
+                    "category_id": key[3],
+                    "expected_total": expected_total,
+                    "actual_total": actual_total,
+                    "expected_count": expected_count,
+                    "actual_count": actual_count
+                })
+        return drift
+
+    def needs_rebuild(self) -> bool:
+        """Check whether there are transactions but no rollups yet, like in a database made before the rollups"""
+        has_rollups = self._db.query(DailyRollup.user_id).first() is not None
+        if has_rollups:
+            return False
+        return self._db.query(Transaction.id).first() is not None
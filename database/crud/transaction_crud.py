@@ -1,52 +1,208 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from database.crud import IN_CHUNK_SIZE
 from database.models.transaction_model import Transaction
 from database.models.category_model import Category
-from datetime import datetime, timedelta, timezone
-from sqlalchemy import func
+from database.models.money import to_cents
+from database.crud.report_crud import ReportCrud
+from database.crud.rollup_crud import RollupCrud
+from datetime import date, datetime, timezone
+from sqlalchemy import delete, func, insert, select, tuple_
+from database.db_config import commit_or_flush, rollback_write
+
+# the id breaks ties between transactions created at the same moment so the order is always the same
+TRANSACTION_ORDERS = {
+    "newest": (Transaction.created_on.desc(), Transaction.id.desc()),
+    "oldest": (Transaction.created_on.asc(), Transaction.id.asc())
+}
+
+DELETE_CHUNK_SIZE = IN_CHUNK_SIZE
 
 class TransactionCrud:
     def __init__(self, db: Session):
         self._db = db
+        self._report_crud = ReportCrud(db)
+        self._rollup_crud = RollupCrud(db)
 
-    def create_transaction(self, user_id: int, category_id: int, amount: float, type: str,description: str = None) -> Transaction:
+    def create_transaction(self, user_id: int, category_id: int, amount: float, type: str,description: str = None, created_on: datetime = None) -> Transaction:
         transaction = Transaction(user_id=user_id, category_id=category_id, amount=amount, type=type, description=description)
+        if created_on is not None:
+            transaction.created_on = created_on
         self._db.add(transaction)
-        self._db.commit()
+        # flush first so created_on has its default and the rollup is saved in the same commit
+        self._db.flush()
+        self._rollup_crud.apply_change(user_id, transaction.created_on, type, category_id, amount)
+        commit_or_flush(self._db)
         self._db.refresh(transaction)
         return transaction
 
+    def create_transactions_bulk(self, transactions, batch_size: int = 1000) -> list[int]:
+        """Insert many transactions with one executemany and one commit per batch and return their new ids.
+
+        Each transaction is a dict with user_id, category_id, amount, type and optionally description
+        and created_on. Any iterable works, so rows can be streamed in without building one big list.
+        No ORM objects are made or refreshed, and the rollups for each batch are updated in the same
+        commit as its rows.
+        """
+        ids = []
+        batch = []
+        for transaction in transactions:
+            batch.append(transaction)
+            if len(batch) >= batch_size:
+                ids.extend(self._insert_batch(batch))
+                batch = []
+        if batch:
+            ids.extend(self._insert_batch(batch))
+        return ids
+
+    def _insert_batch(self, transactions: list[dict]) -> list[int]:
+        """Insert one batch of transactions and their rollup changes in a single commit"""
+        now = datetime.now(timezone.utc)
+        rows = []
+        rollup_changes = {}
+        for transaction in transactions:
+            row = {
+                "user_id": transaction["user_id"],
+                "category_id": transaction.get("category_id"),
+                "amount": transaction["amount"],
+                "type": transaction["type"],
+                "description": transaction.get("description"),
+                # fill in created_on here instead of the column default so the rollup day is known
+                "created_on": transaction.get("created_on") or now
+            }
+            rows.append(row)
+            key = (row["user_id"], row["created_on"].date(), row["type"], row["category_id"])
+            cents, count = rollup_changes.get(key, (0, 0))
+            rollup_changes[key] = (cents + to_cents(row["amount"]), count + 1)
+        statement = insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True)
+        try:
+            ids = self._db.execute(statement, rows).scalars().all()
+            self._rollup_crud.apply_changes(rollup_changes)
+            commit_or_flush(self._db)
+        except Exception:
+            rollback_write(self._db)
+            raise
+        return ids
+
 
     def get_transaction_by_id(self, transaction_id: int, user_id: int) -> Transaction:
         """Get the transaction based on the transaction id and the user id"""
         return self._db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
 
 
-    def get_transaction_by_user(self, user_id: int) -> Transaction:
+    def _with_category(self, query, with_category: bool):
+        """Load each transaction's category in the same statement so reading transaction.category.name
+        while listing them does not run another SELECT for every category"""
+        if with_category:
+            return query.options(joinedload(Transaction.category))
+        return query
+
+
+    def get_transaction_by_user(self, user_id: int, with_category: bool = False) -> Transaction:
         """Get all the transactions based on the user id"""
-        return self._db.query(Transaction).filter(Transaction.user_id == user_id).all()
+        query = self._db.query(Transaction).filter(Transaction.user_id == user_id)
+        return self._with_category(query, with_category).all()
 
 
-    def get_transaction_by_type(self, user_id: int, type: str) -> Transaction:
+    def get_transaction_by_type(self, user_id: int, type: str, with_category: bool = False) -> Transaction:
         """Get the transactions based on the type and the user id"""
-        return self._db.query(Transaction).filter(Transaction.type == type, Transaction.user_id == user_id).order_by(
-            Transaction.created_on.desc()).all()
+        query = self._db.query(Transaction).filter(Transaction.type == type, Transaction.user_id == user_id)
+        return self._with_category(query, with_category).order_by(Transaction.created_on.desc()).all()
 
 
-    def get_transaction_by_category(self, user_id: int, category_id: int) -> Transaction:
+    def get_transaction_by_category(self, user_id: int, category_id: int, with_category: bool = False) -> Transaction:
         """Get the transactions based on the category and the user id"""
-        return self._db.query(Transaction).filter(Transaction.user_id == user_id,
-                                            Transaction.category_id == category_id).order_by(
-            Transaction.created_on.desc()).all()
+        query = self._db.query(Transaction).filter(Transaction.user_id == user_id,
+                                                   Transaction.category_id == category_id)
+        return self._with_category(query, with_category).order_by(Transaction.created_on.desc()).all()
 
 
-    def get_transaction_by_date(self, user_id: int, start_date: datetime = None, end_date: datetime = None) -> Transaction:
+    def get_transaction_by_date(self, user_id: int, start_date: datetime = None, end_date: datetime = None,
+                                with_category: bool = False) -> Transaction:
         """Get the transactions based on the date and the user id"""
         query = self._db.query(Transaction).filter(Transaction.user_id == user_id)
         if start_date:
             query = query.filter(Transaction.created_on >= start_date)
         if end_date:
             query = query.filter(Transaction.created_on <= end_date)
-        return query.order_by(Transaction.created_on.desc()).all()
+        return self._with_category(query, with_category).order_by(Transaction.created_on.desc()).all()
+
+
+    def _filter_transactions(self, query, user_id: int, type: str = None, category_id: int = None,
+                             start_date: datetime = None, end_date: datetime = None):
+        """Add the user, type, category and date range filters to a query so they all run in one statement"""
+        query = query.where(Transaction.user_id == user_id)
+        if type:
+            query = query.where(Transaction.type == type)
+        if category_id:
+            query = query.where(Transaction.category_id == category_id)
+        if start_date:
+            query = query.where(Transaction.created_on >= start_date)
+        if end_date:
+            query = query.where(Transaction.created_on <= end_date)
+        return query
+
+
+    def query_transactions(self, user_id: int, type: str = None, category_id: int = None, start_date: datetime = None,
+                           end_date: datetime = None, order: str = "newest",
+                           with_category: bool = False) -> list[Transaction]:
+        """Get the user's transactions matching any combination of type, category and date range.
+
+        All the filters go into a single statement that is answered from the user's indexes, and the
+        order is either "newest" or "oldest" first. with_category joins in each transaction's category.
+        """
+        if order not in TRANSACTION_ORDERS:
+            raise ValueError(f"Order must be one of {', '.join(TRANSACTION_ORDERS)}")
+        query = self._filter_transactions(select(Transaction), user_id, type, category_id, start_date, end_date)
+        query = self._with_category(query, with_category)
+        return self._db.scalars(query.order_by(*TRANSACTION_ORDERS[order])).all()
+
+
+    def get_transactions_page(self, user_id: int, type: str = None, category_id: int = None,
+                              start_date: datetime = None, end_date: datetime = None, after: tuple = None,
+                              limit: int = 100, with_category: bool = False) -> tuple[list[Transaction], tuple]:
+        """Get one page of the user's transactions newest first, continuing after the (created_on, id) key.
+
+        The page starts right after the key of the last row of the previous page instead of using an
+        offset, so every page is one index search no matter how deep into the history it is. Returns
+        the page and the key to pass as after for the next page, which is None on the last page.
+        with_category joins in each transaction's category so rendering the page is still one statement.
+        """
+        query = self._filter_transactions(select(Transaction), user_id, type, category_id, start_date, end_date)
+        query = self._with_category(query, with_category)
+        if after is not None:
+            query = query.where(tuple_(Transaction.created_on, Transaction.id) < tuple_(*after))
+        # fetch one row more than the page to know whether there is another page after it
+        transactions = self._db.scalars(query.order_by(*TRANSACTION_ORDERS["newest"]).limit(limit + 1)).all()
+        if len(transactions) <= limit:
+            return transactions, None
+        transactions = transactions[:limit]
+        last_transaction = transactions[-1]
+        return transactions, (last_transaction.created_on, last_transaction.id)
+
+
+    def iter_transactions(self, user_id: int, type: str = None, category_id: int = None, start_date: datetime = None,
+                          end_date: datetime = None, batch_size: int = 1000):
+        """Stream the user's transactions, oldest first, as plain rows with the category name.
+
+        The rows are fetched batch_size at a time from a server-side cursor and no ORM objects are
+        kept in the session, so memory stays the same no matter how long the history is.
+        """
+        query = select(
+            Transaction.id,
+            Transaction.created_on,
+            Transaction.type,
+            Category.name.label("category"),
+            Transaction.amount,
+            Transaction.description
+        ).outerjoin(Category, Transaction.category_id == Category.id)
+        query = self._filter_transactions(query, user_id, type, category_id, start_date, end_date)
+        query = query.order_by(*TRANSACTION_ORDERS["oldest"])
+        result = self._db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+        try:
+            for row in result:
+                yield row
+        finally:
+            result.close()
 
 
     def update_transaction(self, transaction_id: int, user_id: int, amount: float = None, type: str = None, description: str = None) -> Transaction:
@@ -54,13 +210,18 @@ class TransactionCrud:
         transaction = self.get_transaction_by_id(transaction_id, user_id)
         if not transaction:
             return None
+        # take the old amount out of its rollup and then add the new amount to the rollup it moves to
+        self._rollup_crud.apply_change(user_id, transaction.created_on, transaction.type, transaction.category_id,
+                                       -transaction.amount, -1)
         if amount is not None:
             transaction.amount = amount
         if type is not None:
             transaction.type = type
         if description is not None:
             transaction.description = description
-        self._db.commit()
+        self._rollup_crud.apply_change(user_id, transaction.created_on, transaction.type, transaction.category_id,
+                                       transaction.amount)
+        commit_or_flush(self._db)
         self._db.refresh(transaction)
         return transaction
 
@@ -71,11 +232,41 @@ class TransactionCrud:
         transaction = self.get_transaction_by_id(transaction_id, user_id)
         if not transaction:
             return False
+        self._rollup_crud.apply_change(user_id, transaction.created_on, transaction.type, transaction.category_id,
+                                       -transaction.amount, -1)
         self._db.delete(transaction)
-        self._db.commit()
+        commit_or_flush(self._db)
         return True
 
 
+    def delete_transactions(self, user_id: int, transaction_ids: list[int]) -> tuple[int, list[int]]:
+        """Delete many of the user's transactions in one commit and return how many were deleted and the missing ids.
+
+        Each chunk of ids is one DELETE ... RETURNING, and the returned rows are taken out of the
+        rollups in the same commit, so nothing has to be selected or loaded first.
+        """
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        deleted_ids = set()
+        rollup_changes = {}
+        try:
+            for start in range(0, len(transaction_ids), DELETE_CHUNK_SIZE):
+                chunk = transaction_ids[start:start + DELETE_CHUNK_SIZE]
+                statement = delete(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(chunk)).returning(
+                    Transaction.id, Transaction.created_on, Transaction.type, Transaction.category_id, Transaction.amount)
+                for transaction_id, created_on, type, category_id, amount in self._db.execute(statement):
+                    deleted_ids.add(transaction_id)
+                    key = (user_id, created_on.date(), type, category_id)
+                    cents, count = rollup_changes.get(key, (0, 0))
+                    rollup_changes[key] = (cents - to_cents(amount), count - 1)
+            self._rollup_crud.apply_changes(rollup_changes)
+            commit_or_flush(self._db)
+        except Exception:
+            rollback_write(self._db)
+            raise
+        missing_ids = [transaction_id for transaction_id in transaction_ids if transaction_id not in deleted_ids]
+        return len(deleted_ids), missing_ids
+
+
     def get_total_transaction_by_type(self, user_id: int, transaction_type: str, startdate: datetime, enddate: datetime) -> float:
         """Get the total transaction by either "income" or "expense" and optionally filter within a date range"""
         total_transaction = self._db.query(func.sum(Transaction.amount)).filter(
@@ -146,70 +337,24 @@ class TransactionCrud:
 
     def get_daily_report(self, user_id: int, date: datetime = None) -> dict:
         """Get the daily report based on the user id and the date"""
-        if not date:
-            date = datetime.now(timezone.utc)
-
-        # get the start to end of day from 00:00:00 to 11:59:59
-        start_of_day = datetime(date.year, date.month, date.day, 0, 0, 0, tzinfo=timezone.utc)
-        end_of_day = start_of_day + timedelta(days=1) - timedelta(seconds=1)
-        return {
-            "date": date.date(),
-            "income": self.get_total_income(user_id, start_of_day, end_of_day),
-            "expenses": self.get_total_expenses(user_id, start_of_day, end_of_day),
-            "net_balance": self.get_net_balance(user_id, start_of_day, end_of_day),
-            "expenses_by_category": self.get_expense_by_category(user_id, start_of_day, end_of_day),
-            "income_by_category": self.get_income_by_category(user_id, start_of_day, end_of_day)
-        }
+        return self._report_crud.get_daily_report(user_id, date)
 
 
     def get_weekly_report(self, user_id: int, date: datetime = None) -> dict:
         """Get the weekly report based on the user id and the date"""
-        if not date:
-            date = datetime.now(timezone.utc)
+        return self._report_crud.get_weekly_report(user_id, date)
 
-        #get the start of the week on Monday 00:00:00
-        start_of_week = date - timedelta(days=date.weekday())
-        start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
 
-        #get hte end of the week on Sunday 23:59:59
-        end_of_week = start_of_week + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    def get_monthly_report(self, user_id: int, year: int = None, month: int = None) -> dict:
+        """Get the monthly report based on the user id and the year and the month"""
+        return self._report_crud.get_monthly_report(user_id, year, month)
 
-        return {
-            "week_start": start_of_week.date(),
-            "week_end": end_of_week.date(),
-            "income": self.get_total_income(user_id, start_of_week, end_of_week),
-            "expenses": self.get_total_expenses(user_id, start_of_week, end_of_week),
-            "net_balance": self.get_net_balance(user_id, start_of_week, end_of_week),
-            "expenses_by_category": self.get_expense_by_category(user_id, start_of_week, end_of_week),
-            "income_by_category": self.get_income_by_category(user_id, start_of_week, end_of_week)
 
-        }
+    def get_custom_report(self, user_id: int, start_date: date, end_date: date) -> dict:
+        """Get the report for every whole day from the start date to the end date"""
+        return self._report_crud.get_custom_report(user_id, start_date, end_date)
 
 
-    def get_monthly_report(self, user_id: int, year: int = None, month: int = None) -> dict:
-        """Get the monthly report based on the user id and the year and the month"""
-        if not year or not month:
-            now = datetime.now(timezone.utc)
-            year = now.year
-            month = now.month
-
-        #the first day of the month
-        start_of_month = datetime(year, month, 1, tzinfo=timezone.utc)
-
-        # End of the month on the last day
-        # NOTE: If the month is 12, then the end of the month will be (year)-12-31 23:59:59
-        if month == 12:
-            end_of_month = datetime(year + 1, 1, 1, tzinfo=timezone.utc) - timedelta(seconds=1)
-        else:
-            end_of_month = datetime(year, month + 1, 1, tzinfo=timezone.utc) - timedelta(seconds=1)
-
-        return {
-            "year": year,
-            "month": month,
-            "income": self.get_total_income(user_id, start_of_month, end_of_month),
-            "expenses": self.get_total_expenses(user_id, start_of_month, end_of_month),
-            "net_balance": self.get_net_balance(user_id, start_of_month, end_of_month),
-            "expenses_by_category": self.get_expense_by_category(user_id, start_of_month, end_of_month),
-            "income_by_category": self.get_income_by_category(user_id, start_of_month, end_of_month)
-
-        }
+    def get_dashboard_reports(self, user_id: int, date: datetime = None) -> dict:
+        """Get the daily, weekly and monthly reports together with one scan of the user's month"""
+        return self._report_crud.get_dashboard_reports(user_id, date)
@@ -1,34 +1,69 @@
 from sqlalchemy.orm import Session
+from database.db_config import read_int, commit_or_flush
 from database.models.user_model import User
+from database.crud.rollup_crud import RollupCrud
 from datetime import date
+import os
 import bcrypt
 
+DEFAULT_BCRYPT_ROUNDS = 12
+
+# the cost factors bcrypt.gensalt accepts
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
+
+
+def read_bcrypt_rounds(environ=os.environ) -> int:
+    """Read the cost factor from FINANCE_TRACKER_BCRYPT_ROUNDS, or the default when it is not set"""
+    rounds = read_int(environ, "FINANCE_TRACKER_BCRYPT_ROUNDS")
+    if rounds is None:
+        return DEFAULT_BCRYPT_ROUNDS
+    if not MIN_BCRYPT_ROUNDS <= rounds <= MAX_BCRYPT_ROUNDS:
+        raise ValueError(f"FINANCE_TRACKER_BCRYPT_ROUNDS must be between {MIN_BCRYPT_ROUNDS} and "
+                         f"{MAX_BCRYPT_ROUNDS}, got {rounds}")
+    return rounds
+
+
 class UserCrud:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rounds: int = None):
         self._db = db
+        # the bcrypt cost factor for new hashes, every step up doubles how long hashing and logging in take.
+        # it is read here and not when the module loads, so a bad setting doesn't break every import
+        self._rounds = rounds or read_bcrypt_rounds()
 
     """Hash the password that the user enters"""
     def hash_password(self, plain_text: str) -> str:
         #generate a salt and hash the password 
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=self._rounds)
         hashed = bcrypt.hashpw(plain_text.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
+    """Check if the hash was made with a different cost factor than the one configured now"""
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # a bcrypt hash looks like $2b$12$<salt and hash> where 12 is the cost factor
+        try:
+            return int(hashed_password.split("$")[2]) != self._rounds
+        except (IndexError, ValueError):
+            return True
+
     """Verify the password that hte user enter with the hashed password"""
     def verify_password(self, plain_password, hashed_password) -> bool:
         return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
     """Create a new user with the hashed password"""
     def create_user(self, username: str, email: str, password: str, birthdate: date = None) -> User:
-        hashed_pwd = self.hash_password(password)
+        return self.create_user_with_hash(username, email, self.hash_password(password), birthdate)
+
+    """Create a new user with a password that was already hashed, like on a worker thread"""
+    def create_user_with_hash(self, username: str, email: str, hashed_password: str, birthdate: date = None) -> User:
         user = User(
             username=username,
             email=email,
-            password = hashed_pwd,
+            password = hashed_password,
             birthdate= birthdate
         )
         self._db.add(user)
-        self._db.commit()
+        commit_or_flush(self._db)
         self._db.refresh(user)
         return user
 
@@ -54,8 +89,10 @@ class UserCrud:
         if not user:
             return False
         else:
+            # the rollups are not tied to the user by a relationship so they have to be removed here
+            RollupCrud(self._db).delete_user_rollups(user_id)
             self._db.delete(user)
-            self._db.commit()
+            commit_or_flush(self._db)
             return True
 
     """Authenticate the user when logging in with email and password"""
@@ -65,4 +102,15 @@ class UserCrud:
             return None
         if not self.verify_password(password, user.password):
             return None
+        if self.needs_rehash(user.password):
+            self.update_password_hash(user, self.hash_password(password))
+        return user
+
+    """Replace the user's password hash, like when it was made with an old cost factor"""
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        # the user can come from a session that was already closed, like the one the login looked them up in
+        user = self._db.merge(user)
+        user.password = hashed_password
+        commit_or_flush(self._db)
+        self._db.refresh(user)
         return user
\ No newline at end of file
@@ -1,7 +1,222 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import os
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool, StaticPool
 
-engine=create_engine("sqlite:///finance_tracker.db")
+# the pragmas every new sqlite connection runs for each profile.
+# "durable" keeps a full fsync on every commit, "fast" only syncs the write-ahead log at checkpoints,
+# which can lose the last commits on a power cut but never corrupts the database
+SQLITE_PROFILES = {
+    "default": {},
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    }
+}
+
+DEFAULT_DATABASE_URL = "sqlite:///finance_tracker.db"
+
+POOL_CLASSES = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton": SingletonThreadPool
+}
+
+# the key in session.info that counts how many units of work the session is in on its thread
+UNIT_OF_WORK_DEPTH = "unit_of_work_depth"
+
+# the key in session.info set when a write in the unit of work failed, so it rolls back instead of committing
+UNIT_OF_WORK_FAILED = "unit_of_work_failed"
+
+BOOLEAN_VALUES = {"1": True, "true": True, "yes": True, "on": True, "0": False, "false": False, "no": False, "off": False}
+
+
+def apply_sqlite_profile(engine, profile: str) -> None:
+    """Run the pragmas of the profile on every new connection of the sqlite engine"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Database profile must be one of {', '.join(SQLITE_PROFILES)}")
+    pragmas = SQLITE_PROFILES[profile]
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def read_int(environ, name: str):
+    value = environ.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number, got '{value}'")
+
+
+def read_bool(environ, name: str):
+    value = environ.get(name)
+    if value is None or value == "":
+        return None
+    if value.strip().lower() not in BOOLEAN_VALUES:
+        raise ValueError(f"{name} must be true or false, got '{value}'")
+    return BOOLEAN_VALUES[value.strip().lower()]
+
+
+def read_float(environ, name: str):
+    value = environ.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got '{value}'")
+
+
+def get_engine_settings(environ=os.environ) -> tuple[str, str, dict]:
+    """Read the database url, sqlite profile and create_engine options from the environment.
+
+    FINANCE_TRACKER_DATABASE_URL    the database url, defaults to finance_tracker.db in the working directory
+    FINANCE_TRACKER_DB_PROFILE      the sqlite pragma profile, one of SQLITE_PROFILES, defaults to durable
+    FINANCE_TRACKER_DB_POOL         queue, null, static or singleton, defaults to sqlalchemy's choice for the url
+    FINANCE_TRACKER_DB_POOL_SIZE    connections kept open in the pool
+    FINANCE_TRACKER_DB_MAX_OVERFLOW connections opened past the pool size when it is busy
+    FINANCE_TRACKER_DB_PRE_PING     check a connection still works before using it
+    FINANCE_TRACKER_DB_QUERY_CACHE_SIZE  how many compiled statements are cached
+    FINANCE_TRACKER_DB_ECHO         log every statement
+    Options that are not set are left to sqlalchemy's defaults.
+    """
+    url = environ.get("FINANCE_TRACKER_DATABASE_URL") or DEFAULT_DATABASE_URL
+    profile = environ.get("FINANCE_TRACKER_DB_PROFILE") or "durable"
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"FINANCE_TRACKER_DB_PROFILE must be one of {', '.join(SQLITE_PROFILES)}")
+
+    options = {}
+    pool = environ.get("FINANCE_TRACKER_DB_POOL")
+    if pool:
+        if pool not in POOL_CLASSES:
+            raise ValueError(f"FINANCE_TRACKER_DB_POOL must be one of {', '.join(POOL_CLASSES)}")
+        options["poolclass"] = POOL_CLASSES[pool]
+    for option, name, read in [
+        ("pool_size", "FINANCE_TRACKER_DB_POOL_SIZE", read_int),
+        ("max_overflow", "FINANCE_TRACKER_DB_MAX_OVERFLOW", read_int),
+        ("pool_pre_ping", "FINANCE_TRACKER_DB_PRE_PING", read_bool),
+        ("query_cache_size", "FINANCE_TRACKER_DB_QUERY_CACHE_SIZE", read_int),
+        ("echo", "FINANCE_TRACKER_DB_ECHO", read_bool)
+    ]:
+        value = read(environ, name)
+        if value is not None:
+            options[option] = value
+    return url, profile, options
+
+
+def build_engine(environ=os.environ):
+    """Create the engine the way the environment configures it"""
+    url, profile, options = get_engine_settings(environ)
+    engine = create_engine(url, **options)
+    apply_sqlite_profile(engine, profile)
+    if read_bool(environ, "FINANCE_TRACKER_DB_INSTRUMENT"):
+        from database.instrumentation import DEFAULT_SLOW_QUERY_MS, instrument_engine
+        slow_query_ms = read_float(environ, "FINANCE_TRACKER_DB_SLOW_QUERY_MS")
+        instrument_engine(engine, DEFAULT_SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms,
+                          environ.get("FINANCE_TRACKER_DB_STATS_FILE"))
+    return engine
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+# every thread gets a session of its own, so the services can share this instead of one session.
+# what an operation loaded is still used once its unit of work closed the session, so commits don't expire it
+ScopedSession = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False))
+
+
+@contextmanager
+def unit_of_work(session_factory=ScopedSession):
+    """Run one operation in a session that commits when the block ends, rolls back when it raises and is then closed.
+
+    Closing the session drops everything it loaded, so a long running app doesn't keep every row it
+    ever read. A unit of work started inside another one on the same thread joins it and only the
+    outer one commits. The CRUD methods save with commit_or_flush, so their writes are only flushed
+    inside a unit of work and an error anywhere in it undoes all of them. That includes a failed write
+    whose error a service caught and turned into a message, since rollback_write marks the unit as failed.
+    """
+    db = session_factory()
+    depth = db.info.get(UNIT_OF_WORK_DEPTH, 0)
+    db.info[UNIT_OF_WORK_DEPTH] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            if db.info.get(UNIT_OF_WORK_FAILED):
+                db.rollback()
+            else:
+                db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        else:
+            # the outer unit of work might catch this, it still has to roll back
+            db.info[UNIT_OF_WORK_FAILED] = True
+        raise
+    finally:
+        db.info[UNIT_OF_WORK_DEPTH] = depth
+        if depth == 0:
+            db.info.pop(UNIT_OF_WORK_FAILED, None)
+            if isinstance(session_factory, scoped_session):
+                # the thread's next unit of work starts with a new session
+                session_factory.remove()
+            else:
+                db.close()
+
+
+@contextmanager
+def session_scope(db):
+    """Run a service's database step in a unit of work when the service was given the ScopedSession.
+
+    A plain session, like the one a test or a background task hands in, is used as it is and its
+    owner decides when it is committed and closed.
+    """
+    if isinstance(db, scoped_session):
+        with unit_of_work(db) as session:
+            yield session
+    else:
+        yield db
+
+
+def in_unit_of_work(db) -> bool:
+    return db.info.get(UNIT_OF_WORK_DEPTH, 0) > 0
+
+
+def commit_or_flush(db) -> None:
+    """Commit the write, or only flush it when the session is in a unit of work that commits it at its end"""
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+def rollback_write(db) -> None:
+    """Roll back a failed write, or in a unit of work mark it to roll back everything at its end instead of committing"""
+    if in_unit_of_work(db):
+        db.info[UNIT_OF_WORK_FAILED] = True
+    else:
+        db.rollback()
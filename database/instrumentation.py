@@ -0,0 +1,183 @@
+"""Count and time every SQL statement an engine runs, grouped by the CRUD method that ran it.
+
+Turn it on for the app with FINANCE_TRACKER_DB_INSTRUMENT=1. The statistics are printed when the
+app exits, or written as JSON to FINANCE_TRACKER_DB_STATS_FILE when it is set, and statements slower
+than FINANCE_TRACKER_DB_SLOW_QUERY_MS (default 100) are logged to the "finance_tracker.sql" logger.
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+
+logger = logging.getLogger("finance_tracker.sql")
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+# how many of the latest timings are kept per statement for the percentiles
+MAX_SAMPLES = 1000
+
+CRUD_DIRECTORY = os.path.join("database", "crud") + os.sep
+SKIPPED_DIRECTORIES = (os.sep + "sqlalchemy" + os.sep, os.sep + "database" + os.sep + "instrumentation.py")
+
+WHITESPACE = re.compile(r"\s+")
+# an IN (...) list has one ? per id, so the lists are collapsed to group the same statement together
+PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Get the nearest-rank percentile of the samples, where fraction is between 0 and 1"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def normalize_statement(statement: str) -> str:
+    statement = WHITESPACE.sub(" ", statement).strip()
+    return PARAMETER_LIST.sub("(?, ...)", statement)
+
+
+def find_caller() -> str:
+    """Get the outermost CRUD method on the stack, like TransactionCrud.create_transaction.
+
+    Statements that were not run by a CRUD class are put under the module and function that ran them.
+    """
+    frame = sys._getframe(1)
+    crud_caller = None
+    other_caller = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if CRUD_DIRECTORY in filename:
+            owner = frame.f_locals.get("self")
+            name = type(owner).__name__ if owner is not None else frame.f_globals.get("__name__", "")
+            crud_caller = f"{name}.{frame.f_code.co_name}"
+        elif other_caller is None and not any(directory in filename for directory in SKIPPED_DIRECTORIES):
+            other_caller = f"{frame.f_globals.get('__name__', '')}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return crud_caller or other_caller or "unknown"
+
+
+class StatementStats:
+    """The count and timings of one statement run by one caller"""
+
+    def __init__(self, caller: str, statement: str):
+        self.caller = caller
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+
+    def to_dict(self) -> dict:
+        samples = list(self.samples)
+        return {
+            "caller": self.caller,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": percentile(samples, 0.50),
+            "p95_ms": percentile(samples, 0.95),
+            "p99_ms": percentile(samples, 0.99),
+            "max_ms": self.max_ms
+        }
+
+
+class QueryStats:
+    """Collect statement statistics from the engines it is attached to."""
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def detach(self, engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        # a statement that raised never gets to after_cursor_execute, so its start time is dropped here
+        # instead of piling up on the pooled connection
+        if exception_context.connection is None:
+            return
+        start_times = exception_context.connection.info.get("query_start_times")
+        if start_times:
+            start_times.pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_times")
+        if not start_times:
+            return
+        elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+        caller = find_caller()
+        normalized = normalize_statement(statement)
+        with self._lock:
+            stats = self._stats.get((caller, normalized))
+            if stats is None:
+                stats = StatementStats(caller, normalized)
+                self._stats[(caller, normalized)] = stats
+            stats.add(elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            logger.warning("Slow query %.1fms in %s%s: %s", elapsed_ms, caller,
+                           " (executemany)" if executemany else "", normalized)
+
+    def snapshot(self) -> list[dict]:
+        """Get the statistics of every statement so far, the most total time first"""
+        with self._lock:
+            rows = [stats.to_dict() for stats in self._stats.values()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def dump(self, path: str = None, limit: int = 20) -> None:
+        """Write the snapshot as JSON to the path, or print the statements with the most total time"""
+        rows = self.snapshot()
+        if path:
+            with open(path, "w", encoding="utf-8") as stats_file:
+                json.dump(rows, stats_file, indent=2)
+            return
+        if not rows:
+            return
+        print(f"{'caller':<45} {'count':>7} {'total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8}  statement")
+        for row in rows[:limit]:
+            print(f"{row['caller'][:45]:<45} {row['count']:>7} {row['total_ms']:>10.1f} {row['p50_ms']:>8.2f} "
+                  f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}  {row['statement'][:80]}")
+
+
+# the statistics of the app's engine when instrumentation is turned on
+query_stats = QueryStats()
+
+
+def instrument_engine(engine, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS, stats_file: str = None,
+                      dump_on_exit: bool = True) -> QueryStats:
+    """Start collecting the app's statement statistics for the engine and dump them when the process exits"""
+    query_stats.slow_query_ms = slow_query_ms
+    query_stats.attach(engine)
+    if dump_on_exit:
+        atexit.register(query_stats.dump, stats_file)
+    return query_stats
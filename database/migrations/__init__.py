@@ -0,0 +1,26 @@
+from database.migrations.framework import (
+    BASELINE_VERSION,
+    Migration,
+    MigrationContext,
+    get_schema_version,
+    run_migrations,
+    set_schema_version
+)
+from database.migrations.versions import LATEST_VERSION, MIGRATIONS
+
+__all__ = [
+    'BASELINE_VERSION',
+    'LATEST_VERSION',
+    'MIGRATIONS',
+    'Migration',
+    'MigrationContext',
+    'get_schema_version',
+    'migrate',
+    'run_migrations',
+    'set_schema_version'
+]
+
+
+def migrate(bind, target: int = None, report=print) -> list[tuple]:
+    """Move the database to the target version with the app's migrations, the latest one by default"""
+    return run_migrations(bind, MIGRATIONS, target, report)
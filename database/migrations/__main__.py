@@ -0,0 +1,27 @@
+"""Show the schema version of the database or move it to another one.
+
+Usage:
+    python -m database.migrations [--to VERSION]
+"""
+import argparse
+from database import Base, engine
+from database.migrations import BASELINE_VERSION, LATEST_VERSION, get_schema_version, migrate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate the database to another schema version")
+    parser.add_argument("--to", type=int, default=None, help=f"the version to move to, {LATEST_VERSION} by default")
+    args = parser.parse_args(argv)
+
+    version = get_schema_version(engine)
+    print(f"Database is at version {version or BASELINE_VERSION}, the latest is {LATEST_VERSION}")
+    if args.to is None or args.to > (version or BASELINE_VERSION):
+        # tables that are new since the database was made have to exist before the steps can change them
+        Base.metadata.create_all(bind=engine)
+    timings = migrate(engine, args.to)
+    if timings:
+        print(f"Ran {len(timings)} migration(s) in {sum(seconds for _, _, seconds in timings):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
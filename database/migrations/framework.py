@@ -0,0 +1,243 @@
+"""Run versioned schema changes on a database that already exists.
+
+create_all only makes the tables that are missing, so every change to a table that already has
+data, like a new column, index or backfill, is a migration step. Every change a step makes is
+committed on its own and backfills commit one batch at a time, so the app can keep using the
+database while a long step runs and a step that failed part way can simply be run again.
+"""
+import time
+from datetime import datetime, timezone
+from sqlalchemy import MetaData, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from database.models.schema_version_model import SchemaVersion, SCHEMA_VERSION_ROW_ID
+
+# the version of a database made before there were migrations, the first step moves it to the next one
+BASELINE_VERSION = 1
+
+# how many rows one backfill batch changes before it commits
+BACKFILL_BATCH_SIZE = 5000
+
+
+class Migration:
+    """One schema change, up moves the database to version and down moves it back to the version before"""
+
+    def __init__(self, version: int, description: str, up, down=None):
+        self.version = version
+        self.description = description
+        self.up = up
+        self.down = down
+
+
+class MigrationContext:
+    """What a migration step uses to change the database.
+
+    The helpers check before they change anything, so running a step again after it stopped part
+    way only does what is left.
+    """
+
+    def __init__(self, bind, report=print):
+        self.bind = bind
+        self._report = report
+
+    def report(self, message: str) -> None:
+        self._report(f"    {message}")
+
+    def execute(self, statement: str, parameters: dict = None) -> int:
+        """Run a statement in a transaction of its own and return how many rows it changed"""
+        with self.bind.begin() as connection:
+            return connection.execute(text(statement), parameters or {}).rowcount
+
+    def session(self) -> Session:
+        return Session(bind=self.bind, autoflush=False)
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.bind).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in {existing["name"] for existing in inspect(self.bind).get_columns(table)}
+
+    def add_column(self, table: str, column_definition: str) -> None:
+        """Add a column like "note VARCHAR DEFAULT ''" unless the table already has it"""
+        column = column_definition.split()[0]
+        if self.has_column(table, column):
+            return
+        # sqlite adds a column without rewriting the table, so this is quick even on big tables
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column_definition}")
+        self.report(f"added column {table}.{column}")
+
+    def drop_column(self, table: str, column: str) -> None:
+        if not self.has_column(table, column):
+            return
+        self.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        self.report(f"dropped column {table}.{column}")
+
+    def has_index(self, table: str, name: str) -> bool:
+        return name in {index["name"] for index in inspect(self.bind).get_indexes(table)}
+
+    def create_index(self, index) -> None:
+        """Create a sqlalchemy Index unless it already exists"""
+        if self.has_index(index.table.name, index.name):
+            return
+        index.create(bind=self.bind)
+        self.report(f"created index {index.name}")
+
+    def drop_index(self, table: str, name: str) -> None:
+        if not self.has_index(table, name):
+            return
+        self.execute(f"DROP INDEX {name}")
+        self.report(f"dropped index {name}")
+
+    def backfill(self, table: str, assignments: str, where: str = None, batch_size: int = BACKFILL_BATCH_SIZE,
+                 key: str = "id") -> int:
+        """Run UPDATE table SET assignments over the table in ranges of batch_size keys, one commit per range.
+
+        Returns how many rows were changed. where narrows the rows in every range, like to the ones
+        that were not filled in yet.
+        """
+        with self.bind.connect() as connection:
+            low, high = connection.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table}")).one()
+        if low is None:
+            return 0
+        condition = f" AND ({where})" if where else ""
+        changed = 0
+        for start in range(low, high + 1, batch_size):
+            changed += self.execute(
+                f"UPDATE {table} SET {assignments} WHERE {key} >= :start AND {key} < :end{condition}",
+                {"start": start, "end": start + batch_size}
+            )
+            done = min(start + batch_size, high + 1) - low
+            self.report(f"{table}: {done}/{high - low + 1} keys backfilled")
+        return changed
+
+    def column_type(self, table: str, column: str) -> str:
+        """Get the type the column was declared with in the database, like INTEGER or FLOAT"""
+        for existing in inspect(self.bind).get_columns(table):
+            if existing["name"] == column:
+                return str(existing["type"])
+        return None
+
+    def rebuild_table(self, table, conversions: dict = None, column_types: dict = None,
+                      batch_size: int = BACKFILL_BATCH_SIZE, key: str = "id") -> None:
+        """Copy a table into a new one made from its model and swap it in, for changes ALTER TABLE can't make.
+
+        conversions maps a column to the SQL that fills it from the old row, the other columns are
+        copied as they are. column_types changes the types of the new table, like to go back to an
+        older schema. The rows are copied in ranges of batch_size keys with a commit after each, or
+        all at once when key is None, and the tables are only swapped once every row was copied.
+        """
+        conversions = conversions or {}
+        new_name = f"{table.name}_rebuild"
+        # a copy left over from a rebuild that stopped part way is started over
+        self.execute(f"DROP TABLE IF EXISTS {new_name}")
+
+        metadata = MetaData()
+        for referenced_table in {foreign_key.column.table for foreign_key in table.foreign_keys}:
+            referenced_table.to_metadata(metadata)
+        new_table = table.to_metadata(metadata, name=new_name)
+        for column, column_type in (column_types or {}).items():
+            new_table.c[column].type = column_type
+        # only the table is made here, the indexes keep their names so they are made after the swap
+        with self.bind.begin() as connection:
+            connection.execute(CreateTable(new_table))
+
+        columns = ", ".join(column.name for column in table.columns)
+        values = ", ".join(conversions.get(column.name, column.name) for column in table.columns)
+        copy = f"INSERT INTO {new_name} ({columns}) SELECT {values} FROM {table.name}"
+        if key is None:
+            self.report(f"{table.name}: {self.execute(copy)} rows copied")
+        else:
+            with self.bind.connect() as connection:
+                low, high = connection.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table.name}")).one()
+            if low is not None:
+                for start in range(low, high + 1, batch_size):
+                    self.execute(f"{copy} WHERE {key} >= :start AND {key} < :end", {"start": start, "end": start + batch_size})
+                    done = min(start + batch_size, high + 1) - low
+                    self.report(f"{table.name}: {done}/{high - low + 1} keys copied")
+
+        with self.bind.begin() as connection:
+            connection.execute(text(f"DROP TABLE {table.name}"))
+            connection.execute(text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+            for index in table.indexes:
+                index.create(bind=connection)
+        self.report(f"rebuilt table {table.name}")
+
+    def for_each_batch(self, items: list, work, batch_size: int = BACKFILL_BATCH_SIZE, label: str = "rows") -> None:
+        """Call work(batch) for every batch_size items and report the progress after each one"""
+        for start in range(0, len(items), batch_size):
+            work(items[start:start + batch_size])
+            self.report(f"{min(start + batch_size, len(items))}/{len(items)} {label} done")
+
+
+def get_schema_version(bind) -> int:
+    """Get the schema version the database was set up with, or None if it was never set up"""
+    try:
+        with bind.connect() as connection:
+            return connection.execute(
+                select(SchemaVersion.version).where(SchemaVersion.id == SCHEMA_VERSION_ROW_ID)
+            ).scalar()
+    except OperationalError:
+        # databases made before the schema version have no table for it yet
+        return None
+
+
+def set_schema_version(bind, version: int) -> None:
+    SchemaVersion.__table__.create(bind=bind, checkfirst=True)
+    now = datetime.now(timezone.utc)
+    statement = sqlite_insert(SchemaVersion).values(id=SCHEMA_VERSION_ROW_ID, version=version, updated_on=now)
+    statement = statement.on_conflict_do_update(index_elements=[SchemaVersion.id],
+                                                set_={"version": version, "updated_on": now})
+    with bind.begin() as connection:
+        connection.execute(statement)
+
+
+def check_migrations(migrations: list[Migration]) -> None:
+    """Make sure the versions count up one at a time from the baseline"""
+    for expected, migration in enumerate(migrations, start=BASELINE_VERSION + 1):
+        if migration.version != expected:
+            raise ValueError(f"Migration '{migration.description}' must be version {expected}, got {migration.version}")
+
+
+def run_migrations(bind, migrations: list[Migration], target: int = None, report=print) -> list[tuple]:
+    """Move the database up or down to the target version, the latest one by default.
+
+    The schema version is saved after every step, so a failed step leaves the database at the last
+    version that finished. Returns the version, description and seconds of every step that ran.
+    """
+    check_migrations(migrations)
+    latest = migrations[-1].version if migrations else BASELINE_VERSION
+    target = latest if target is None else target
+    if not BASELINE_VERSION <= target <= latest:
+        raise ValueError(f"Target version must be between {BASELINE_VERSION} and {latest}, got {target}")
+
+    current = get_schema_version(bind) or BASELINE_VERSION
+    if target >= current:
+        steps = [(migration, migration.up, migration.version) for migration in migrations
+                 if current < migration.version <= target]
+        direction = "Migrating"
+    else:
+        steps = [(migration, migration.down, migration.version - 1) for migration in reversed(migrations)
+                 if target < migration.version <= current]
+        direction = "Reverting"
+        missing_down = [migration.version for migration, down, _ in steps if down is None]
+        if missing_down:
+            raise ValueError(f"Migration(s) {', '.join(map(str, missing_down))} cannot be reverted")
+
+    context = MigrationContext(bind, report)
+    timings = []
+    for migration, step, version_after in steps:
+        report(f"{direction} {migration.version}: {migration.description}")
+        started = time.perf_counter()
+        try:
+            step(context)
+        except Exception:
+            report(f"  failed after {time.perf_counter() - started:.2f}s, the database stays at version "
+                   f"{get_schema_version(bind) or BASELINE_VERSION}")
+            raise
+        set_schema_version(bind, version_after)
+        elapsed = time.perf_counter() - started
+        report(f"  done in {elapsed:.2f}s")
+        timings.append((migration.version, migration.description, elapsed))
+    return timings
@@ -0,0 +1,99 @@
+"""The schema migrations, oldest first.
+
+Add a step to the end of MIGRATIONS with the next version whenever a table that already exists
+changes. New tables don't need a step, initialize_database creates them.
+"""
+from sqlalchemy import Float, MetaData, select
+from database.crud.rollup_crud import RollupCrud
+from database.models.daily_rollup_model import DailyRollup
+from database.models.goal_model import Goal
+from database.models.transaction_model import Transaction
+from database.models.user_model import User
+from database.migrations.framework import Migration
+
+# the rollups are rebuilt for this many users between commits
+ROLLUP_USER_BATCH_SIZE = 50
+
+TRANSACTION_INDEX_NAMES = (
+    "ix_transactions_user_id_created_on",
+    "ix_transactions_user_id_type_created_on",
+    "ix_transactions_user_id_category_id_created_on"
+)
+
+
+def add_transaction_indexes(context):
+    for index in Transaction.__table__.indexes:
+        if index.name in TRANSACTION_INDEX_NAMES:
+            context.create_index(index)
+
+
+def drop_transaction_indexes(context):
+    for name in TRANSACTION_INDEX_NAMES:
+        context.drop_index("transactions", name)
+
+
+def build_daily_rollups(context):
+    DailyRollup.__table__.create(bind=context.bind, checkfirst=True)
+    db = context.session()
+    try:
+        user_ids = db.execute(select(User.id).order_by(User.id)).scalars().all()
+        rollup_crud = RollupCrud(db)
+
+        # every rebuild commits, so the transactions table is only locked for one user at a time
+        def rebuild_users(batch):
+            for user_id in batch:
+                rollup_crud.rebuild(user_id)
+
+        context.for_each_batch(user_ids, rebuild_users, ROLLUP_USER_BATCH_SIZE, label="users")
+    finally:
+        db.close()
+
+
+def drop_daily_rollups(context):
+    DailyRollup.__table__.drop(bind=context.bind, checkfirst=True)
+    context.report("dropped table daily_rollups")
+
+
+# the columns that hold money, they were FLOAT dollars before they became INTEGER cents
+MONEY_COLUMNS = (
+    (Transaction.__table__, ("amount",)),
+    (Goal.__table__, ("target_amount", "current_amount"))
+)
+
+
+def is_stored_in_cents(context, table, column) -> bool:
+    return context.column_type(table.name, column) == "INTEGER"
+
+
+def store_amounts_in_cents(context):
+    for table, columns in MONEY_COLUMNS:
+        if not context.has_table(table.name) or all(is_stored_in_cents(context, table, column) for column in columns):
+            continue
+        # rounding to 6 places first keeps 0.285 stored as 0.28499999... rounding up like to_cents does
+        context.rebuild_table(table, {column: f"CAST(ROUND(ROUND({column} * 100, 6)) AS INTEGER)" for column in columns})
+    # the rollups are built again from the transactions since they could hold dollars or cents by now
+    drop_daily_rollups(context)
+    build_daily_rollups(context)
+
+
+def store_amounts_in_dollars(context):
+    for table, columns in MONEY_COLUMNS:
+        if not any(is_stored_in_cents(context, table, column) for column in columns):
+            continue
+        context.rebuild_table(table, {column: f"{column} / 100.0" for column in columns},
+                              {column: Float() for column in columns})
+    # the rollups go back to the older FLOAT total, the rebuild sums the dollars straight into it
+    drop_daily_rollups(context)
+    rollups = DailyRollup.__table__.to_metadata(MetaData())
+    rollups.c.total.type = Float()
+    rollups.create(bind=context.bind)
+    build_daily_rollups(context)
+
+
+MIGRATIONS = [
+    Migration(2, "Add the per-user transaction indexes", add_transaction_indexes, drop_transaction_indexes),
+    Migration(3, "Build the daily rollups from the existing transactions", build_daily_rollups, drop_daily_rollups),
+    Migration(4, "Store amounts as whole cents", store_amounts_in_cents, store_amounts_in_dollars)
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
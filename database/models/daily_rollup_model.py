@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, Date
+from database.db_config import Base
+from database.models.money import Money
+
+# category_id is part of the primary key so transactions without a category are kept under 0 instead of NULL
+NO_CATEGORY_ID = 0
+
+class DailyRollup(Base):
+    """The total and count of a user's transactions for each day, type and category."""
+    __tablename__ = "daily_rollups"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    type = Column(String, primary_key=True)
+    category_id = Column(Integer, primary_key=True, default=NO_CATEGORY_ID)
+    total = Column(Money, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
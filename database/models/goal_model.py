@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Date
+from sqlalchemy import Column, String, Integer, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from database.db_config import Base
+from database.models.money import Money
 
 class Goal(Base):
     __tablename__ = "goals"
@@ -8,8 +9,8 @@ class Goal(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     description = Column(String, nullable=False)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, default=0.0)
+    target_amount = Column(Money, nullable=False)
+    current_amount = Column(Money, default=0.0)
     status = Column(String, default="current")  
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
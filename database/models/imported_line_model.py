@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Integer
+from database.db_config import Base
+
+class ImportedLine(Base):
+    """A fingerprint of a bank statement line that has already been imported for the user."""
+    __tablename__ = "imported_lines"
+
+    user_id = Column(Integer, primary_key=True)
+    fingerprint = Column(String, primary_key=True)
\ No newline at end of file
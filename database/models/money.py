@@ -0,0 +1,43 @@
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import Float, Integer
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    """Round an amount of dollars to the nearest whole cent"""
+    # going through the string keeps 0.1 + 0.2 from rounding down to 0.30 - a hair
+    return int(Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def format_money(amount) -> str:
+    """Show an amount of dollars the way every window shows it, like $12.50"""
+    return f"${amount:.2f}"
+
+
+class Money(TypeDecorator):
+    """An amount of money kept in the database as whole cents and used in python as a float of dollars.
+
+    Sums and comparisons in sqlite are then exact integer math, and the cents only become a float
+    once the result is read back.
+    """
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / 100
+
+    def coerce_compared_value(self, op, value):
+        # a number an amount is multiplied or divided by is a plain number and not dollars
+        if op in (operators.mul, operators.truediv, operators.floordiv, operators.mod):
+            return Float()
+        return self
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, DateTime
+from database.db_config import Base
+
+# the schema version is kept in the only row of the table
+SCHEMA_VERSION_ROW_ID = 1
+
+class SchemaVersion(Base):
+    """The version of the schema and default data the database was last set up with."""
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True, default=SCHEMA_VERSION_ROW_ID)
+    version = Column(Integer, nullable=False)
+    updated_on = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
@@ -1,16 +1,24 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database.db_config import Base
+from database.models.money import Money
 from datetime import datetime, timezone
 
 class Transaction(Base):
 
     __tablename__ = "transactions"
+    # every read filters on the user first and then narrows down by type or category within a date range,
+    # so the indexes lead with user_id and end with created_on so the range and the ordering use the index too
+    __table_args__ = (
+        Index("ix_transactions_user_id_created_on", "user_id", "created_on"),
+        Index("ix_transactions_user_id_type_created_on", "user_id", "type", "created_on"),
+        Index("ix_transactions_user_id_category_id_created_on", "user_id", "category_id", "created_on"),
+    )
 
     id = Column(Integer, primary_key= True, index = True)
     user_id = Column(Integer, ForeignKey("users.id"))
     category_id = Column(Integer, ForeignKey("categories.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     type = Column(String, nullable=False) #either expenses or income for when we track the transction
     description = Column(String)
     created_on = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,48 @@
+"""Rebuild or verify the daily rollups against the raw transactions.
+
+Usage:
+    python -m database.rollups verify [--user-id ID]
+    python -m database.rollups rebuild [--user-id ID]
+"""
+import argparse
+import sys
+from database.db_config import Base, SessionLocal, engine
+from database.crud.rollup_crud import RollupCrud
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify the daily rollups of the transactions")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=int, default=None, help="only check or rebuild this user's rollups")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rollup_crud = RollupCrud(db)
+        if args.command == "rebuild":
+            row_count = rollup_crud.rebuild(args.user_id)
+            print(f"Rebuilt {row_count} rollup row(s)")
+            return 0
+
+        drift = rollup_crud.verify(args.user_id)
+        for row in drift:
+            print(
+                f"User: {row['user_id']} | "
+                f"Day: {row['day']} | "
+                f"Type: {row['type']} | "
+                f"Category: {row['category_id']} | "
+                f"Total: {row['actual_total']} (expected {row['expected_total']}) | "
+                f"Count: {row['actual_count']} (expected {row['expected_count']})"
+            )
+        if drift:
+            print(f"Found drift in {len(drift)} rollup row(s), run 'rebuild' to fix them")
+            return 1
+        print("Rollups match the transactions")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,18 @@
 """Fixtures for pytest testin"""
 
 import pytest
+from contextlib import contextmanager
 from datetime import date
 from unittest.mock import Mock
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from database.db_config import Base
 from database.crud.user_crud import UserCrud
 from database.crud.goal_crud import GoalCrud
 from database.crud.category_crud import CategoryCrud
 from database.crud.transaction_crud import TransactionCrud
+from database.crud.report_crud import ReportCrud
+from database.crud.rollup_crud import RollupCrud
 
 #=============================================================
 #============FIXTURES FOR DATABASE TESTING====================
@@ -26,6 +29,25 @@ def db_session():
     session.close()
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def capture_statements():
+    """Capture the statements an engine sends to the database, used as
+    `with capture_statements(engine) as statements:`. With parameters=True every statement is
+    captured as a (statement, parameters) tuple."""
+    @contextmanager
+    def capture(engine, parameters=False):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, statement_parameters, context, executemany):
+            statements.append((statement, statement_parameters) if parameters else statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return capture
+
 @pytest.fixture
 def user_crud(db_session):
     """Create a UserCrud instance for testing."""
@@ -46,6 +68,16 @@ def transaction_crud(db_session):
     """Create a TransactionCrud instance for testing."""
     return TransactionCrud(db_session)
 
+@pytest.fixture
+def report_crud(db_session):
+    """Create a ReportCrud instance for testing."""
+    return ReportCrud(db_session)
+
+@pytest.fixture
+def rollup_crud(db_session):
+    """Create a RollupCrud instance for testing."""
+    return RollupCrud(db_session)
+
 @pytest.fixture
 def test_goal(test_user, db_session):
     """Create a test goal for testing."""
@@ -98,7 +130,10 @@ def test_user(db_session):
 @pytest.fixture
 def mock_db():
     """Create a mock database session for testing."""
-    return Mock()
+    db = Mock()
+    # a plain dict so the services can tell the session isn't in a unit of work
+    db.info = {}
+    return db
 
 @pytest.fixture
 def mock_user_crud():
@@ -1,9 +1,11 @@
 """Testing the Authentication class"""
 
 import pytest
+import threading
 from unittest.mock import Mock
 from datetime import date
 from app.authentication import Authentication
+from app.background import BackgroundExecutor
 
 class TestAuthentication:
     """Test Authentication functions and logic."""
@@ -138,3 +140,122 @@ class TestAuthentication:
         assert valid_logout is True
         assert "Logout successful" in message
 
+
+
+class TestAuthenticationInBackground:
+    """Test logging in and registering with bcrypt on a worker thread."""
+
+    @pytest.fixture
+    def executor(self):
+        # bcrypt doesn't need a session, so the executor is never asked for one
+        executor = BackgroundExecutor(Mock(), max_workers=1)
+        yield executor
+        executor.shutdown()
+
+    def run(self, start):
+        """Start the call and wait for the callback to be handed back, then run it like the window would."""
+        handed_back = []
+        done = threading.Event()
+        results = []
+
+        def call_on_main_thread(function):
+            handed_back.append(function)
+            done.set()
+
+        start(lambda *result: results.append(result), call_on_main_thread)
+        if not results:
+            assert done.wait(5)
+            handed_back[0]()
+        return results[0]
+
+    def test_login_in_background_success(self, mock_db, executor, mock_user, mock_user_crud):
+        """Test the password is checked in the background and the user is handed back."""
+        mock_user.password = "stored-hash"
+        mock_user_crud.get_user_by_email.return_value = mock_user
+        mock_user_crud.verify_password.return_value = True
+        mock_user_crud.needs_rehash.return_value = False
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, user, message = self.run(lambda callback, schedule: auth.login_in_background(
+            "bob@example.com", "12345", callback, schedule))
+
+        assert status is True
+        assert user == mock_user
+        assert "Login successful" in message
+        mock_user_crud.verify_password.assert_called_once_with("12345", "stored-hash")
+        mock_user_crud.update_password_hash.assert_not_called()
+
+    def test_login_in_background_rehashes(self, mock_db, executor, mock_user, mock_user_crud):
+        """Test a password with an old cost factor is rehashed and saved on the calling thread."""
+        mock_user.password = "old-hash"
+        mock_user_crud.get_user_by_email.return_value = mock_user
+        mock_user_crud.verify_password.return_value = True
+        mock_user_crud.needs_rehash.return_value = True
+        mock_user_crud.hash_password.return_value = "new-hash"
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, user, message = self.run(lambda callback, schedule: auth.login_in_background(
+            "bob@example.com", "12345", callback, schedule))
+
+        assert status is True
+        assert user == mock_user_crud.update_password_hash.return_value
+        mock_user_crud.update_password_hash.assert_called_once_with(mock_user, "new-hash")
+
+    def test_login_in_background_invalid_password(self, mock_db, executor, mock_user, mock_user_crud):
+        """Test a wrong password fails without saving anything."""
+        mock_user.password = "stored-hash"
+        mock_user_crud.get_user_by_email.return_value = mock_user
+        mock_user_crud.verify_password.return_value = False
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, user, message = self.run(lambda callback, schedule: auth.login_in_background(
+            "bob@example.com", "54321", callback, schedule))
+
+        assert status is False
+        assert user is None
+        assert "Invalid login credentials" in message
+        mock_user_crud.update_password_hash.assert_not_called()
+
+    def test_login_in_background_unknown_email(self, mock_db, executor, mock_user_crud):
+        """Test an unknown email fails right away."""
+        mock_user_crud.get_user_by_email.return_value = None
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, user, message = self.run(lambda callback, schedule: auth.login_in_background(
+            "nobody@example.com", "12345", callback, schedule))
+
+        assert status is False
+        assert "Invalid login credentials" in message
+        mock_user_crud.verify_password.assert_not_called()
+
+    def test_register_in_background_success(self, mock_db, executor, mock_user_crud):
+        """Test the password is hashed in the background and the user is saved with the hash."""
+        mock_user_crud.get_user_by_email.return_value = None
+        mock_user_crud.hash_password.return_value = "new-hash"
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, message = self.run(lambda callback, schedule: auth.register_in_background(
+            "testuser", "test@example.com", "12345", date(2000, 1, 1), callback, schedule))
+
+        assert status is True
+        assert "User created sucessfully" in message
+        mock_user_crud.create_user_with_hash.assert_called_once_with(
+            "testuser", "test@example.com", "new-hash", date(2000, 1, 1))
+
+    def test_register_in_background_existing_email(self, mock_db, executor, mock_user, mock_user_crud):
+        """Test an existing email fails before anything is hashed."""
+        mock_user_crud.get_user_by_email.return_value = mock_user
+        auth = Authentication(mock_db, executor)
+        auth._user_crud = mock_user_crud
+
+        status, message = self.run(lambda callback, schedule: auth.register_in_background(
+            "testuser", "bob@example.com", "12345", date(2000, 1, 1), callback, schedule))
+
+        assert status is False
+        assert "Email already exists" in message
+        mock_user_crud.hash_password.assert_not_called()
@@ -0,0 +1,151 @@
+"""Testing the BackgroundExecutor class"""
+
+import queue
+import threading
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.db_config import Base
+from database.crud.category_crud import CategoryCrud
+from database.crud.rollup_crud import RollupCrud
+from database.crud.user_crud import UserCrud
+from app.background import BackgroundExecutor
+
+
+class TestBackgroundExecutor:
+    """Test running service calls on worker threads with their own sessions."""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        # a file database so the worker threads and the test see the same data
+        engine = create_engine(f"sqlite:///{tmp_path / 'background.db'}")
+        Base.metadata.create_all(bind=engine)
+        yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        engine.dispose()
+
+    @pytest.fixture
+    def executor(self, session_factory):
+        executor = BackgroundExecutor(session_factory, max_workers=1)
+        yield executor
+        executor.shutdown()
+
+    @pytest.fixture
+    def user_id(self, session_factory):
+        db = session_factory()
+        try:
+            CategoryCrud(db).initialize_categories()
+            user = UserCrud(db, rounds=4).create_user("bob", "bob@example.com", "bob123", date(2000, 1, 1))
+            return user.id
+        finally:
+            db.close()
+
+    def test_submit_hands_back_result(self, executor, user_id):
+        """Test the task runs on a worker thread and its result is handed back to run on the calling thread."""
+        handed_back = queue.SimpleQueue()
+        results = []
+        task_threads = []
+
+        def task(services):
+            task_threads.append(threading.current_thread())
+            category_id = services.category_crud.get_category_id("Salary")
+            services.transactions.add_income(user_id, category_id, 100.0, "paycheck")
+            return services.transactions.get_dashboard_report_data(user_id)
+
+        executor.submit(task, lambda result, error: results.append((result, error)), handed_back.put)
+        handed_back.get(timeout=5)()
+
+        report_data, error = results[0]
+        assert error is None
+        assert report_data["monthly"]["income"] == 100.0
+        assert task_threads[0] is not threading.current_thread()
+
+    def test_each_task_has_its_own_session(self, executor, session_factory):
+        """Test every task gets a new session that is closed once the task is done."""
+        handed_back = queue.SimpleQueue()
+        sessions = []
+
+        for _ in range(2):
+            executor.submit(lambda services: sessions.append(services.db), lambda result, error: None, handed_back.put)
+            handed_back.get(timeout=5)()
+
+        assert sessions[0] is not sessions[1]
+        assert all(not session.in_transaction() for session in sessions)
+
+    def test_submit_hands_back_error(self, executor):
+        """Test an error in the task is handed back instead of a result."""
+        handed_back = queue.SimpleQueue()
+        results = []
+
+        def task(services):
+            raise ValueError("database is gone")
+
+        executor.submit(task, lambda result, error: results.append((result, error)), handed_back.put)
+        handed_back.get(timeout=5)()
+
+        result, error = results[0]
+        assert result is None
+        assert isinstance(error, ValueError)
+
+    def test_failed_task_is_rolled_back(self, executor, session_factory):
+        """Test what a task changed before it raised is not saved."""
+        handed_back = queue.SimpleQueue()
+
+        def task(services):
+            services.db.execute(text("INSERT INTO categories (name) VALUES ('Pets')"))
+            raise ValueError("database is gone")
+
+        executor.submit(task, lambda result, error: None, handed_back.put)
+        handed_back.get(timeout=5)()
+
+        db = session_factory()
+        try:
+            assert db.execute(text("SELECT COUNT(*) FROM categories WHERE name = 'Pets'")).scalar() == 0
+        finally:
+            db.close()
+
+    def test_failed_service_write_is_rolled_back(self, executor, session_factory, user_id, monkeypatch):
+        """Test a write the service caught an error from is not saved even though the task returned normally."""
+        transaction_ids = executor.run_task(lambda services: [
+            services.transactions.add_income(user_id, 1, amount, "paycheck").id for amount in (100.0, 50.0)])
+
+        def fail(self, changes):
+            raise RuntimeError("disk full")
+
+        # the rows are deleted before the rollups fail to update
+        monkeypatch.setattr(RollupCrud, "apply_changes", fail)
+        status, missing_ids, message = executor.run_task(
+            lambda services: services.transactions.delete_user_transactions(user_id, transaction_ids))
+        monkeypatch.undo()
+
+        assert status is False
+        assert "disk full" in message
+        db = session_factory()
+        try:
+            assert db.execute(text("SELECT COUNT(*) FROM transactions")).scalar() == 2
+            assert RollupCrud(db).verify() == []
+        finally:
+            db.close()
+
+    def test_cancelled_request_is_dropped(self, executor):
+        """Test a request cancelled while it runs or waits never calls on_done and a waiting one never runs."""
+        handed_back = queue.SimpleQueue()
+        results = []
+        ran = []
+        release = threading.Event()
+
+        running = executor.submit(lambda services: release.wait(5), lambda result, error: results.append("running"),
+                                  handed_back.put)
+        waiting = executor.submit(lambda services: ran.append("waiting"), lambda result, error: results.append("waiting"),
+                                  handed_back.put)
+        running.cancel()
+        waiting.cancel()
+        release.set()
+        handed_back.get(timeout=5)()
+
+        latest = executor.submit(lambda services: "latest", lambda result, error: results.append(result), handed_back.put)
+        handed_back.get(timeout=5)()
+
+        assert latest.cancelled is False
+        assert ran == []
+        assert results == ["latest"]
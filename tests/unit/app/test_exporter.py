@@ -0,0 +1,53 @@
+"""Testing the TransactionExporter class"""
+
+import csv
+import json
+import pytest
+from datetime import datetime, timezone
+from app.exporter import TransactionExporter
+
+
+class TestTransactionExporter:
+    """Test exporting the transaction history."""
+
+    def create_history(self, test_user, transaction_crud, category_crud):
+        salary_category = category_crud.get_category_by_name("Salary")
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        transaction_crud.create_transaction(test_user.id, salary_category.id, 1000.0, "income", "Payroll", datetime(2025, 1, 31, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 45.5, "expense", "Market", datetime(2025, 2, 3, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 12.0, "expense", None, datetime(2025, 3, 9, tzinfo=timezone.utc))
+
+    def test_export_csv(self, tmp_path, test_user, test_category, transaction_crud, category_crud, db_session):
+        """Test exporting the full history to csv oldest first."""
+        self.create_history(test_user, transaction_crud, category_crud)
+        path = tmp_path / "history.csv"
+
+        row_count = TransactionExporter(db_session, batch_size=2).export(test_user.id, str(path))
+
+        assert row_count == 3
+        with open(path, newline="", encoding="utf-8") as export_file:
+            rows = list(csv.DictReader(export_file))
+        assert [row["description"] for row in rows] == ["Payroll", "Market", ""]
+        assert rows[0]["category"] == "Salary"
+        assert rows[0]["type"] == "income"
+        assert float(rows[1]["amount"]) == 45.5
+        assert rows[1]["created_on"].startswith("2025-02-03")
+
+    def test_export_jsonl_with_filters(self, tmp_path, test_user, test_category, transaction_crud, category_crud, db_session):
+        """Test exporting a filtered slice of the history to jsonl."""
+        self.create_history(test_user, transaction_crud, category_crud)
+        path = tmp_path / "history.jsonl"
+
+        row_count = TransactionExporter(db_session).export(test_user.id, str(path), "jsonl", type="expense", start_date=datetime(2025, 3, 1, tzinfo=timezone.utc))
+
+        assert row_count == 1
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert len(records) == 1
+        assert records[0]["amount"] == 12.0
+        assert records[0]["category"] == "Groceries"
+        assert records[0]["description"] is None
+
+    def test_export_invalid_format(self, tmp_path, test_user, db_session):
+        """Test exporting to a format that is not supported."""
+        with pytest.raises(ValueError):
+            TransactionExporter(db_session).export(test_user.id, str(tmp_path / "history.xml"), "xml")
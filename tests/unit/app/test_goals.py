@@ -1,7 +1,8 @@
 """Testing the Goals class"""
 
+import threading
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from datetime import date
 from app.goals import Goals
 
@@ -182,6 +183,18 @@ class TestGoals:
         assert result == 50.0
         mock_goal_crud.get_goal_completion_percentage.assert_called_once_with(1, 1)
 
+    def test_get_goals_with_progress(self, mock_db, mock_goal_crud):
+        """Test getting the goals with their progress"""
+        mock_goal = Mock()
+        mock_goal_crud.get_goals_with_progress.return_value = [(mock_goal, 50.0)]
+
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result = goals.get_goals_with_progress(1)
+        assert result == [(mock_goal, 50.0)]
+        mock_goal_crud.get_goals_with_progress.assert_called_once_with(1, None)
+
     def test_get_goal_by_id_success(self, mock_db, mock_goal_crud):
         """Test getting goal by ID successfully"""
         mock_goal = Mock()
@@ -279,5 +292,84 @@ class TestGoals:
         assert result is False
         assert "Goal not found" in message
 
+    def test_start_expiry_sweep(self, mock_db, mock_goal_crud):
+        """Test the background sweep completes the expired goals on its own thread and turns off expiring on read."""
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+        mock_goal_crud.expire_on_read = True
+        session = Mock()
+        swept = threading.Event()
+        sweep_threads = []
+        session.close.side_effect = lambda: (sweep_threads.append(threading.current_thread()), swept.set())
+
+        with patch("app.goals.GoalCrud") as sweep_goal_crud:
+            goals.start_expiry_sweep(lambda: session, interval=60)
+            try:
+                assert swept.wait(5)
+                assert sweep_threads[0] is not threading.current_thread()
+                sweep_goal_crud.assert_called_once_with(session)
+                sweep_goal_crud.return_value.expire_goals.assert_called_once_with()
+                session.close.assert_called_once()
+                assert mock_goal_crud.expire_on_read is False
+            finally:
+                goals.stop_expiry_sweep()
+        assert mock_goal_crud.expire_on_read is True
+
+    def test_mark_goals_completed(self, mock_db, mock_goal_crud):
+        """Test marking many goals as completed reports how many were updated"""
+        mock_goal_crud.mark_goals_completed.return_value = {1: "updated", 2: "updated", 3: "not_found"}
+
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result, outcomes, message = goals.mark_goals_completed(1, [1, 2, 3])
+        assert result is True
+        assert outcomes == {1: "updated", 2: "updated", 3: "not_found"}
+        assert "2 goal(s)" in message
+        mock_goal_crud.mark_goals_completed.assert_called_once_with(1, [1, 2, 3])
+
+    def test_delete_goals_error(self, mock_db, mock_goal_crud):
+        """Test deleting many goals when the database fails"""
+        mock_goal_crud.delete_goals.side_effect = Exception("database is locked")
 
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result, outcomes, message = goals.delete_goals(1, [1, 2])
+        assert result is False
+        assert outcomes == {}
+        assert "database is locked" in message
+
+    def test_add_progress(self, mock_db, mock_goal_crud):
+        """Test adding an amount to many goals"""
+        mock_goal_crud.add_progress.return_value = {1: "updated", 2: "skipped"}
+
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result, outcomes, message = goals.add_progress(1, [1, 2], 25.0)
+        assert result is True
+        assert "$25.00 to 1 goal(s)" in message
+        mock_goal_crud.add_progress.assert_called_once_with(1, [1, 2], 25.0)
+
+    def test_add_progress_invalid_amount(self, mock_db, mock_goal_crud):
+        """Test adding a negative amount to many goals is rejected"""
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result, outcomes, message = goals.add_progress(1, [1, 2], -5.0)
+        assert result is False
+        mock_goal_crud.add_progress.assert_not_called()
+
+    def test_reactivate_goals(self, mock_db, mock_goal_crud):
+        """Test reactivating many completed goals"""
+        mock_goal_crud.reactivate_goals.return_value = {1: "updated", 2: "skipped"}
+
+        goals = Goals(mock_db)
+        goals._goal_crud = mock_goal_crud
+
+        result, outcomes, message = goals.reactivate_goals(1, [1, 2])
+        assert result is True
+        assert outcomes == {1: "updated", 2: "skipped"}
+        assert "reactivated 1 goal(s)" in message
 
@@ -0,0 +1,158 @@
+"""Testing the StatementImporter class"""
+
+import pytest
+from datetime import date
+from unittest.mock import Mock
+from app.importer import StatementImporter
+from database.crud.rollup_crud import RollupCrud
+
+CSV_STATEMENT = """Date,Amount,Description,Category
+2025-03-01,-20.50,Corner shop,Groceries
+2025-03-01,-20.50,Corner shop,Groceries
+2025-03-02,"1,500.00",Payroll,Salary
+2025-03-03,(12.00),Bus pass,transport
+2025-03-04,-8.00,Cinema,Unknown Category
+not-a-date,-1.00,Broken,Other
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250305120000[-5:EST]<TRNAMT>-42.10<FITID>A1<NAME>Hardware store</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250306
+<TRNAMT>250.00
+<FITID>A2
+<MEMO>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class TestStatementImporter:
+    """Test importing bank statements."""
+
+    def write_statement(self, tmp_path, name, content):
+        path = tmp_path / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_import_csv(self, tmp_path, test_user, test_category, db_session, transaction_crud, category_crud):
+        """Test importing a csv maps the columns, types and categories of every line."""
+        path = self.write_statement(tmp_path, "statement.csv", CSV_STATEMENT)
+        importer = StatementImporter(db_session, batch_size=2)
+
+        result = importer.import_csv(test_user.id, path)
+
+        assert result["lines"] == 6
+        assert result["imported"] == 5
+        assert result["duplicates"] == 0
+        assert result["invalid"] == 1
+        assert "Line 6" in result["errors"][0]
+        assert result["last_committed_line"] == 5
+
+        transactions = transaction_crud.get_transaction_by_user(test_user.id)
+        assert len(transactions) == 5
+        salary = [transaction for transaction in transactions if transaction.description == "Payroll"][0]
+        assert salary.type == "income"
+        assert salary.amount == 1500.0
+        assert salary.category_id == category_crud.get_category_by_name("Salary").id
+        assert salary.created_on.date() == date(2025, 3, 2)
+        bus_pass = [transaction for transaction in transactions if transaction.description == "Bus pass"][0]
+        assert bus_pass.type == "expense"
+        assert bus_pass.amount == 12.0
+        assert bus_pass.category_id == category_crud.get_category_by_name("Transport").id
+        cinema = [transaction for transaction in transactions if transaction.description == "Cinema"][0]
+        assert cinema.category_id == category_crud.get_category_by_name("Other").id
+        assert RollupCrud(db_session).verify() == []
+
+    def test_import_csv_twice_skips_duplicates(self, tmp_path, test_user, test_category, db_session, transaction_crud):
+        """Test importing the same statement again does not add the lines a second time."""
+        path = self.write_statement(tmp_path, "statement.csv", CSV_STATEMENT)
+        StatementImporter(db_session).import_csv(test_user.id, path)
+
+        result = StatementImporter(db_session).import_csv(test_user.id, path)
+
+        assert result["imported"] == 0
+        assert result["duplicates"] == 5
+        assert len(transaction_crud.get_transaction_by_user(test_user.id)) == 5
+
+    def test_duplicates_found_across_chunks(self, tmp_path, test_user, test_category, db_session, transaction_crud,
+                                            monkeypatch):
+        """Test the imported lines are looked up a chunk at a time and every duplicate is still found."""
+        monkeypatch.setattr("database.crud.import_crud.IN_CHUNK_SIZE", 2)
+        path = self.write_statement(tmp_path, "statement.csv", CSV_STATEMENT)
+        StatementImporter(db_session).import_csv(test_user.id, path)
+
+        result = StatementImporter(db_session).import_csv(test_user.id, path)
+
+        assert result["duplicates"] == 5
+        assert len(transaction_crud.get_transaction_by_user(test_user.id)) == 5
+
+    def test_import_csv_resume_after_failure(self, tmp_path, test_user, test_category, db_session, transaction_crud):
+        """Test a failed batch is rolled back and the import picks up where it stopped when run again."""
+        path = self.write_statement(tmp_path, "statement.csv", CSV_STATEMENT)
+        importer = StatementImporter(db_session, batch_size=2)
+        progress = Mock(side_effect=[None, RuntimeError("disk full")])
+
+        with pytest.raises(RuntimeError):
+            importer.import_csv(test_user.id, path, progress=progress)
+        # the first two batches were committed before the failure
+        assert len(transaction_crud.get_transaction_by_user(test_user.id)) == 4
+
+        result = StatementImporter(db_session, batch_size=2).import_csv(test_user.id, path, start_line=2)
+        assert result["imported"] == 1
+        assert result["duplicates"] == 2
+        assert len(transaction_crud.get_transaction_by_user(test_user.id)) == 5
+
+    def test_import_csv_column_map(self, tmp_path, test_user, test_category, db_session, transaction_crud):
+        """Test the csv columns can be mapped to other headers and a type column is used when given."""
+        path = self.write_statement(tmp_path, "bank.csv", "Posted,Value,Memo,Kind\n03/07/2025,75.00,Dinner,Debit\n")
+        importer = StatementImporter(db_session)
+
+        result = importer.import_csv(test_user.id, path, column_map={"created_on": "Posted", "amount": "Value", "description": "Memo", "type": "Kind"}, date_format="%m/%d/%Y")
+
+        assert result["imported"] == 1
+        transaction = transaction_crud.get_transaction_by_user(test_user.id)[0]
+        assert transaction.type == "expense"
+        assert transaction.amount == 75.0
+        assert transaction.description == "Dinner"
+        assert transaction.created_on.date() == date(2025, 3, 7)
+
+    def test_import_ofx(self, tmp_path, test_user, test_category, db_session, transaction_crud):
+        """Test importing an ofx statement with unclosed tags and skipping it by FITID the second time."""
+        path = self.write_statement(tmp_path, "statement.ofx", OFX_STATEMENT)
+
+        result = StatementImporter(db_session).import_ofx(test_user.id, path)
+        assert result["imported"] == 2
+        transactions = {transaction.description: transaction for transaction in transaction_crud.get_transaction_by_user(test_user.id)}
+        assert transactions["Hardware store"].type == "expense"
+        assert transactions["Hardware store"].amount == 42.10
+        assert transactions["Hardware store"].created_on.date() == date(2025, 3, 5)
+        assert transactions["Refund"].type == "income"
+        assert transactions["Refund"].amount == 250.0
+
+        result = StatementImporter(db_session).import_ofx(test_user.id, path)
+        assert result["imported"] == 0
+        assert result["duplicates"] == 2
+
+    def test_non_finite_amounts_are_invalid(self, tmp_path, test_user, test_category, db_session, transaction_crud):
+        """Test nan and inf amounts are reported as invalid lines in both formats instead of being imported."""
+        csv_path = self.write_statement(tmp_path, "statement.csv", "Date,Amount,Description,Category\n"
+                                        "2025-03-01,nan,Broken,Other\n2025-03-02,-inf,Broken,Other\n"
+                                        "2025-03-03,-5.00,Coffee,Other\n")
+        ofx_path = self.write_statement(tmp_path, "statement.ofx",
+                                        OFX_STATEMENT.replace("<TRNAMT>250.00", "<TRNAMT>Infinity"))
+
+        csv_result = StatementImporter(db_session).import_csv(test_user.id, csv_path)
+        ofx_result = StatementImporter(db_session).import_ofx(test_user.id, ofx_path)
+
+        assert csv_result["imported"] == 1
+        assert csv_result["invalid"] == 2
+        assert all("Invalid date or amount" in error for error in csv_result["errors"])
+        assert ofx_result["imported"] == 1
+        assert ofx_result["invalid"] == 1
+        assert "Invalid date or amount" in ofx_result["errors"][0]
+        assert len(transaction_crud.get_transaction_by_user(test_user.id)) == 2
+        assert RollupCrud(db_session).verify() == []
@@ -0,0 +1,32 @@
+"""Test the imports before the login window stay small"""
+
+from benchmarks.bench_startup import STARTUP_BUDGET_MS, find_deferred, measure_startup, parse_importtime, total_ms
+
+
+class TestStartup:
+    """Test what main.py loads before the login window is shown."""
+
+    def test_heavy_modules_are_deferred(self):
+        """Test matplotlib, PIL and the windows after login are not imported at startup."""
+        timings = measure_startup()
+
+        assert "client.windows.login_window" in timings
+        assert find_deferred(timings) == []
+
+    def test_startup_within_budget(self):
+        """Test the imports before the login window stay within the budget."""
+        # the first import may write the bytecode caches, the second one is the one a user sees
+        measure_startup()
+        assert total_ms(measure_startup()) < STARTUP_BUDGET_MS
+
+    def test_parse_importtime(self):
+        """Test the self and cumulative times are read from the importtime output."""
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   json.decoder\n"
+                  "import time:        80 |        200 | json\n")
+
+        timings = parse_importtime(output)
+
+        assert timings == {"json.decoder": (120, 120), "json": (80, 200)}
+        assert total_ms(timings) == 0.2
+        assert find_deferred({"matplotlib.figure": (1, 1), "PIL": (1, 1), "json": (1, 1)}) == ["PIL", "matplotlib.figure"]
@@ -130,4 +130,108 @@ class TestTransactions:
         result = transactions.get_expense_by_category(mock_user.id, start_date, end_date)
         assert result == expected_expense_result
         assert mock_transaction_crud.get_expense_by_category.call_count == 2
-        mock_transaction_crud.get_expense_by_category.assert_called_with(mock_user.id, start_date, end_date)
\ No newline at end of file
+        mock_transaction_crud.get_expense_by_category.assert_called_with(mock_user.id, start_date, end_date)
+    def test_get_dashboard_report_data(self, mock_db, mock_transaction_crud, mock_user):
+        """Test getting the daily, weekly and monthly reports together"""
+        expected_reports = {"daily": {}, "weekly": {}, "monthly": {}}
+        mock_transaction_crud.get_dashboard_reports.return_value = expected_reports
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        result = transactions.get_dashboard_report_data(mock_user.id)
+        assert result == expected_reports
+        mock_transaction_crud.get_dashboard_reports.assert_called_once_with(mock_user.id, None)
+
+    def test_add_transactions_bulk_success(self, mock_db, mock_transaction_crud, mock_user):
+        """Test adding many transactions at once for the user"""
+        mock_transaction_crud.create_transactions_bulk.return_value = [1, 2]
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        status, ids, message = transactions.add_transactions_bulk(mock_user.id, [
+            {"category_id": 2, "amount": 50.0, "type": "expense"},
+            {"category_id": 3, "amount": 500, "type": "income", "description": "Salary"}
+        ], batch_size=500)
+        assert status is True
+        assert ids == [1, 2]
+        assert "2" in message
+        mock_transaction_crud.create_transactions_bulk.assert_called_once_with([
+            {"category_id": 2, "amount": 50.0, "type": "expense", "user_id": mock_user.id},
+            {"category_id": 3, "amount": 500, "type": "income", "description": "Salary", "user_id": mock_user.id}
+        ], 500)
+
+    def test_add_transactions_bulk_invalid_rows(self, mock_db, mock_transaction_crud, mock_user):
+        """Test nothing is inserted when any of the transactions is invalid"""
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        status, ids, message = transactions.add_transactions_bulk(mock_user.id, [
+            {"category_id": 2, "amount": 50.0, "type": "expense"},
+            {"category_id": 2, "amount": 50.0, "type": "refund"}
+        ])
+        assert status is False
+        assert ids == []
+        assert "Row 2" in message
+
+        status, ids, message = transactions.add_transactions_bulk(mock_user.id, [{"category_id": 2, "amount": -5.0, "type": "expense"}])
+        assert status is False
+        assert "positive" in message
+
+        status, ids, message = transactions.add_transactions_bulk(mock_user.id, [{"category_id": 2, "amount": "5", "type": "expense"}])
+        assert status is False
+        assert "number" in message
+        mock_transaction_crud.create_transactions_bulk.assert_not_called()
+
+    def test_filter_transactions(self, mock_db, mock_transaction_crud, mock_expense_transaction, mock_user):
+        """Test filtering the transactions by type, category and date range in one call"""
+        mock_transaction_crud.query_transactions.return_value = [mock_expense_transaction]
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        start_date = datetime(2025, 1, 1)
+        end_date = datetime(2025, 12, 31)
+        result = transactions.filter_transactions(mock_user.id, "expense", 2, start_date, end_date)
+        assert result == [mock_expense_transaction]
+        mock_transaction_crud.query_transactions.assert_called_once_with(mock_user.id, "expense", 2, start_date, end_date, "newest")
+
+    def test_get_transactions_page(self, mock_db, mock_transaction_crud, mock_expense_transaction, mock_user):
+        """Test getting a page of transactions after the key of the previous page"""
+        next_key = (datetime(2025, 1, 1), 5)
+        mock_transaction_crud.get_transactions_page.return_value = ([mock_expense_transaction], None)
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        page, key = transactions.get_transactions_page(mock_user.id, "expense", after=next_key, limit=50)
+        assert page == [mock_expense_transaction]
+        assert key is None
+        mock_transaction_crud.get_transactions_page.assert_called_once_with(mock_user.id, "expense", None, None, None, next_key, 50, False)
+
+    def test_delete_user_transactions(self, mock_db, mock_transaction_crud, mock_user):
+        """Test deleting many transactions reports the ones that were not found"""
+        mock_transaction_crud.delete_transactions.return_value = (2, [9])
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        status, missing_ids, message = transactions.delete_user_transactions(mock_user.id, [1, 2, 9])
+        assert status is True
+        assert missing_ids == [9]
+        assert "Deleted 2 transaction(s)" in message
+        assert "1 transaction(s) were not found" in message
+        mock_transaction_crud.delete_transactions.assert_called_once_with(mock_user.id, [1, 2, 9])
+
+    def test_delete_user_transactions_error(self, mock_db, mock_transaction_crud, mock_user):
+        """Test deleting many transactions when the database fails"""
+        mock_transaction_crud.delete_transactions.side_effect = Exception("database is locked")
+
+        transactions = Transactions(mock_db)
+        transactions._transaction_crud = mock_transaction_crud
+
+        status, missing_ids, message = transactions.delete_user_transactions(mock_user.id, [1, 2])
+        assert status is False
+        assert "database is locked" in message
+
@@ -12,6 +12,21 @@ class TestCategoryCrud:
         category_crud.initialize_categories()
         assert category_crud.get_category_by_name("Groceries") is not None
 
+    def test_initialize_categories_one_insert(self, db_session, capture_statements):
+        """Test seeding is one insert that skips the categories that already exist."""
+        category_crud = CategoryCrud(db_session)
+        category_crud.add_category("Music")
+        category_crud.initialize_categories()
+        groceries_id = category_crud.get_category_id("Groceries")
+
+        with capture_statements(db_session.get_bind()) as statements:
+            category_crud.initialize_categories()
+
+        assert len(statements) == 1
+        assert statements[0].startswith("INSERT OR IGNORE INTO categories")
+        assert db_session.query(Category).count() == len(CategoryCrud.CATEGORIES) + 1
+        assert category_crud.get_category_id("Groceries") == groceries_id
+
     def test_get_category_by_name(self, test_category, category_crud):
         """Test getting a category by name."""
         groceries_category = category_crud.get_category_by_name("Groceries")
@@ -32,4 +47,30 @@ class TestCategoryCrud:
     def test_get_nonexistent_category(self, category_crud, test_category):
         """Test getting a nonexistent categoy."""
         nonexistent_category = category_crud.get_category_by_name("Music")
-        assert nonexistent_category is None
\ No newline at end of file
+        assert nonexistent_category is None
+    def test_get_category_id_and_name(self, test_category, category_crud):
+        """Test looking up category ids and names from the cache."""
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        assert category_crud.get_category_id("Groceries") == groceries_category.id
+        assert category_crud.get_category_id("groceries") is None
+        assert category_crud.get_category_id(" groceries ", ignore_case=True) == groceries_category.id
+        assert category_crud.get_category_id("Music") is None
+        assert category_crud.get_category_name(groceries_category.id) == "Groceries"
+        assert category_crud.get_category_names()[groceries_category.id] == "Groceries"
+
+    def test_category_cache_is_shared_and_needs_no_queries(self, test_category, category_crud, db_session, capture_statements):
+        """Test the categories are read once and then every crud on the same engine looks them up without a query."""
+        category_crud.get_category_id("Groceries")
+
+        with capture_statements(db_session.get_bind()) as statements:
+            other_category_crud = CategoryCrud(db_session)
+            for name in CategoryCrud.CATEGORIES:
+                assert other_category_crud.get_category_id(name) is not None
+        assert statements == []
+
+    def test_add_category_invalidates_cache(self, test_category, category_crud):
+        """Test a new category can be looked up right after it is added."""
+        assert category_crud.get_category_id("Music") is None
+        music_category = category_crud.add_category("Music")
+        assert category_crud.get_category_id("Music") == music_category.id
+        assert category_crud.get_category_name(music_category.id) == "Music"
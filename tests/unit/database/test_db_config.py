@@ -0,0 +1,249 @@
+"""Test the database engine configuration."""
+
+import queue
+import threading
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from database.db_config import (DEFAULT_DATABASE_URL, SQLITE_PROFILES, Base, apply_sqlite_profile, build_engine,
+                                get_engine_settings, in_unit_of_work, rollback_write, unit_of_work)
+from database.crud.category_crud import CategoryCrud
+from database.crud.transaction_crud import TransactionCrud
+from database.crud.user_crud import UserCrud
+from app.authentication import Authentication
+from app.background import BackgroundExecutor
+
+
+class TestSqliteProfiles:
+    """Test the sqlite pragma profiles."""
+
+    def read_pragmas(self, engine, names):
+        with engine.connect() as connection:
+            return {name: connection.execute(text(f"PRAGMA {name}")).scalar() for name in names}
+
+    @pytest.mark.parametrize("profile", ["durable", "fast"])
+    def test_profile_pragmas(self, tmp_path, profile):
+        """Test every new connection runs the pragmas of the profile."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_sqlite_profile(engine, profile)
+        pragmas = SQLITE_PROFILES[profile]
+
+        values = self.read_pragmas(engine, ["journal_mode", "synchronous", "cache_size", "temp_store", "busy_timeout"])
+        engine.dispose()
+
+        assert values["journal_mode"] == "wal"
+        # sqlite reports synchronous as 1 for NORMAL and 2 for FULL, and temp_store as 2 for MEMORY
+        assert values["synchronous"] == {"NORMAL": 1, "FULL": 2}[pragmas["synchronous"]]
+        assert values["cache_size"] == pragmas["cache_size"]
+        assert values["temp_store"] == 2
+        assert values["busy_timeout"] == pragmas["busy_timeout"]
+
+    def test_default_profile(self, tmp_path):
+        """Test the default profile leaves sqlite's own settings alone."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'default.db'}")
+        apply_sqlite_profile(engine, "default")
+
+        values = self.read_pragmas(engine, ["journal_mode", "synchronous"])
+        engine.dispose()
+
+        assert values == {"journal_mode": "delete", "synchronous": 2}
+
+    def test_unknown_profile(self):
+        """Test an unknown profile is rejected."""
+        engine = create_engine("sqlite:///:memory:")
+        with pytest.raises(ValueError):
+            apply_sqlite_profile(engine, "turbo")
+
+
+class TestEngineSettings:
+    """Test building the engine from the environment."""
+
+    def test_defaults(self):
+        """Test the engine defaults to the local database file with the durable profile."""
+        assert get_engine_settings({}) == (DEFAULT_DATABASE_URL, "durable", {})
+
+    def test_settings_from_environment(self):
+        """Test every engine option can be set from the environment."""
+        url, profile, options = get_engine_settings({
+            "FINANCE_TRACKER_DATABASE_URL": "sqlite:////data/finance.db",
+            "FINANCE_TRACKER_DB_PROFILE": "fast",
+            "FINANCE_TRACKER_DB_POOL": "queue",
+            "FINANCE_TRACKER_DB_POOL_SIZE": "10",
+            "FINANCE_TRACKER_DB_MAX_OVERFLOW": "0",
+            "FINANCE_TRACKER_DB_PRE_PING": "true",
+            "FINANCE_TRACKER_DB_QUERY_CACHE_SIZE": "1000",
+            "FINANCE_TRACKER_DB_ECHO": "off"
+        })
+        assert url == "sqlite:////data/finance.db"
+        assert profile == "fast"
+        assert options == {
+            "poolclass": QueuePool,
+            "pool_size": 10,
+            "max_overflow": 0,
+            "pool_pre_ping": True,
+            "query_cache_size": 1000,
+            "echo": False
+        }
+
+    @pytest.mark.parametrize("name, value", [
+        ("FINANCE_TRACKER_DB_PROFILE", "turbo"),
+        ("FINANCE_TRACKER_DB_POOL", "huge"),
+        ("FINANCE_TRACKER_DB_POOL_SIZE", "ten"),
+        ("FINANCE_TRACKER_DB_PRE_PING", "maybe")
+    ])
+    def test_invalid_settings(self, name, value):
+        """Test a bad value names the environment variable it came from."""
+        with pytest.raises(ValueError, match=name):
+            get_engine_settings({name: value})
+
+    def test_build_engine(self, tmp_path):
+        """Test the engine is built with the url, pool and profile from the environment."""
+        engine = build_engine({
+            "FINANCE_TRACKER_DATABASE_URL": f"sqlite:///{tmp_path / 'configured.db'}",
+            "FINANCE_TRACKER_DB_PROFILE": "fast",
+            "FINANCE_TRACKER_DB_POOL": "null",
+            "FINANCE_TRACKER_DB_QUERY_CACHE_SIZE": "50"
+        })
+        try:
+            assert isinstance(engine.pool, NullPool)
+            with engine.connect() as connection:
+                assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        finally:
+            engine.dispose()
+        assert (tmp_path / "configured.db").exists()
+
+
+class TestUnitOfWork:
+    """Test running operations in per-thread sessions that end with the operation."""
+
+    @pytest.fixture
+    def sessions(self, tmp_path):
+        # a file database so the sessions of every thread see the same data
+        engine = create_engine(f"sqlite:///{tmp_path / 'unit_of_work.db'}")
+        Base.metadata.create_all(bind=engine)
+        sessions = scoped_session(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+        yield sessions
+        sessions.remove()
+        engine.dispose()
+
+    def count_users(self, sessions):
+        with unit_of_work(sessions) as db:
+            return db.execute(text("SELECT COUNT(*) FROM users")).scalar()
+
+    def add_user(self, db, username):
+        db.execute(text("INSERT INTO users (username, email, password, birthdate) VALUES (:name, :email, 'hash', '2000-01-01')"),
+                   {"name": username, "email": f"{username}@example.com"})
+
+    def test_commits_and_closes(self, sessions):
+        """Test the work is committed and nothing loaded is kept once the block ends."""
+        with unit_of_work(sessions) as db:
+            user = UserCrud(db, rounds=4).create_user("bob", "bob@example.com", "bob123", date(2000, 1, 1))
+            assert user in db
+
+        assert user not in db
+        assert len(db.identity_map) == 0
+        # the user was loaded before the session closed, so it can still be read
+        assert user.username == "bob"
+        assert sessions() is not db
+
+    def test_rolls_back_on_error(self, sessions):
+        """Test nothing from a block that raised is saved."""
+        with pytest.raises(ValueError):
+            with unit_of_work(sessions) as db:
+                self.add_user(db, "bob")
+                raise ValueError("not saved")
+
+        assert self.count_users(sessions) == 0
+
+    def test_nested_joins_outer(self, sessions):
+        """Test a unit of work inside another one uses the same session and only the outer one commits."""
+        with pytest.raises(ValueError):
+            with unit_of_work(sessions) as outer:
+                with unit_of_work(sessions) as inner:
+                    assert inner is outer
+                    self.add_user(inner, "bob")
+                assert outer.in_transaction()
+                raise ValueError("not saved")
+
+        assert self.count_users(sessions) == 0
+
+    def test_caught_error_still_rolls_back(self, sessions):
+        """Test a failed write or inner unit of work whose error was caught still undoes the whole unit."""
+        with unit_of_work(sessions) as db:
+            self.add_user(db, "bob")
+            rollback_write(db)
+
+        with unit_of_work(sessions) as outer:
+            self.add_user(outer, "alice")
+            try:
+                with unit_of_work(sessions):
+                    raise ValueError("caught")
+            except ValueError:
+                pass
+
+        assert self.count_users(sessions) == 0
+        # the next unit of work starts clean
+        with unit_of_work(sessions) as db:
+            self.add_user(db, "carol")
+        assert self.count_users(sessions) == 1
+
+    def test_crud_writes_undone_with_the_unit(self, sessions):
+        """Test the CRUD writes in a unit of work are only flushed, so an error after them undoes them all."""
+        with unit_of_work(sessions) as db:
+            CategoryCrud(db).initialize_categories()
+
+        with pytest.raises(ValueError):
+            with unit_of_work(sessions) as db:
+                user = UserCrud(db, rounds=4).create_user("bob", "bob@example.com", "bob123", date(2000, 1, 1))
+                TransactionCrud(db).create_transaction(user.id, 1, 25.0, "expense")
+                raise ValueError("not saved")
+
+        assert self.count_users(sessions) == 0
+        with unit_of_work(sessions) as db:
+            assert db.execute(text("SELECT COUNT(*) FROM transactions")).scalar() == 0
+            assert db.execute(text("SELECT COUNT(*) FROM daily_rollups")).scalar() == 0
+
+    def test_service_steps_end_before_callback(self, sessions):
+        """Test the login's database steps are over before its callback runs, so a window it opens isn't in them."""
+        with unit_of_work(sessions) as db:
+            UserCrud(db, rounds=4).create_user("bob", "bob@example.com", "bob123", date(2000, 1, 1))
+        executor = BackgroundExecutor(sessions, max_workers=1)
+        auth = Authentication(sessions, executor)
+        auth._user_crud = UserCrud(sessions, rounds=5)
+        results = []
+
+        def callback(status, user, message):
+            results.append((status, user.username, in_unit_of_work(sessions())))
+
+        # the rehash to 5 rounds is a database step after bcrypt ran on the worker thread
+        handed_back = queue.SimpleQueue()
+        auth.login_in_background("bob@example.com", "bob123", callback, handed_back.put)
+        handed_back.get(timeout=5)()
+        executor.shutdown()
+
+        assert results == [(True, "bob", False)]
+        with unit_of_work(sessions) as db:
+            assert UserCrud(db, rounds=5).get_user_by_email("bob@example.com").password.startswith("$2b$05$")
+
+    def test_each_thread_has_its_own_session(self, sessions):
+        """Test the units of work on other threads get sessions of their own."""
+        thread_sessions = []
+
+        def run():
+            with unit_of_work(sessions) as db:
+                thread_sessions.append(db)
+                self.add_user(db, threading.current_thread().name)
+
+        with unit_of_work(sessions) as db:
+            threads = [threading.Thread(target=run, name=f"user{number}") for number in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert db not in thread_sessions
+
+        assert len(set(map(id, thread_sessions))) == 3
+        assert self.count_users(sessions) == 3
@@ -1,9 +1,9 @@
 """Test the GoalCrud class."""
 
 import pytest
-from database.crud.goal_crud import GoalCrud
+from database.crud.goal_crud import GoalCrud, GOAL_UPDATED, GOAL_SKIPPED, GOAL_NOT_FOUND
 from database.models.goal_model import Goal
-from datetime import date
+from datetime import date, timedelta
 
 
 class TestGoalCrud:
@@ -38,7 +38,8 @@ class TestGoalCrud:
     def test_get_completed_goals_by_user(self, test_user, test_goal, goal_crud):
         """Test getting all the completed goals for the user."""
         goal = goal_crud.get_completed_goals_by_user(test_user.id)
-        assert len(goal) == 0
+        # the goal is completed as soon as it reaches its end date, even though nothing else changed it
+        assert len(goal) == (1 if date.today() >= test_goal.end_date else 0)
     def test_get_current_goals_by_user(self, test_user, test_goal, goal_crud):
         """Test getting all the current goals for the user."""
         goal = goal_crud.get_current_goals_by_user(test_user.id)
@@ -206,4 +207,136 @@ class TestGoalCrud:
         result = goal_crud.mark_goal_current(test_user.id, 99999)
         assert result is None
 
+    def test_expire_goals(self, test_user, goal_crud):
+        """Test expiring completes only the goals that reached their end date in one update."""
+        past_goal = goal_crud.create_goal(test_user.id, "Past Goal", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+        today_goal = goal_crud.create_goal(test_user.id, "Ends Today", 100.0, 0.0, date(2025, 1, 1), date(2025, 6, 1))
+        future_goal = goal_crud.create_goal(test_user.id, "Future Goal", 100.0, 0.0, date(2025, 1, 1), date(2025, 12, 31))
+
+        assert goal_crud.expire_goals(test_user.id, today=date(2025, 6, 1)) == 2
+        assert past_goal.status == "completed"
+        assert today_goal.status == "completed"
+        assert future_goal.status == "current"
+        # a second sweep has nothing left to do
+        assert goal_crud.expire_goals(test_user.id, today=date(2025, 6, 1)) == 0
+
+    def test_expire_goals_other_users(self, test_user, goal_crud, user_crud):
+        """Test expiring the goals of one user does not touch the goals of other users."""
+        other_user = user_crud.create_user("other_user", "other@example.com", "password123", date(2000, 1, 1))
+        goal = goal_crud.create_goal(test_user.id, "Past Goal", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+        other_goal = goal_crud.create_goal(other_user.id, "Other Past Goal", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+
+        assert goal_crud.expire_goals(test_user.id) == 1
+        assert goal.status == "completed"
+        assert other_goal.status == "current"
+        assert goal_crud.expire_goals() == 1
+        assert other_goal.status == "completed"
+
+    def test_listing_goals_expires_with_one_update(self, test_user, goal_crud, db_session, capture_statements):
+        """Test listing goals runs one update for all the expired goals and then one select."""
+        user_id = test_user.id
+        for number in range(5):
+            goal_crud.create_goal(user_id, f"Past Goal {number}", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+
+        with capture_statements(db_session.get_bind()) as statements:
+            current_goals = goal_crud.get_current_goals_by_user(user_id)
+
+        assert current_goals == []
+        assert [statement.split()[0] for statement in statements] == ["UPDATE", "SELECT"]
+
+    def test_listing_goals_without_expire_on_read(self, test_user, db_session):
+        """Test listing goals is a plain read when the expiry is left to a periodic sweep."""
+        goal_crud = GoalCrud(db_session, expire_on_read=False)
+        goal = goal_crud.create_goal(test_user.id, "Past Goal", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+
+        assert goal_crud.get_current_goals_by_user(test_user.id) == [goal]
+        assert goal.status == "current"
+
+    def test_get_goals_with_progress(self, test_user, goal_crud, db_session, capture_statements):
+        """Test listing goals with their progress is one update and one select however many goals there are."""
+        user_id = test_user.id
+        half_goal = goal_crud.create_goal(user_id, "Half Way", 200.0, 100.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+        done_goal = goal_crud.create_goal(user_id, "Done", 50.0, 75.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+        for number in range(10):
+            goal_crud.create_goal(user_id, f"Goal {number}", 100.0, float(number), date(2025, 1, 1), date.today() + timedelta(days=30))
+
+        with capture_statements(db_session.get_bind()) as statements:
+            goals_with_progress = goal_crud.get_goals_with_progress(user_id)
+            progress = {goal.id: (goal.status, percentage) for goal, percentage in goals_with_progress}
+
+        assert [statement.split()[0] for statement in statements] == ["UPDATE", "SELECT"]
+        assert len(goals_with_progress) == 12
+        assert progress[half_goal.id] == ("current", pytest.approx(50.0))
+        assert progress[done_goal.id] == ("completed", pytest.approx(150.0))
+
+    def test_get_goals_with_progress_by_status(self, test_user, goal_crud):
+        """Test listing only the goals with a status."""
+        goal_crud.create_goal(test_user.id, "Current", 200.0, 50.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+        completed_goal = goal_crud.create_goal(test_user.id, "Completed", 50.0, 50.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+
+        goals_with_progress = goal_crud.get_goals_with_progress(test_user.id, "completed")
+        assert [(goal.id, percentage) for goal, percentage in goals_with_progress] == [(completed_goal.id, 100.0)]
+
+    def create_future_goals(self, goal_crud, user_id, count, current_amount=0.0):
+        return [goal_crud.create_goal(user_id, f"Goal {number}", 100.0, current_amount, date(2025, 1, 1),
+                                      date.today() + timedelta(days=30)) for number in range(count)]
+
+    def test_mark_goals_completed(self, test_user, goal_crud, db_session, capture_statements):
+        """Test marking many goals as completed in one statement and reporting the ids that don't exist."""
+        user_id = test_user.id
+        goals = self.create_future_goals(goal_crud, user_id, 300)
+        goal_ids = [goal.id for goal in goals]
+
+        with capture_statements(db_session.get_bind()) as statements:
+            outcomes = goal_crud.mark_goals_completed(user_id, goal_ids)
+
+        assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+        assert set(outcomes.values()) == {GOAL_UPDATED}
+        assert len(goal_crud.get_goals_with_progress(test_user.id, "completed")) == 300
+
+        outcomes = goal_crud.mark_goals_completed(test_user.id, [goal_ids[0], 99999])
+        assert outcomes == {goal_ids[0]: GOAL_UPDATED, 99999: GOAL_NOT_FOUND}
+
+    def test_delete_goals(self, test_user, goal_crud, user_crud):
+        """Test deleting many goals without touching the goals of other users."""
+        other_user = user_crud.create_user("other_user", "other@example.com", "password123", date(2000, 1, 1))
+        goals = self.create_future_goals(goal_crud, test_user.id, 3)
+        other_goal = self.create_future_goals(goal_crud, other_user.id, 1)[0]
+
+        outcomes = goal_crud.delete_goals(test_user.id, [goals[0].id, goals[1].id, other_goal.id])
+        assert outcomes == {goals[0].id: GOAL_UPDATED, goals[1].id: GOAL_UPDATED, other_goal.id: GOAL_NOT_FOUND}
+        assert [goal.id for goal in goal_crud.get_goals_by_user(test_user.id)] == [goals[2].id]
+        assert goal_crud.get_goal_by_id(other_goal.id, other_user.id) is not None
+
+    def test_add_progress(self, test_user, goal_crud):
+        """Test adding an amount to many goals skips the completed ones and the ones past their end date."""
+        goals = self.create_future_goals(goal_crud, test_user.id, 2, current_amount=10.0)
+        completed_goal = goal_crud.create_goal(test_user.id, "Completed", 100.0, 100.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+        goal_crud.expire_on_read = False
+        past_goal = goal_crud.create_goal(test_user.id, "Past", 100.0, 0.0, date(2025, 1, 1), date(2025, 1, 31))
+
+        outcomes = goal_crud.add_progress(test_user.id, [goals[0].id, goals[1].id, completed_goal.id, past_goal.id], 15.0)
+        assert outcomes == {
+            goals[0].id: GOAL_UPDATED,
+            goals[1].id: GOAL_UPDATED,
+            completed_goal.id: GOAL_SKIPPED,
+            past_goal.id: GOAL_SKIPPED
+        }
+        progress = {goal.id: percentage for goal, percentage in goal_crud.get_goals_with_progress(test_user.id)}
+        assert progress[goals[0].id] == pytest.approx(25.0)
+        assert progress[completed_goal.id] == pytest.approx(100.0)
+        assert progress[past_goal.id] == pytest.approx(0.0)
+
+    def test_reactivate_goals(self, test_user, goal_crud):
+        """Test reactivating completed goals skips the goals whose end date has passed."""
+        completed_goal = goal_crud.create_goal(test_user.id, "Completed", 100.0, 100.0, date(2025, 1, 1), date.today() + timedelta(days=30))
+        past_goal = goal_crud.create_goal(test_user.id, "Past", 100.0, 100.0, date(2025, 1, 1), date(2025, 1, 31))
+
+        outcomes = goal_crud.reactivate_goals(test_user.id, [completed_goal.id, past_goal.id, 99999])
+        assert outcomes == {completed_goal.id: GOAL_UPDATED, past_goal.id: GOAL_SKIPPED, 99999: GOAL_NOT_FOUND}
+        assert [goal.id for goal in goal_crud.get_current_goals_by_user(test_user.id)] == [completed_goal.id]
+
+    def test_bulk_goal_operation_without_ids(self, test_user, goal_crud):
+        """Test a bulk operation on no goals does nothing."""
+        assert goal_crud.delete_goals(test_user.id, []) == {}
 
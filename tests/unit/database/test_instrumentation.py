@@ -0,0 +1,105 @@
+"""Test the query instrumentation."""
+
+import json
+import logging
+import pytest
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from database.crud.goal_crud import GoalCrud
+from database.instrumentation import QueryStats, normalize_statement, percentile
+
+
+class TestQueryStats:
+    """Test collecting statement statistics from an engine."""
+
+    @pytest.fixture
+    def query_stats(self, db_session):
+        stats = QueryStats(slow_query_ms=1000.0)
+        stats.attach(db_session.get_bind())
+        yield stats
+        stats.detach(db_session.get_bind())
+
+    def test_statements_grouped_by_crud_method(self, query_stats, test_user, test_category, transaction_crud, category_crud):
+        """Test every statement is counted under the CRUD method the app called."""
+        user_id = test_user.id
+        groceries_id = category_crud.get_category_id("Groceries")
+        query_stats.reset()
+
+        for amount in range(3):
+            transaction_crud.create_transaction(user_id, groceries_id, 10.0 + amount, "expense")
+        transaction_crud.get_dashboard_reports(user_id)
+
+        rows = query_stats.snapshot()
+        callers = {row["caller"] for row in rows}
+        assert "TransactionCrud.create_transaction" in callers
+        # the rollup read inside the report is put under the method the app called
+        assert "TransactionCrud.get_dashboard_reports" in callers
+        assert not any(caller.startswith("RollupCrud") for caller in callers)
+
+        inserts = [row for row in rows if row["caller"] == "TransactionCrud.create_transaction"
+                   and row["statement"].startswith("INSERT INTO transactions")]
+        assert len(inserts) == 1
+        assert inserts[0]["count"] == 3
+        assert 0 <= inserts[0]["p50_ms"] <= inserts[0]["p95_ms"] <= inserts[0]["p99_ms"] <= inserts[0]["max_ms"]
+        assert inserts[0]["total_ms"] == pytest.approx(inserts[0]["mean_ms"] * 3)
+        assert [row["total_ms"] for row in rows] == sorted((row["total_ms"] for row in rows), reverse=True)
+
+    def test_in_lists_grouped_together(self, query_stats, test_user, db_session):
+        """Test the same statement with a different number of ids is counted once."""
+        user_id = test_user.id
+        goal_crud = GoalCrud(db_session)
+        goals = [goal_crud.create_goal(user_id, f"Goal {number}", 100.0, 0.0, date(2025, 1, 1), date(2099, 1, 1))
+                 for number in range(3)]
+        query_stats.reset()
+
+        goal_crud.delete_goals(user_id, [goals[0].id])
+        goal_crud.delete_goals(user_id, [goals[1].id, goals[2].id])
+
+        deletes = [row for row in query_stats.snapshot() if row["statement"].startswith("DELETE FROM goals")]
+        assert len(deletes) == 1
+        assert deletes[0]["caller"] == "GoalCrud.delete_goals"
+        assert deletes[0]["count"] == 2
+
+    def test_slow_query_log(self, query_stats, test_user, user_crud, caplog):
+        """Test statements over the threshold are logged with the method that ran them."""
+        user_id = test_user.id
+        query_stats.slow_query_ms = 0.0
+        with caplog.at_level(logging.WARNING, logger="finance_tracker.sql"):
+            user_crud.get_user_by_id(user_id)
+        assert any("UserCrud.get_user_by_id" in record.getMessage() for record in caplog.records)
+
+    def test_failed_statement_start_time_dropped(self, query_stats, db_session):
+        """Test a statement that raised doesn't leave its start time on the connection."""
+        connection = db_session.connection()
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+
+        assert connection.info.get("query_start_times") == []
+
+    def test_detach_and_dump(self, db_session, test_user, user_crud, tmp_path):
+        """Test the snapshot can be written as json and nothing is counted once detached."""
+        user_id = test_user.id
+        query_stats = QueryStats()
+        query_stats.attach(db_session.get_bind())
+        user_crud.get_user_by_id(user_id)
+        query_stats.detach(db_session.get_bind())
+        user_crud.get_user_by_id(user_id)
+
+        path = tmp_path / "stats.json"
+        query_stats.dump(str(path))
+        rows = json.loads(path.read_text())
+        assert sum(row["count"] for row in rows) == 1
+        assert rows[0]["caller"] == "UserCrud.get_user_by_id"
+
+    def test_percentile(self):
+        """Test the nearest-rank percentiles."""
+        samples = [float(number) for number in range(1, 101)]
+        assert percentile(samples, 0.50) == 50.0
+        assert percentile(samples, 0.95) == 95.0
+        assert percentile(samples, 0.99) == 99.0
+        assert percentile([], 0.5) == 0.0
+
+    def test_normalize_statement(self):
+        """Test whitespace and parameter lists are collapsed."""
+        assert normalize_statement("SELECT *\n  FROM goals WHERE id IN (?, ?,?)") == "SELECT * FROM goals WHERE id IN (?, ...)"
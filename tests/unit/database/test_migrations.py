@@ -0,0 +1,168 @@
+"""Test the schema migrations."""
+
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy import Float, MetaData, create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+from database import Category, DailyRollup, Goal, Transaction, User
+from database.migrations import BASELINE_VERSION, LATEST_VERSION, Migration, get_schema_version, migrate, run_migrations
+
+
+class TestMigrations:
+    """Test moving a database between schema versions."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def baseline_engine(self, engine):
+        """A database like the ones made before the migrations, with dollar amounts and no indexes or rollups."""
+        legacy = MetaData()
+        for table in (User.__table__, Category.__table__):
+            table.to_metadata(legacy)
+        transactions = Transaction.__table__.to_metadata(legacy)
+        transactions.c.amount.type = Float()
+        goals = Goal.__table__.to_metadata(legacy)
+        goals.c.target_amount.type = Float()
+        goals.c.current_amount.type = Float()
+        legacy.create_all(bind=engine)
+        with engine.begin() as connection:
+            for index in Transaction.__table__.indexes:
+                connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            connection.execute(text("INSERT INTO categories (id, name) VALUES (1, 'Groceries')"))
+            for user_id in (1, 2):
+                connection.execute(User.__table__.insert().values(id=user_id, username=f"user{user_id}",
+                                                                  email=f"user{user_id}@example.com",
+                                                                  password="hash", birthdate=date(2000, 1, 1)))
+                connection.execute(transactions.insert(), [
+                    {"user_id": user_id, "category_id": 1, "amount": 10.1 * user_id, "type": "expense",
+                     "created_on": datetime(2025, 1, day, tzinfo=timezone.utc)} for day in (1, 1, 2)
+                ])
+            connection.execute(goals.insert().values(user_id=1, description="Trip", target_amount=500.0,
+                                                     current_amount=0.1 + 0.2, start_date=date(2025, 1, 1),
+                                                     end_date=date(2025, 12, 31)))
+        return engine
+
+    def column_types(self, engine, table):
+        return {column["name"]: str(column["type"]) for column in inspect(engine).get_columns(table)}
+
+    def index_names(self, engine):
+        return {index["name"] for index in inspect(engine).get_indexes("transactions")}
+
+    def test_migrate_baseline_database(self, baseline_engine):
+        """Test every step runs in order and the indexes and rollups are added to the existing data."""
+        messages = []
+
+        timings = migrate(baseline_engine, report=messages.append)
+
+        assert [version for version, _, _ in timings] == list(range(BASELINE_VERSION + 1, LATEST_VERSION + 1))
+        assert all(seconds >= 0 for _, _, seconds in timings)
+        assert get_schema_version(baseline_engine) == LATEST_VERSION
+        assert "ix_transactions_user_id_created_on" in self.index_names(baseline_engine)
+        with baseline_engine.connect() as connection:
+            rollups = connection.execute(text(
+                "SELECT user_id, day, total, count FROM daily_rollups ORDER BY user_id, day")).all()
+        # the amounts are whole cents now, and the rollups are summed from them
+        assert rollups == [(1, "2025-01-01", 2020, 2), (1, "2025-01-02", 1010, 1),
+                           (2, "2025-01-01", 4040, 2), (2, "2025-01-02", 2020, 1)]
+        assert any("2/2 users done" in message for message in messages)
+        assert any("done in" in message for message in messages)
+
+    def test_amounts_move_to_cents_and_back(self, baseline_engine):
+        """Test the dollar amounts become whole cents the models read back as the same dollars."""
+        migrate(baseline_engine, report=lambda message: None)
+
+        assert self.column_types(baseline_engine, "transactions")["amount"] == "INTEGER"
+        assert self.column_types(baseline_engine, "goals")["current_amount"] == "INTEGER"
+        with baseline_engine.connect() as connection:
+            assert connection.execute(text("SELECT DISTINCT amount FROM transactions ORDER BY amount")).scalars().all() == [1010, 2020]
+            assert connection.execute(text("SELECT target_amount, current_amount FROM goals")).one() == (50000, 30)
+        with Session(bind=baseline_engine) as db:
+            assert db.execute(select(Goal.current_amount)).scalar() == 0.3
+            assert db.execute(select(DailyRollup.total).where(DailyRollup.user_id == 2).order_by(DailyRollup.day)).scalars().all() == [40.4, 20.2]
+        assert "ix_transactions_user_id_created_on" in self.index_names(baseline_engine)
+
+        migrate(baseline_engine, target=LATEST_VERSION - 1, report=lambda message: None)
+
+        assert self.column_types(baseline_engine, "transactions")["amount"] == "FLOAT"
+        assert self.column_types(baseline_engine, "daily_rollups")["total"] == "FLOAT"
+        with baseline_engine.connect() as connection:
+            assert connection.execute(text("SELECT target_amount, current_amount FROM goals")).one() == (500.0, 0.3)
+            totals = connection.execute(text("SELECT total FROM daily_rollups WHERE user_id = 1 ORDER BY day")).scalars().all()
+        assert totals == pytest.approx([20.2, 10.1])
+
+    def test_migrate_current_database_does_nothing(self, baseline_engine):
+        """Test nothing runs when the database is already at the latest version."""
+        migrate(baseline_engine, report=lambda message: None)
+
+        assert migrate(baseline_engine, report=lambda message: None) == []
+
+    def test_revert_and_migrate_again(self, baseline_engine):
+        """Test the steps can be reverted back to the baseline and run again."""
+        migrate(baseline_engine, report=lambda message: None)
+
+        timings = migrate(baseline_engine, target=BASELINE_VERSION, report=lambda message: None)
+
+        assert [version for version, _, _ in timings] == list(range(LATEST_VERSION, BASELINE_VERSION, -1))
+        assert get_schema_version(baseline_engine) == BASELINE_VERSION
+        assert "ix_transactions_user_id_created_on" not in self.index_names(baseline_engine)
+        assert not inspect(baseline_engine).has_table("daily_rollups")
+
+        migrate(baseline_engine, report=lambda message: None)
+        assert get_schema_version(baseline_engine) == LATEST_VERSION
+
+    def test_add_column_and_backfill_in_batches(self, baseline_engine, capture_statements):
+        """Test a new column is backfilled one batch of ids per commit."""
+        migrations = [Migration(
+            2, "Add a note to transactions",
+            lambda context: (context.add_column("transactions", "note VARCHAR"),
+                             context.backfill("transactions", "note = 'imported'", where="note IS NULL", batch_size=2)),
+            lambda context: context.drop_column("transactions", "note")
+        )]
+        with capture_statements(baseline_engine) as statements:
+            run_migrations(baseline_engine, migrations, report=lambda message: None)
+        updates = [statement for statement in statements if statement.startswith("UPDATE")]
+
+        with baseline_engine.connect() as connection:
+            notes = connection.execute(text("SELECT DISTINCT note FROM transactions")).scalars().all()
+        assert notes == ["imported"]
+        # six transactions in batches of two, each batch is its own update and commit
+        assert len(updates) == 3
+
+        run_migrations(baseline_engine, migrations, target=BASELINE_VERSION, report=lambda message: None)
+        assert "note" not in {column["name"] for column in inspect(baseline_engine).get_columns("transactions")}
+
+    def test_failed_step_keeps_last_version(self, baseline_engine):
+        """Test a failed step leaves the database at the version before it and runs again next time."""
+        attempts = []
+
+        def flaky_step(context):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("disk is full")
+            context.add_column("transactions", "note VARCHAR")
+
+        migrations = [Migration(2, "Add the indexes", lambda context: None), Migration(3, "Add a note", flaky_step)]
+
+        with pytest.raises(RuntimeError):
+            run_migrations(baseline_engine, migrations, report=lambda message: None)
+        assert get_schema_version(baseline_engine) == 2
+
+        timings = run_migrations(baseline_engine, migrations, report=lambda message: None)
+        assert [version for version, _, _ in timings] == [3]
+        assert get_schema_version(baseline_engine) == 3
+
+    def test_invalid_migrations(self, baseline_engine):
+        """Test versions that skip a number, unknown targets and steps without a down are rejected."""
+        with pytest.raises(ValueError):
+            run_migrations(baseline_engine, [Migration(3, "Skips version 2", lambda context: None)])
+
+        migrations = [Migration(2, "Cannot be reverted", lambda context: None)]
+        with pytest.raises(ValueError):
+            run_migrations(baseline_engine, migrations, target=5, report=lambda message: None)
+        run_migrations(baseline_engine, migrations, report=lambda message: None)
+        with pytest.raises(ValueError):
+            run_migrations(baseline_engine, migrations, target=BASELINE_VERSION, report=lambda message: None)
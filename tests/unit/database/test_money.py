@@ -0,0 +1,50 @@
+"""Test the amounts are kept as whole cents."""
+
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import text
+from database.models.money import format_money, to_cents
+
+
+class TestMoney:
+    """Test rounding, storing and adding up amounts of money."""
+
+    @pytest.mark.parametrize("amount, cents", [(0.1 + 0.2, 30), (12.345, 1235), (0.285, 29), (10, 1000), (-4.995, -500)])
+    def test_to_cents(self, amount, cents):
+        """Test amounts are rounded to the nearest cent with halves going away from zero."""
+        assert to_cents(amount) == cents
+
+    def test_format_money(self):
+        """Test amounts are shown with two decimals."""
+        assert format_money(12.5) == "$12.50"
+        assert format_money(0.1 + 0.2) == "$0.30"
+
+    def test_amount_is_stored_as_cents(self, transaction_crud, test_user, test_category, db_session):
+        """Test the database keeps whole cents and the model gives back dollars."""
+        transaction = transaction_crud.create_transaction(user_id=test_user.id, category_id=1, amount=19.99, type="expense")
+
+        stored = db_session.execute(text("SELECT amount FROM transactions WHERE id = :id"), {"id": transaction.id}).scalar()
+        assert stored == 1999
+        db_session.expire_all()
+        assert transaction_crud.get_transaction_by_id(transaction.id, test_user.id).amount == 19.99
+
+    def test_totals_are_exact(self, transaction_crud, report_crud, test_user, test_category):
+        """Test adding up many amounts that floats can't hold exactly ends on the cent."""
+        now = datetime.now(timezone.utc)
+        for day in range(10):
+            transaction_crud.create_transaction(user_id=test_user.id, category_id=1, amount=0.1, type="income",
+                                                created_on=now - timedelta(days=day))
+
+        totals = report_crud.get_custom_report(test_user.id, (now - timedelta(days=9)).date(), now.date())
+
+        assert totals["income"] == 1.0
+        assert totals["net_balance"] == 1.0
+
+    def test_goal_progress_is_exact(self, goal_crud, test_user):
+        """Test progress added in the database is added in cents."""
+        goal = goal_crud.create_goal(user_id=test_user.id, goal_description="Coffee", goal_amount=1.0, current_amount=0.1,
+                                     start_date=date.today(), end_date=date.today() + timedelta(days=30))
+
+        goal_crud.add_progress(test_user.id, [goal.id], 0.2)
+
+        assert goal_crud.get_goal_by_id(goal.id, test_user.id).current_amount == 0.3
@@ -0,0 +1,64 @@
+"""Test the ReportCrud class."""
+
+import pytest
+from datetime import date, datetime, timezone
+
+
+def create_transaction_on(transaction_crud, db_session, user_id, category_id, amount, type, created_on):
+    """Create a transaction on the given date."""
+    return transaction_crud.create_transaction(user_id=user_id, category_id=category_id, amount=amount, type=type, created_on=created_on)
+
+
+class TestReportCrud:
+    """Test ReportCrud report building."""
+
+    def test_report_without_category(self, test_user, transaction_crud, report_crud):
+        """Test transactions without a category count towards the totals but not the breakdown."""
+        transaction = transaction_crud.create_transaction(user_id=test_user.id, category_id=None, amount=40.0, type="expense")
+        day = transaction.created_on.date()
+
+        totals = report_crud.get_custom_report(test_user.id, day, day)
+        assert totals["expenses"] == 40.0
+        assert totals["expenses_by_category"] == {}
+
+    def test_report_single_query(self, test_user, test_transaction, test_expense_transaction, report_crud, db_session,
+                                 capture_statements):
+        """Test a whole report costs a single statement."""
+        user_id = test_user.id
+        with capture_statements(db_session.get_bind()) as statements:
+            report = report_crud.get_monthly_report(user_id)
+        assert len(statements) == 1
+        assert report["income"] == 100.0
+        assert report["expenses"] == 50.0
+
+    def test_get_dashboard_reports(self, test_user, test_category, transaction_crud, category_crud, report_crud, db_session):
+        """Test the dashboard reports put each transaction in every period its day falls in."""
+        salary_category = category_crud.get_category_by_name("Salary")
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        # 2025-03-02 is a Sunday so its week starts on Monday 2025-02-24 in the previous month
+        today = datetime(2025, 3, 2, 15, 0, 0, tzinfo=timezone.utc)
+        create_transaction_on(transaction_crud, db_session, test_user.id, salary_category.id, 500.0, "income", datetime(2025, 3, 2, 9, 0, 0, tzinfo=timezone.utc))
+        create_transaction_on(transaction_crud, db_session, test_user.id, groceries_category.id, 20.0, "expense", datetime(2025, 3, 1, 9, 0, 0, tzinfo=timezone.utc))
+        create_transaction_on(transaction_crud, db_session, test_user.id, groceries_category.id, 30.0, "expense", datetime(2025, 2, 25, 9, 0, 0, tzinfo=timezone.utc))
+        create_transaction_on(transaction_crud, db_session, test_user.id, groceries_category.id, 70.0, "expense", datetime(2025, 3, 20, 9, 0, 0, tzinfo=timezone.utc))
+        create_transaction_on(transaction_crud, db_session, test_user.id, groceries_category.id, 99.0, "expense", datetime(2025, 1, 20, 9, 0, 0, tzinfo=timezone.utc))
+
+        reports = report_crud.get_dashboard_reports(test_user.id, today)
+
+        assert reports["daily"]["date"] == date(2025, 3, 2)
+        assert reports["daily"]["income"] == 500.0
+        assert reports["daily"]["expenses"] == 0.0
+        assert reports["weekly"]["week_start"] == date(2025, 2, 24)
+        assert reports["weekly"]["week_end"] == date(2025, 3, 2)
+        assert reports["weekly"]["expenses"] == 50.0
+        assert reports["weekly"]["net_balance"] == 450.0
+        assert reports["monthly"]["year"] == 2025
+        assert reports["monthly"]["month"] == 3
+        assert reports["monthly"]["expenses"] == 90.0
+        assert reports["monthly"]["expenses_by_category"] == {"Groceries": 90.0}
+        assert reports["monthly"]["income_by_category"] == {"Salary": 500.0}
+
+        # the single scan gives the same reports as building each one on its own
+        assert reports["daily"] == report_crud.get_daily_report(test_user.id, today)
+        assert reports["weekly"] == report_crud.get_weekly_report(test_user.id, today)
+        assert reports["monthly"] == report_crud.get_monthly_report(test_user.id, 2025, 3)
@@ -0,0 +1,111 @@
+"""Test the RollupCrud class."""
+
+import pytest
+from database.models.daily_rollup_model import DailyRollup, NO_CATEGORY_ID
+from database.models.transaction_model import Transaction
+from datetime import date, datetime, timezone
+
+
+class TestRollupCrud:
+    """Test the daily rollups are kept in step with the transactions."""
+
+    def get_rollups(self, db_session, user_id):
+        """Get the rollup rows for the user keyed by (day, type, category id)."""
+        rollups = db_session.query(DailyRollup).filter(DailyRollup.user_id == user_id).all()
+        return {(rollup.day, rollup.type, rollup.category_id): (rollup.total, rollup.count) for rollup in rollups}
+
+    def test_create_transaction_updates_rollup(self, test_user, test_category, transaction_crud, category_crud, db_session):
+        """Test creating transactions adds them to the rollup of their day."""
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        created_on = datetime(2025, 3, 2, 9, 0, 0, tzinfo=timezone.utc)
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 20.0, "expense", created_on=created_on)
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 30.0, "expense", created_on=created_on)
+        transaction_crud.create_transaction(test_user.id, None, 5.0, "expense", created_on=created_on)
+
+        rollups = self.get_rollups(db_session, test_user.id)
+        assert rollups[(date(2025, 3, 2), "expense", groceries_category.id)] == (50.0, 2)
+        assert rollups[(date(2025, 3, 2), "expense", NO_CATEGORY_ID)] == (5.0, 1)
+
+    def test_update_transaction_moves_rollup(self, test_user, test_transaction, transaction_crud, category_crud, db_session):
+        """Test updating a transaction takes the old amount out and adds the new amount to the new type."""
+        salary_category = category_crud.get_category_by_name("Salary")
+        day = test_transaction.created_on.date()
+
+        transaction_crud.update_transaction(test_transaction.id, test_user.id, amount=250.0, type="expense")
+
+        rollups = self.get_rollups(db_session, test_user.id)
+        assert (day, "income", salary_category.id) not in rollups
+        assert rollups[(day, "expense", salary_category.id)] == (250.0, 1)
+
+    def test_delete_transaction_removes_rollup(self, test_user, test_transaction, test_expense_transaction, transaction_crud, db_session):
+        """Test deleting a transaction takes it out of the rollups and removes rows that become empty."""
+        transaction_crud.delete_transaction(test_user.id, test_transaction.id)
+
+        rollups = self.get_rollups(db_session, test_user.id)
+        assert len(rollups) == 1
+        assert list(rollups.values()) == [(50.0, 1)]
+
+    def test_delete_user_removes_rollups(self, test_user, test_transaction, user_crud, db_session):
+        """Test deleting the user also deletes their rollups."""
+        user_id = test_user.id
+        user_crud.delete_user(user_id)
+        assert self.get_rollups(db_session, user_id) == {}
+
+    def test_verify_and_rebuild(self, test_user, test_transaction, test_expense_transaction, rollup_crud, db_session):
+        """Test verify reports drift when raw rows change behind the rollups' back and rebuild fixes it."""
+        assert rollup_crud.verify() == []
+
+        # change the amount without going through TransactionCrud so the rollup drifts
+        db_session.query(Transaction).filter(Transaction.id == test_transaction.id).update({"amount": 175.0})
+        db_session.commit()
+
+        drift = rollup_crud.verify(test_user.id)
+        assert len(drift) == 1
+        assert drift[0]["type"] == "income"
+        assert drift[0]["expected_total"] == 175.0
+        assert drift[0]["actual_total"] == 100.0
+
+        rollup_crud.rebuild(test_user.id)
+        assert rollup_crud.verify() == []
+
+    def test_verify_finds_one_cent_drift(self, test_user, test_transaction, rollup_crud, db_session):
+        """Test a rollup that is off by a single cent is reported."""
+        db_session.query(Transaction).filter(Transaction.id == test_transaction.id).update({"amount": 100.01})
+        db_session.commit()
+
+        drift = rollup_crud.verify(test_user.id)
+        assert [(row["expected_total"], row["actual_total"]) for row in drift] == [(100.01, 100.0)]
+
+    def test_bulk_rollups_summed_in_cents(self, test_user, test_category, transaction_crud, rollup_crud, db_session):
+        """Test the rollup of amounts floats can't add up exactly ends on the cent."""
+        created_on = datetime(2025, 3, 1, 9, 0, 0, tzinfo=timezone.utc)
+        transaction_crud.create_transactions_bulk([{"user_id": test_user.id, "category_id": 1, "amount": 0.1,
+                                                   "type": "income", "created_on": created_on} for _ in range(10)])
+
+        assert self.get_rollups(db_session, test_user.id)[(date(2025, 3, 1), "income", 1)] == (1.0, 10)
+        assert rollup_crud.verify() == []
+
+    def test_needs_rebuild(self, test_user, test_transaction, rollup_crud, db_session):
+        """Test a database with transactions but no rollups needs a rebuild."""
+        assert rollup_crud.needs_rebuild() is False
+        db_session.query(DailyRollup).delete()
+        db_session.commit()
+        assert rollup_crud.needs_rebuild() is True
+
+    def test_reports_read_rollups(self, test_user, test_category, transaction_crud, category_crud, report_crud):
+        """Test the custom and monthly reports add up the rollups of the days in the range."""
+        salary_category = category_crud.get_category_by_name("Salary")
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        transaction_crud.create_transaction(test_user.id, salary_category.id, 900.0, "income", created_on=datetime(2025, 4, 1, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 60.0, "expense", created_on=datetime(2025, 4, 15, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 40.0, "expense", created_on=datetime(2025, 5, 1, tzinfo=timezone.utc))
+
+        report = report_crud.get_custom_report(test_user.id, date(2025, 4, 10), date(2025, 5, 1))
+        assert report["income"] == 0.0
+        assert report["expenses"] == 100.0
+        assert report["expenses_by_category"] == {"Groceries": 100.0}
+
+        monthly_report = report_crud.get_monthly_report(test_user.id, 2025, 4)
+        assert monthly_report["income"] == 900.0
+        assert monthly_report["expenses"] == 60.0
+        assert monthly_report["net_balance"] == 840.0
@@ -0,0 +1,58 @@
+"""Test setting up the database and its schema version."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from database import SCHEMA_VERSION, Base, Category, get_schema_version, initialize_database
+from database.crud.category_crud import CategoryCrud
+
+
+class TestInitializeDatabase:
+    """Test the database is only set up when its schema version is behind."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+        yield engine
+        engine.dispose()
+
+    def count_categories(self, engine):
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT COUNT(*) FROM categories")).scalar()
+
+    def test_new_database(self, engine):
+        """Test a new database gets the tables, the categories and the schema version."""
+        assert get_schema_version(engine) is None
+
+        assert initialize_database(engine) is True
+
+        assert get_schema_version(engine) == SCHEMA_VERSION
+        assert self.count_categories(engine) == len(CategoryCrud.CATEGORIES)
+
+    def test_initialized_database_reads_one_row(self, engine, capture_statements):
+        """Test a database at the schema version is only checked with one read."""
+        initialize_database(engine)
+        with capture_statements(engine) as statements:
+            assert initialize_database(engine) is False
+
+        assert len(statements) == 1
+        assert "FROM schema_version" in statements[0]
+
+    def test_database_without_schema_version(self, engine):
+        """Test a database made before the schema version is set up again without losing its categories."""
+        Base.metadata.create_all(bind=engine, tables=[Category.__table__])
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO categories (name) VALUES ('Music'), ('Groceries')"))
+
+        assert initialize_database(engine) is True
+
+        assert get_schema_version(engine) == SCHEMA_VERSION
+        assert self.count_categories(engine) == len(CategoryCrud.CATEGORIES) + 1
+
+    def test_older_schema_version(self, engine):
+        """Test a database at an older schema version is set up again."""
+        initialize_database(engine)
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE schema_version SET version = :version"), {"version": SCHEMA_VERSION - 1})
+
+        assert initialize_database(engine) is True
+        assert get_schema_version(engine) == SCHEMA_VERSION
@@ -1,6 +1,8 @@
 """Test TransactionCrud class"""
 
 import pytest
+from sqlalchemy import inspect
+from database import create_indexes
 from database.crud.transaction_crud import TransactionCrud
 from database.models.transaction_model import Transaction
 from datetime import date, datetime, timezone
@@ -106,6 +108,28 @@ class TestTransactionCrud:
         deleted_transaction = transaction_crud.delete_transaction(test_user.id, 99999)
         assert deleted_transaction is False
     
+    def test_delete_transactions(self, test_user, test_category, transaction_crud, category_crud, rollup_crud, user_crud, monkeypatch):
+        """Test deleting many transactions in chunks keeps the rollups right and reports the missing ids."""
+        monkeypatch.setattr("database.crud.transaction_crud.DELETE_CHUNK_SIZE", 3)
+        other_user = user_crud.create_user("other_user", "other@example.com", "password123", date(2000, 1, 1))
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        rows = [{"user_id": test_user.id, "category_id": groceries_category.id, "amount": float(amount), "type": "expense",
+                 "created_on": datetime(2025, 3, 1 + amount % 3, tzinfo=timezone.utc)} for amount in range(1, 11)]
+        ids = transaction_crud.create_transactions_bulk(rows)
+        other_id = transaction_crud.create_transactions_bulk([{**rows[0], "user_id": other_user.id}])[0]
+
+        deleted_count, missing_ids = transaction_crud.delete_transactions(test_user.id, ids[:8] + [other_id, 99999])
+
+        assert deleted_count == 8
+        assert missing_ids == [other_id, 99999]
+        assert [transaction.id for transaction in transaction_crud.query_transactions(test_user.id, order="oldest")] == ids[8:]
+        assert transaction_crud.get_transaction_by_id(other_id, other_user.id) is not None
+        assert rollup_crud.verify() == []
+
+    def test_delete_transactions_without_ids(self, test_user, transaction_crud):
+        """Test deleting no transactions does nothing."""
+        assert transaction_crud.delete_transactions(test_user.id, []) == (0, [])
+
     def test_get_total_transaction_by_type(self, test_user, transaction_crud, category_crud):
         """Test getting total transactions by type."""
         category_crud.initialize_categories()
@@ -240,4 +264,215 @@ class TestTransactionCrud:
         assert isinstance(monthly_report["expenses"], float)
         assert isinstance(monthly_report["net_balance"], float)
         assert isinstance(monthly_report["expenses_by_category"], dict)
-        assert isinstance(monthly_report["income_by_category"], dict)
\ No newline at end of file
+        assert isinstance(monthly_report["income_by_category"], dict)
+    def test_create_transactions_bulk(self, test_user, test_category, transaction_crud, category_crud, rollup_crud):
+        """Test inserting transactions in batches returns their ids in order and keeps the rollups in step."""
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        created_on = datetime(2025, 6, 1, 12, 0, 0, tzinfo=timezone.utc)
+        rows = [
+            {"user_id": test_user.id, "category_id": groceries_category.id, "amount": float(amount), "type": "expense", "description": f"Groceries {amount}", "created_on": created_on}
+            for amount in range(1, 26)
+        ]
+
+        ids = transaction_crud.create_transactions_bulk(rows, batch_size=10)
+
+        assert len(ids) == 25
+        assert ids == sorted(ids)
+        for transaction_id, row in zip(ids, rows):
+            transaction = transaction_crud.get_transaction_by_id(transaction_id, test_user.id)
+            assert transaction.amount == row["amount"]
+            assert transaction.description == row["description"]
+        assert transaction_crud.get_total_expenses(test_user.id) == sum(range(1, 26))
+        assert rollup_crud.verify(test_user.id) == []
+
+    def test_create_transactions_bulk_default_created_on(self, test_user, transaction_crud):
+        """Test bulk inserted transactions without a date are created now."""
+        ids = transaction_crud.create_transactions_bulk(iter([{"user_id": test_user.id, "amount": 10.0, "type": "income"}]))
+        transaction = transaction_crud.get_transaction_by_id(ids[0], test_user.id)
+        assert transaction.created_on is not None
+        assert transaction.created_on.date() == datetime.now(timezone.utc).date()
+
+    def test_iter_transactions(self, test_user, test_category, transaction_crud, category_crud, db_session):
+        """Test streaming the transactions oldest first as rows without keeping ORM objects in the session."""
+        user_id = test_user.id
+        groceries_category_id = category_crud.get_category_by_name("Groceries").id
+        for day in range(1, 6):
+            transaction_crud.create_transaction(user_id, groceries_category_id, float(day), "expense", created_on=datetime(2025, 5, day, tzinfo=timezone.utc))
+        db_session.expunge_all()
+
+        rows = list(transaction_crud.iter_transactions(user_id, category_id=groceries_category_id, batch_size=2))
+
+        assert [row.amount for row in rows] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert all(row.category == "Groceries" for row in rows)
+        assert len(db_session.identity_map) == 0
+
+    def test_query_transactions(self, test_user, test_category, transaction_crud, category_crud):
+        """Test filtering by any combination of type, category and date range in one query."""
+        salary_category = category_crud.get_category_by_name("Salary")
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        transaction_crud.create_transaction(test_user.id, salary_category.id, 1000.0, "income", created_on=datetime(2025, 1, 31, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 40.0, "expense", created_on=datetime(2025, 2, 3, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, groceries_category.id, 60.0, "expense", created_on=datetime(2025, 3, 9, tzinfo=timezone.utc))
+        transaction_crud.create_transaction(test_user.id, salary_category.id, 5.0, "expense", created_on=datetime(2025, 3, 10, tzinfo=timezone.utc))
+
+        all_transactions = transaction_crud.query_transactions(test_user.id)
+        assert [transaction.amount for transaction in all_transactions] == [5.0, 60.0, 40.0, 1000.0]
+
+        oldest_first = transaction_crud.query_transactions(test_user.id, order="oldest")
+        assert [transaction.amount for transaction in oldest_first] == [1000.0, 40.0, 60.0, 5.0]
+
+        expenses = transaction_crud.query_transactions(test_user.id, type="expense", category_id=groceries_category.id)
+        assert [transaction.amount for transaction in expenses] == [60.0, 40.0]
+
+        march_salary_expenses = transaction_crud.query_transactions(test_user.id, type="expense", category_id=salary_category.id, start_date=datetime(2025, 3, 1, tzinfo=timezone.utc), end_date=datetime(2025, 3, 31, tzinfo=timezone.utc))
+        assert [transaction.amount for transaction in march_salary_expenses] == [5.0]
+
+        assert transaction_crud.query_transactions(test_user.id, type="income", end_date=datetime(2025, 1, 1, tzinfo=timezone.utc)) == []
+
+    def test_query_transactions_invalid_order(self, test_user, transaction_crud):
+        """Test filtering with an order that is not supported."""
+        with pytest.raises(ValueError):
+            transaction_crud.query_transactions(test_user.id, order="amount")
+
+    def test_get_transactions_page(self, test_user, test_category, transaction_crud, category_crud):
+        """Test paging through the transactions newest first with the key of the previous page."""
+        groceries_category = category_crud.get_category_by_name("Groceries")
+        same_time = datetime(2025, 6, 1, 12, 0, 0, tzinfo=timezone.utc)
+        for amount in range(1, 8):
+            # a few transactions share the same created_on so the id has to break the tie between pages
+            created_on = same_time if amount <= 3 else datetime(2025, 6, amount, tzinfo=timezone.utc)
+            transaction_crud.create_transaction(test_user.id, groceries_category.id, float(amount), "expense", created_on=created_on)
+
+        seen = []
+        page, next_key = transaction_crud.get_transactions_page(test_user.id, limit=3)
+        seen.extend(page)
+        while next_key is not None:
+            page, next_key = transaction_crud.get_transactions_page(test_user.id, after=next_key, limit=3)
+            seen.extend(page)
+
+        assert len(seen) == 7
+        assert len({transaction.id for transaction in seen}) == 7
+        assert [transaction.id for transaction in seen] == [transaction.id for transaction in transaction_crud.query_transactions(test_user.id)]
+
+    def test_get_transactions_page_filtered(self, test_user, test_transaction, test_expense_transaction, transaction_crud):
+        """Test the last page has no key to a next page and the filters apply to each page."""
+        page, next_key = transaction_crud.get_transactions_page(test_user.id, type="income", limit=5)
+        assert [transaction.id for transaction in page] == [test_transaction.id]
+        assert next_key is None
+
+    def count_statements(self, capture_statements, db_session, run_queries):
+        """Run the queries and return how many statements they sent to the database."""
+        with capture_statements(db_session.get_bind()) as statements:
+            run_queries()
+        return len(statements)
+
+    @pytest.mark.parametrize("list_transactions", [
+        lambda crud, user_id: crud.get_transaction_by_user(user_id, with_category=True),
+        lambda crud, user_id: crud.get_transaction_by_type(user_id, "expense", with_category=True),
+        lambda crud, user_id: crud.get_transaction_by_date(user_id, with_category=True),
+        lambda crud, user_id: crud.query_transactions(user_id, with_category=True),
+        lambda crud, user_id: crud.get_transactions_page(user_id, limit=50, with_category=True)[0]
+    ])
+    def test_listing_with_category_is_one_statement(self, list_transactions, test_user, transaction_crud, category_crud,
+                                                    db_session, capture_statements):
+        """Test listing transactions and reading every category name costs one statement however many categories there are."""
+        user_id = test_user.id
+        categories = category_crud.get_all_categories()
+        for amount, category in enumerate(categories, start=1):
+            transaction_crud.create_transaction(user_id, category.id, float(amount), "expense")
+        # start from an empty session so the categories are not already loaded
+        db_session.expunge_all()
+
+        names = []
+
+        def render():
+            for transaction in list_transactions(transaction_crud, user_id):
+                names.append(transaction.category.name)
+
+        assert self.count_statements(capture_statements, db_session, render) == 1
+        assert sorted(names) == sorted(category.name for category in categories)
+
+    def test_listing_without_category_loads_lazily(self, test_user, transaction_crud, category_crud, db_session,
+                                                   capture_statements):
+        """Test the category is still loaded on first access when it is not joined in."""
+        user_id = test_user.id
+        categories = category_crud.get_all_categories()[:3]
+        for amount, category in enumerate(categories, start=1):
+            transaction_crud.create_transaction(user_id, category.id, float(amount), "expense")
+        db_session.expunge_all()
+
+        def render():
+            for transaction in transaction_crud.query_transactions(user_id):
+                transaction.category.name
+
+        assert self.count_statements(capture_statements, db_session, render) == 1 + len(categories)
+
+
+class TestTransactionCrudQueryPlans:
+    """Test that the TransactionCrud queries are answered from an index instead of scanning the whole table."""
+
+    def capture_transaction_queries(self, capture_statements, db_session, run_queries):
+        """Run the queries and return every SELECT on the transactions table with its parameters."""
+        with capture_statements(db_session.get_bind(), parameters=True) as statements:
+            run_queries()
+        return [(statement, parameters) for statement, parameters in statements
+                if statement.lstrip().upper().startswith("SELECT") and "transactions" in statement]
+
+    def assert_uses_index(self, db_session, statements):
+        """Check EXPLAIN QUERY PLAN for each statement so the transactions table is searched through an index."""
+        assert len(statements) > 0
+        connection = db_session.connection()
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            details = [row[-1] for row in plan if " transactions " in f"{row[-1]} "]
+            assert details, f"No plan found for the transactions table in: {statement}"
+            for detail in details:
+                assert detail.startswith("SEARCH") and "USING" in detail, f"{detail} for: {statement}"
+
+    def test_listing_queries_use_index(self, test_user, test_transaction, transaction_crud, category_crud, db_session,
+                                       capture_statements):
+        """Test the transaction listing queries search the transactions table by index."""
+        salary_category = category_crud.get_category_by_name("Salary")
+        start_date = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        end_date = datetime(2025, 12, 31, tzinfo=timezone.utc)
+
+        def run_queries():
+            transaction_crud.get_transaction_by_id(test_transaction.id, test_user.id)
+            transaction_crud.get_transaction_by_user(test_user.id)
+            transaction_crud.get_transaction_by_type(test_user.id, "income")
+            transaction_crud.get_transaction_by_category(test_user.id, salary_category.id)
+            transaction_crud.get_transaction_by_date(test_user.id, start_date, end_date)
+            transaction_crud.query_transactions(test_user.id, "income", salary_category.id, start_date, end_date)
+            transaction_crud.query_transactions(test_user.id, "income", start_date=start_date, order="oldest")
+            transaction_crud.get_transactions_page(test_user.id, after=(end_date, 10), limit=10)
+            transaction_crud.get_transactions_page(test_user.id, "expense", after=(end_date, 10), limit=10)
+
+        self.assert_uses_index(db_session, self.capture_transaction_queries(capture_statements, db_session, run_queries))
+
+    def test_report_queries_use_index(self, test_user, test_transaction, transaction_crud, db_session, capture_statements):
+        """Test the totals, by-category and report queries search the transactions table by index."""
+        start_date = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        end_date = datetime(2025, 12, 31, tzinfo=timezone.utc)
+
+        def run_queries():
+            transaction_crud.get_total_transaction_by_type(test_user.id, "income", start_date, end_date)
+            transaction_crud.get_transactions_by_category(test_user.id, "expense", start_date, end_date)
+            transaction_crud.get_daily_report(test_user.id)
+            transaction_crud.get_weekly_report(test_user.id)
+            transaction_crud.get_monthly_report(test_user.id)
+
+        self.assert_uses_index(db_session, self.capture_transaction_queries(capture_statements, db_session, run_queries))
+
+    def test_create_indexes_on_existing_table(self, db_session):
+        """Test that the missing indexes are added to a transactions table that was created before them."""
+        engine = db_session.get_bind()
+        db_session.close()
+        for index in Transaction.__table__.indexes:
+            index.drop(bind=engine)
+
+        create_indexes(engine)
+
+        index_names = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+        assert "ix_transactions_user_id_created_on" in index_names
+        assert "ix_transactions_user_id_type_created_on" in index_names
+        assert "ix_transactions_user_id_category_id_created_on" in index_names
@@ -1,6 +1,6 @@
 import pytest
 from datetime import date
-from database.crud.user_crud import UserCrud
+from database.crud.user_crud import DEFAULT_BCRYPT_ROUNDS, UserCrud, read_bcrypt_rounds
 from database.models.user_model import User
 
 
@@ -147,3 +147,60 @@ class TestUserCrud:
     
 
 
+
+    def test_hash_password_uses_configured_rounds(self, db_session):
+        """Test the cost factor of new hashes comes from the rounds the crud was made with."""
+        hashed = UserCrud(db_session, rounds=5).hash_password("test_password")
+
+        assert hashed.split("$")[2] == "05"
+        assert UserCrud(db_session, rounds=5).needs_rehash(hashed) is False
+        assert UserCrud(db_session, rounds=4).needs_rehash(hashed) is True
+
+    def test_authenticate_user_rehashes_old_cost(self, test_user, db_session):
+        """Test logging in rehashes a password that was hashed with a different cost factor."""
+        old_hash = UserCrud(db_session, rounds=4).hash_password("bob123")
+        UserCrud(db_session).update_password_hash(test_user, old_hash)
+
+        user_crud = UserCrud(db_session, rounds=5)
+        authenticated_user = user_crud.authenticate_user("bob@example.com", "bob123")
+
+        assert authenticated_user.id == test_user.id
+        assert authenticated_user.password != old_hash
+        assert authenticated_user.password.split("$")[2] == "05"
+        assert user_crud.verify_password("bob123", authenticated_user.password) is True
+
+    def test_authenticate_user_keeps_current_cost(self, test_user, db_session):
+        """Test a hash with the configured cost factor is left alone."""
+        user_crud = UserCrud(db_session, rounds=4)
+        user_crud.update_password_hash(test_user, user_crud.hash_password("bob123"))
+        current_hash = test_user.password
+
+        assert user_crud.authenticate_user("bob@example.com", "bob123").password == current_hash
+
+    def test_create_user_with_hash(self, user_crud):
+        """Test creating a user with a password hashed beforehand."""
+        hashed = user_crud.hash_password("corn123")
+
+        user = user_crud.create_user_with_hash("corndog", "corndog@example.com", hashed, date(2000, 1, 1))
+
+        assert user.password == hashed
+        assert user_crud.authenticate_user("corndog@example.com", "corn123").id == user.id
+
+    def test_read_bcrypt_rounds(self):
+        """Test the cost factor is read from the environment and the default is used when it is not set."""
+        assert read_bcrypt_rounds({}) == DEFAULT_BCRYPT_ROUNDS
+        assert read_bcrypt_rounds({"FINANCE_TRACKER_BCRYPT_ROUNDS": "13"}) == 13
+
+    @pytest.mark.parametrize("value", ["twelve", "3", "32"])
+    def test_read_bcrypt_rounds_invalid(self, value):
+        """Test a cost factor that isn't a whole number bcrypt accepts names the variable."""
+        with pytest.raises(ValueError, match="FINANCE_TRACKER_BCRYPT_ROUNDS"):
+            read_bcrypt_rounds({"FINANCE_TRACKER_BCRYPT_ROUNDS": value})
+
+    def test_bad_bcrypt_rounds_fails_on_use(self, db_session, monkeypatch):
+        """Test a bad cost factor in the environment only fails once a UserCrud needs it."""
+        monkeypatch.setenv("FINANCE_TRACKER_BCRYPT_ROUNDS", "99")
+
+        with pytest.raises(ValueError, match="FINANCE_TRACKER_BCRYPT_ROUNDS"):
+            UserCrud(db_session)
+        assert UserCrud(db_session, rounds=4).hash_password("bob123").startswith("$2b$04$")